@@ -0,0 +1,45 @@
+import copy
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import user_cache
+from .tokens import USER_CLAIMS
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """احراز هویت JWT با کش کاربران
+
+    کاربر از کش LRU محلی خوانده می‌شود و فقط در صورت نبودن در کش از پایگاه
+    داده بارگذاری می‌شود. بررسی‌های فعال بودن، تغییر رمز عبور و برابری نقش و
+    وضعیت توکن با کاربر در هر درخواست انجام می‌شود؛ توکنی که پیش از تغییر نقش
+    یا غیرفعال شدن کاربر صادر شده پذیرفته نمی‌شود.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('توکن شناسه کاربر ندارد.')
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed('کاربر یافت نشد.', code='user_not_found')
+            user_cache.set(user_id, user)
+
+        if not user.is_active:
+            raise AuthenticationFailed('حساب کاربری غیرفعال است.', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed('رمز عبور تغییر کرده است؛ دوباره وارد شوید.', code='password_changed')
+        for claim in USER_CLAIMS:
+            if claim in validated_token and validated_token[claim] != getattr(user, claim):
+                raise AuthenticationFailed('دسترسی کاربر تغییر کرده است؛ دوباره وارد شوید.', code='token_claims_outdated')
+
+        # هر درخواست نسخه خودش را می‌گیرد تا تغییرات یک درخواست روی نمونه کش‌شده اثر نگذارد
+        return copy.copy(user)
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .cache import user_cache
+from .models import User
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """پس از ثبت تراکنش، کاربر از کش احراز هویت حذف می‌شود تا نقش و رمز عبور جدید خوانده شوند"""
+    user_id = instance.pk
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+post_save.connect(invalidate_cached_user, sender=User)
+post_delete.connect(invalidate_cached_user, sender=User)
@@ -1,3 +1,109 @@
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .cache import UserCache, user_cache
+from .models import User
+from .tokens import tokens_for_user
+
+
+class UserCacheTests(TestCase):
+    """کش LRU کاربران با عمر محدود"""
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserCache(maxsize=2, ttl=60)
+        cache.set(1, 'a')
+        cache.set(2, 'b')
+        cache.get(1)
+        cache.set(3, 'c')
+        self.assertEqual(cache.get(1), 'a')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), 'c')
+    
+    def test_entries_expire_after_ttl(self):
+        cache = UserCache(maxsize=10, ttl=30)
+        with mock.patch('authentication.cache.time.monotonic', return_value=100.0):
+            cache.set(1, 'a')
+        with mock.patch('authentication.cache.time.monotonic', return_value=129.0):
+            self.assertEqual(cache.get(1), 'a')
+        with mock.patch('authentication.cache.time.monotonic', return_value=130.0):
+            self.assertIsNone(cache.get(1))
+    
+    def test_disabled_cache_stores_nothing(self):
+        cache = UserCache(maxsize=0, ttl=30)
+        cache.set(1, 'a')
+        self.assertIsNone(cache.get(1))
+
 
-# Create your tests here.
+class CachedJWTAuthenticationTests(TestCase):
+    """توکن‌های صادرشده پیش از تغییر نقش، غیرفعال شدن یا تغییر رمز پذیرفته نمی‌شوند"""
+    
+    password = 'old-pass-123'
+    
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='accountant', password=self.password, role='accounting')
+        self.client = APIClient()
+        self.url = reverse('user-profile')
+    
+    def get_profile(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get(self.url)
+    
+    def save_user(self, **fields):
+        user = User.objects.get(pk=self.user.pk)
+        for field, value in fields.items():
+            setattr(user, field, value)
+        # کاربر پس از ثبت تراکنش از کش حذف می‌شود
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+    
+    def test_user_is_cached_between_requests(self):
+        access = tokens_for_user(self.user)['access']
+        self.assertEqual(self.get_profile(access).status_code, 200)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get_profile(access).status_code, 200)
+        self.assertFalse([query for query in context.captured_queries if 'authentication_user' in query['sql']])
+    
+    def test_save_invalidates_cached_user(self):
+        self.get_profile(tokens_for_user(self.user)['access'])
+        self.assertIsNotNone(user_cache.get(self.user.pk))
+        self.save_user(full_name='نام جدید')
+        self.assertIsNone(user_cache.get(self.user.pk))
+    
+    def test_role_change_rejects_old_token(self):
+        access = tokens_for_user(self.user)['access']
+        self.assertEqual(self.get_profile(access).status_code, 200)
+        self.save_user(role='management')
+        response = self.get_profile(access)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'token_claims_outdated')
+        self.assertEqual(self.get_profile(tokens_for_user(User.objects.get(pk=self.user.pk))['access']).status_code, 200)
+    
+    def test_deactivation_rejects_old_token(self):
+        access = tokens_for_user(self.user)['access']
+        self.assertEqual(self.get_profile(access).status_code, 200)
+        self.save_user(is_active=False)
+        response = self.get_profile(access)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'user_inactive')
+    
+    def test_password_change_rejects_old_token(self):
+        access = tokens_for_user(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('change-password'), {
+                'old_password': self.password,
+                'new_password': 'new-pass-456',
+                'confirm_password': 'new-pass-456',
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        
+        rejected = self.get_profile(access)
+        self.assertEqual(rejected.status_code, 401)
+        self.assertEqual(rejected.data['detail'].code, 'password_changed')
+        self.assertEqual(self.get_profile(response.json()['access']).status_code, 200)
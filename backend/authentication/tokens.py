@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+# ادعاهای دسترسی که در توکن قرار می‌گیرند و در هر درخواست با کاربر مقایسه می‌شوند
+USER_CLAIMS = ('role', 'is_active')
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """توکن refresh همراه با نقش و وضعیت فعال بودن کاربر؛ توکن access همین ادعاها را کپی می‌کند"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def tokens_for_user(user):
+    refresh = UserClaimsRefreshToken.for_user(user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
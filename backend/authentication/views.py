@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from .models import User
+from .tokens import tokens_for_user
 from .serializers import *
 
 
@@ -16,11 +17,9 @@ class LoginView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
             
             return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
+                **tokens_for_user(user),
                 'user': UserSerializer(user).data
             }, status=status.HTTP_200_OK)
         
@@ -33,7 +32,10 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     
     def get_object(self):
-        return self.request.user
+        # ویرایش روی ردیف تازه پایگاه داده انجام می‌شود، نه کاربر کش‌شده احراز هویت
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(generics.GenericAPIView):
@@ -46,9 +48,14 @@ class ChangePasswordView(generics.GenericAPIView):
         if serializer.is_valid():
             user = request.user
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            # فقط رمز عبور نوشته می‌شود تا نسخه کش‌شده کاربر تغییرات دیگر را بازنویسی نکند
+            user.save(update_fields=['password'])
             
-            return Response({'message': 'رمز عبور با موفقیت تغییر کرد.'}, status=status.HTTP_200_OK)
+            # توکن‌های قبلی با تغییر رمز باطل می‌شوند؛ توکن جدید برگردانده می‌شود
+            return Response({
+                'message': 'رمز عبور با موفقیت تغییر کرد.',
+                **tokens_for_user(user),
+            }, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
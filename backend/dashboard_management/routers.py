@@ -0,0 +1,117 @@
+"""مسیریابی خواندن‌ها به پایگاه داده‌های replica
+
+خواندن‌های مدل‌های مالی، انبار و کارها در درخواست‌های فقط‌خواندنی به یکی از
+replica ها (settings.DATABASE_REPLICAS) فرستاده می‌شوند و همه نوشتن‌ها به
+default می‌روند. برای اینکه کاربر تغییرات خودش را ببیند، پس از هر درخواست
+نوشتنی موفق، خواندن‌های همان کاربر تا REPLICA_STICKY_SECONDS ثانیه از default
+انجام می‌شوند؛ این چسبندگی در کش REPLICA_PIN_CACHE نگه داشته می‌شود که باید بین
+همه پردازش‌ها مشترک باشد. خواندن‌های داخل تراکنش، درخواست‌های نوشتنی و کد خارج
+از درخواست (دستورهای مدیریتی و worker ها) همیشه از default می‌خوانند.
+
+خواندن‌هایی که زیر کلید نسخه جداول در کش می‌نشینند (خلاصه و گزارش‌ها) یا با
+ETag برگردانده می‌شوند با use_primary از default انجام می‌شوند؛ وگرنه داده
+replica عقب‌مانده تا نوشتن بعدی زیر نسخه تازه معتبر می‌ماند.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_APPS = frozenset(['financial', 'inventory', 'tasks'])
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_CACHE_KEY_PREFIX = 'db:pinned:'
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    """وضعیت مسیریابی یک درخواست یا بلاک use_primary"""
+    
+    def __init__(self, request=None, pinned=None):
+        self.request = request
+        self.pinned = pinned
+    
+    def is_pinned(self):
+        if self.pinned is None:
+            user = getattr(self.request, 'user', None)
+            if user is None or not user.is_authenticated:
+                # کاربر هنوز احراز هویت نشده؛ نتیجه ذخیره نمی‌شود تا بعد از احراز هویت دوباره بررسی شود
+                return False
+            self.pinned = bool(caches[settings.REPLICA_PIN_CACHE].get(f'{PIN_CACHE_KEY_PREFIX}{user.pk}'))
+        return self.pinned
+
+
+def pin_user(user_id):
+    """خواندن‌های کاربر تا REPLICA_STICKY_SECONDS ثانیه از default انجام می‌شوند"""
+    caches[settings.REPLICA_PIN_CACHE].set(f'{PIN_CACHE_KEY_PREFIX}{user_id}', True, settings.REPLICA_STICKY_SECONDS)
+
+
+@contextmanager
+def use_primary():
+    """همه خواندن‌های داخل بلاک از default انجام می‌شوند"""
+    token = _routing.set(RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def use_replicas():
+    """خواندن‌های داخل بلاک خارج از درخواست (مثلاً گزارش‌گیری دستورهای مدیریتی) به replica می‌روند"""
+    token = _routing.set(RoutingState(pinned=False))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class ReplicaRouter:
+    """ارسال خواندن‌های مجاز به replica و همه نوشتن‌ها به default"""
+    
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label not in REPLICA_APPS:
+            return None
+        state = _routing.get()
+        if state is None or state.is_pinned():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # خواندن‌های داخل تراکنش (از جمله select_for_update) باید داده همان تراکنش را ببینند
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+    
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica ها نسخه‌ای از همان داده default هستند
+        return True
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaStickinessMiddleware:
+    """تعیین وضعیت مسیریابی هر درخواست و ثبت چسبندگی پس از نوشتن‌های موفق کاربر"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        writing = request.method not in SAFE_METHODS
+        token = _routing.set(RoutingState(request, pinned=True if writing else None))
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        
+        # کاربر درخواست‌های DRF پس از احراز هویت در view روی request تنظیم می‌شود
+        user = getattr(request, 'user', None)
+        if writing and settings.DATABASE_REPLICAS and response.status_code < 400 and user is not None and user.is_authenticated:
+            pin_user(user.pk)
+        return response
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -56,6 +56,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'dashboard_management.routers.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,12 +84,113 @@ WSGI_APPLICATION = 'dashboard_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE: sqlite3 برای استقرار تک‌سروری، postgresql برای چند worker و چند سرور
+DB_ENGINE = config('DB_ENGINE', default='sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='dashboard_management'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # اتصال‌های ماندگار بین درخواست‌ها؛ اتصال خراب پیش از استفاده دوباره بررسی می‌شود
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+    # DB_POOL: none، psycopg (استخر اتصال داخل هر پردازش) یا pgbouncer (pooler محلی در حالت transaction)
+    DB_POOL = config('DB_POOL', default='none')
+    if DB_POOL == 'psycopg':
+        # استخر psycopg جای اتصال ماندگار را می‌گیرد و با CONN_MAX_AGE قابل استفاده نیست
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+    elif DB_POOL == 'pgbouncer':
+        # در pooler حالت transaction، cursor سمت سرور (iterator) بین تراکنش‌ها معتبر نمی‌ماند
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            # اتصال ماندگار از اجرای دوباره pragma ها در هر درخواست جلوگیری می‌کند
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'OPTIONS': {
+                # قفل نوشتن از ابتدای هر تراکنش گرفته می‌شود تا ارتقای قفل خواندن به نوشتن
+                # بین نویسنده‌های همزمان بدون انتظار به خطای database is locked نرسد
+                'transaction_mode': 'IMMEDIATE',
+                # busy_timeout: مدت انتظار نویسنده برای آزاد شدن قفل (ثانیه)
+                'timeout': config('DB_SQLITE_TIMEOUT', default=20, cast=int),
+                # WAL خواننده‌ها را از نویسنده جدا می‌کند؛ synchronous=NORMAL در WAL فقط
+                # با قطع برق ممکن است آخرین تراکنش‌ها را از دست بدهد، نه یکپارچگی را
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-65536;'
+                    'PRAGMA mmap_size=268435456;'
+                ),
+            },
+        }
+    }
+
+
+# replica های فقط‌خواندنی: میزبان‌های PostgreSQL یا مسیر فایل‌های SQLite، جداشده با کاما
+# نسخه محلی SQLite با دستور sync_sqlite_replica به‌روز می‌شود
+DATABASE_REPLICAS = []
+for index, location in enumerate(config('DB_REPLICAS', default='', cast=Csv())):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': location,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # در تست‌ها replica همان پایگاه داده تست default است
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['dashboard_management.routers.ReplicaRouter']
+# مدت خواندن از default پس از نوشتن هر کاربر (ثانیه)؛ باید از تأخیر replica بیشتر باشد
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+# نام کش چسبندگی کاربران به default؛ با DB_REPLICAS باید بین همه پردازش‌ها مشترک باشد
+REPLICA_PIN_CACHE = config('REPLICA_PIN_CACHE', default='default')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# کش باید بین همه پردازش‌ها مشترک باشد: نسخه جداول، چسبندگی replica و خلاصه‌ها در آن
+# نگه داشته می‌شوند. پیش‌فرض جدول پایگاه داده است (python manage.py createcachetable)
+# که هر خواندن آن یک کوئری و هر نوشتن آن قفل نوشتن SQLite را می‌گیرد؛
+# برای Redis مثلاً CACHE_BACKEND=django.core.cache.backends.redis.RedisCache و
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='dashboard_management_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
     }
 }
+# کش محلی پردازش (LocMemCache) فقط با یک پردازش درست کار می‌کند و در غیر این صورت بررسی سیستم خطا می‌دهد
+CACHE_SINGLE_PROCESS = config('CACHE_SINGLE_PROCESS', default=False, cast=bool)
+
+# حداکثر عمر خلاصه مالی در کش (ثانیه)؛ باطل‌سازی اصلی با سیگنال‌ها انجام می‌شود
+FINANCIAL_SUMMARY_CACHE_TIMEOUT = config('FINANCIAL_SUMMARY_CACHE_TIMEOUT', default=300, cast=int)
+# حداکثر عمر گزارش‌های مالی (سن بدهی و ...) در کش (ثانیه)
+FINANCIAL_REPORT_CACHE_TIMEOUT = config('FINANCIAL_REPORT_CACHE_TIMEOUT', default=300, cast=int)
+# حداکثر اعتبار ETag/Last-Modified لیست‌ها بدون تغییر نسخه جداول (ثانیه)
+CONDITIONAL_GET_MAX_AGE = config('CONDITIONAL_GET_MAX_AGE', default=300, cast=int)
 
 
 # Password validation
@@ -127,6 +229,20 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Media files (uploaded attachments)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# آپلود تکه‌ای پیوست‌ها: اندازه پیشنهادی هر تکه و سهمیه هر کاربر (بایت)
+TASK_UPLOAD_CHUNK_SIZE = config('TASK_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)
+TASK_ATTACHMENT_QUOTA = config('TASK_ATTACHMENT_QUOTA', default=1024 * 1024 * 1024, cast=int)
+# پیشوند location داخلی nginx برای X-Accel-Redirect؛ خالی یعنی ارسال فایل توسط خود Django
+TASK_ATTACHMENT_ACCEL_PREFIX = config('TASK_ATTACHMENT_ACCEL_PREFIX', default='')
+
+# یادآوری سررسیدها: چند ساعت قبل از سررسید اعلان ثبت شود و فاصله اجرای worker (ثانیه)
+REMINDER_LEAD_TIME_HOURS = config('REMINDER_LEAD_TIME_HOURS', default=24, cast=float)
+REMINDER_INTERVAL_SECONDS = config('REMINDER_INTERVAL_SECONDS', default=60, cast=float)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -135,7 +251,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -155,8 +271,14 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # هش رمز عبور در توکن قرار می‌گیرد تا تغییر رمز توکن‌های قبلی را باطل کند
+    'CHECK_REVOKE_TOKEN': True,
 }
 
+# کش محلی کاربران احراز هویت‌شده: حداکثر تعداد و عمر هر ردیف (ثانیه)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=float)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
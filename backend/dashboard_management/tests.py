@@ -0,0 +1,125 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from rest_framework import generics
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from authentication.models import User
+from financial.checks import check_replica_pin_cache
+from financial.conditional import ConditionalGetMixin
+from financial.models import Account
+from financial.reports import get_aging_report
+from financial.serializers import AccountSerializer
+from financial.summary import get_financial_summary
+from .routers import ReplicaRouter, ReplicaStickinessMiddleware, pin_user, use_primary, use_replicas
+
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'router-tests-default'},
+    'pins': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'router-tests-pins'},
+}
+
+
+def read_alias():
+    return ReplicaRouter().db_for_read(Account)
+
+
+class RecordingView(ConditionalGetMixin, generics.ListAPIView):
+    """ویو آزمایشی که پایگاه داده خواندن بدنه پاسخ را برمی‌گرداند"""
+    serializer_class = AccountSerializer
+    permission_classes = []
+    
+    def list(self, request, *args, **kwargs):
+        return Response({'db': read_alias()})
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], CACHES=LOCAL_CACHES, REPLICA_PIN_CACHE='pins', REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    """مسیریابی خواندن‌ها به replica و چسبندگی کاربر پس از نوشتن"""
+    
+    def setUp(self):
+        for alias in LOCAL_CACHES:
+            caches[alias].clear()
+        self.factory = APIRequestFactory()
+        self.user = SimpleNamespace(pk=1, is_authenticated=True)
+        self.other = SimpleNamespace(pk=2, is_authenticated=True)
+    
+    def request(self, method, user, status=200):
+        """اجرای یک درخواست از میان middleware؛ پایگاه داده خواندن داخل درخواست برگردانده می‌شود"""
+        request = getattr(self.factory, method)('/')
+        request.user = user
+        seen = []
+        
+        def get_response(request):
+            seen.append(read_alias())
+            return HttpResponse(status=status)
+        
+        ReplicaStickinessMiddleware(get_response)(request)
+        return seen[0]
+    
+    def test_reads_outside_requests_use_default(self):
+        self.assertEqual(read_alias(), 'default')
+        with use_replicas():
+            self.assertEqual(read_alias(), 'replica1')
+            with use_primary():
+                self.assertEqual(read_alias(), 'default')
+        self.assertIsNone(ReplicaRouter().db_for_read(User))
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertIsNone(read_alias())
+    
+    def test_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.request('get', self.user), 'replica1')
+        self.assertEqual(self.request('get', SimpleNamespace(pk=None, is_authenticated=False)), 'replica1')
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.request('get', self.user), 'default')
+    
+    def test_successful_write_pins_the_user_in_the_shared_cache(self):
+        self.assertEqual(self.request('post', self.user, status=201), 'default')
+        self.assertTrue(caches['pins'].get('db:pinned:1'))
+        self.assertIsNone(caches['default'].get('db:pinned:1'))
+        self.assertEqual(self.request('get', self.user), 'default')
+        self.assertEqual(self.request('get', self.other), 'replica1')
+    
+    def test_failed_write_does_not_pin(self):
+        self.assertEqual(self.request('patch', self.user, status=400), 'default')
+        self.assertEqual(self.request('get', self.user), 'replica1')
+    
+    def test_pin_expires(self):
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=1000.0):
+            pin_user(self.user.pk)
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=1009.0):
+            self.assertEqual(self.request('get', self.user), 'default')
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=1011.0):
+            self.assertEqual(self.request('get', self.user), 'replica1')
+    
+    def test_conditional_responses_read_from_default(self):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        response = ReplicaStickinessMiddleware(RecordingView.as_view())(request)
+        self.assertEqual(response.data, {'db': 'default'})
+        self.assertIn('ETag', response)
+    
+    def test_version_keyed_caches_are_filled_from_default(self):
+        seen = []
+        with use_replicas():
+            with mock.patch('financial.summary.read_totals', side_effect=lambda: seen.append(read_alias()) or {}):
+                get_financial_summary()
+            with mock.patch('financial.reports.compute_source_aging', side_effect=lambda *args: seen.append(read_alias())):
+                get_aging_report(date(2026, 1, 1), sources=['payable_checks'])
+        self.assertEqual(seen, ['default', 'default'])
+    
+    def test_pin_cache_must_be_shared(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache(None)], ['financial.E002'])
+        with override_settings(REPLICA_PIN_CACHE='missing'):
+            self.assertEqual([error.id for error in check_replica_pin_cache(None)], ['financial.E002'])
+        shared = {**LOCAL_CACHES, 'pins': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'pins'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
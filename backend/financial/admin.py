@@ -49,3 +49,9 @@ class OngoingDebtAdmin(admin.ModelAdmin):
     list_display = ('creditor_name', 'amount', 'due_date', 'status', 'created_at')
     list_filter = ('status', 'due_date', 'created_at')
     search_fields = ('creditor_name',)
+
+
+@admin.register(FinancialTotals)
+class FinancialTotalsAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'total_accounts', 'total_balance', 'overdue_amount', 'ongoing_debts_amount', 'updated_at')
+    readonly_fields = [field.name for field in FinancialTotals._meta.fields]
@@ -0,0 +1,86 @@
+"""نسخه جداول و کش‌های وابسته به آن‌ها
+
+نسخه‌ها، زمان آخرین تغییر و داده‌های کش‌شده در کش default نگه داشته می‌شوند
+که باید بین همه پردازش‌ها مشترک باشد. با DatabaseCache پیش‌فرض، کش هم جدولی در
+همان پایگاه داده است: هر برخورد به کش دو SELECT روی جدول کش دارد (نسخه‌ها و
+مقدار) و هر bump یا پر کردن کش یک نوشتن است که در SQLite قفل نوشتن را می‌گیرد.
+سود کش حذف کوئری‌های تجمیعی روی جدول‌های داده است، نه حذف همه کوئری‌ها؛ برای
+حذف رفت و برگشت به پایگاه داده CACHE_BACKEND را روی Redis یا Memcached بگذارید.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+
+from dashboard_management.routers import use_primary
+
+
+VERSION_KEY_PREFIX = 'financial:version:'
+MODIFIED_KEY_PREFIX = 'financial:modified:'
+
+
+def _version_key(model):
+    return f'{VERSION_KEY_PREFIX}{model._meta.label_lower}'
+
+
+def _modified_key(model):
+    return f'{MODIFIED_KEY_PREFIX}{model._meta.label_lower}'
+
+
+def _get_or_add(keys, default):
+    values = cache.get_many(keys)
+    missing = {key: default() for key in keys if key not in values}
+    if missing:
+        for key, value in missing.items():
+            # اگر پردازش دیگری همزمان مقدار را ساخته باشد همان را نگه می‌داریم
+            if not cache.add(key, value, timeout=None):
+                value = cache.get(key, value)
+            values[key] = value
+    return [values[key] for key in keys]
+
+
+def get_table_versions(models):
+    """نسخه فعلی جدول هر مدل را برمی‌گرداند
+
+    اگر نسخه‌ای در کش نباشد (اولین درخواست یا حذف از کش) یک نسخه تازه و یکتا
+    ساخته می‌شود تا هیچ کلید قدیمی دوباره معتبر نشود.
+    """
+    return _get_or_add([_version_key(model) for model in models], _new_version)
+
+
+def get_last_modified(models):
+    """زمان آخرین تغییر (ثانیه از epoch) جدیدترین جدول در میان models
+
+    اگر زمان جدولی در کش نباشد زمان فعلی ثبت می‌شود؛ یعنی پس از حذف از کش
+    جدول تغییرکرده فرض می‌شود و هیچ پاسخ قدیمی‌ای معتبر نمی‌ماند.
+    """
+    return max(_get_or_add([_modified_key(model) for model in models], time.time))
+
+
+def get_or_compute(key, compute, timeout):
+    """مقدار کش‌شده key یا محاسبه و ذخیره آن
+
+    کلیدها از نسخه جداول ساخته می‌شوند؛ محاسبه از default خوانده می‌شود تا
+    داده replica عقب‌مانده زیر نسخه تازه در کش ننشیند.
+    """
+    data = cache.get(key)
+    if data is None:
+        with use_primary():
+            data = compute()
+        cache.set(key, data, timeout)
+    return data
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def bump_table_version(model):
+    """نسخه تازه‌ای برای جدول ثبت می‌کند و همه کلیدهای وابسته را باطل می‌کند
+
+    به جای incr یک مقدار یکتا نوشته می‌شود؛ incr در بیشتر backend ها (از جمله
+    DatabaseCache) خواندن و نوشتن جداگانه است و دو bump همزمان ممکن بود هر دو
+    همان نسخه بعدی را بنویسند و یکی از تغییرات باطل نشود.
+    """
+    cache.set(_version_key(model), _new_version(), timeout=None)
+    cache.set(_modified_key(model), time.time(), timeout=None)
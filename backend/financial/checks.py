@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.core.cache import caches
+
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """نسخه جداول در کش default نگه داشته می‌شود و باید بین پردازش‌ها مشترک باشد"""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHE_BACKENDS or settings.CACHE_SINGLE_PROCESS:
+        return []
+    return [Error(
+        f'The default cache ({backend}) is local to each process.',
+        hint=(
+            'Table versions that invalidate cached summaries, reports and ETags would not be shared '
+            'between workers. Use DatabaseCache or Redis, or set CACHE_SINGLE_PROCESS=True when '
+            'running a single process.'
+        ),
+        obj=caches['default'],
+        id='financial.E001',
+    )]
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """چسبندگی خواندن کاربر به default پس از نوشتن در کش REPLICA_PIN_CACHE نگه داشته می‌شود"""
+    if not settings.DATABASE_REPLICAS:
+        return []
+    alias = settings.REPLICA_PIN_CACHE
+    if alias not in settings.CACHES:
+        return [Error(
+            f'REPLICA_PIN_CACHE refers to an undefined cache alias {alias!r}.',
+            hint='Set REPLICA_PIN_CACHE to a cache defined in CACHES.',
+            id='financial.E002',
+        )]
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f'The replica pin cache {alias!r} ({backend}) is local to each process.',
+        hint=(
+            'With DB_REPLICAS set, a write pins its user to the primary in one worker only, so the '
+            'next request served by another worker can read from a lagging replica. Point '
+            'REPLICA_PIN_CACHE at a DatabaseCache or Redis cache.'
+        ),
+        obj=caches[alias],
+        id='financial.E002',
+    )]
@@ -0,0 +1,86 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from dashboard_management.routers import use_primary
+from .cache import get_last_modified, get_table_versions
+
+
+class ConditionalGetMixin:
+    """پشتیبانی از GET شرطی (ETag و Last-Modified) برای ویوهای لیست و جزئیات
+    
+    ETag از نسخه جداول وابسته، مسیر و پارامترهای درخواست، کاربر و نوع خروجی
+    ساخته می‌شود و پیش از هر کوئری یا سریالایز بررسی می‌شود؛ اگر کلاینت همان
+    ETag را بفرستد پاسخ 304 بدون بدنه برمی‌گردد. Last-Modified زمان آخرین تغییر
+    همین جداول است.
+    
+    هر مسیر نوشتنی که سیگنال ندارد (bulk_create، update و ...) باید خودش
+    bump_table_version را صدا بزند؛ وگرنه کلاینت‌ها پاسخ کهنه می‌گیرند. اعتبار
+    ETag بدون تغییر نسخه حداکثر CONDITIONAL_GET_MAX_AGE ثانیه است تا اثر چنین
+    نوشتن‌هایی محدود بماند. بدنه پاسخ از default خوانده می‌شود؛ بدنه‌ای از
+    replica عقب‌مانده با ETag نسخه تازه در کش کلاینت می‌ماند.
+    
+    پاسخ 304 هم از همان بررسی دسترسی پاسخ 200 می‌گذرد: check_permissions در
+    initial() پیش از get اجرا شده است و در ویوهای جزئیات get_object (یافتن
+    ردیف در queryset محدود به کاربر و check_object_permissions) پیش از مقایسه
+    ETag اجرا می‌شود؛ ردیف بررسی‌شده برای ساخت پاسخ 200 دوباره خوانده نمی‌شود.
+    """
+    # مدل‌هایی که خروجی ویو به آن‌ها هم وابسته است؛ مدل سریالایزر و روابط select_related آن خودکار اضافه می‌شوند
+    conditional_models = ()
+    
+    def get_conditional_models(self):
+        serializer_class = self.get_serializer_class()
+        model = serializer_class.Meta.model
+        models = [model]
+        for path in getattr(serializer_class, 'select_related_fields', ()):
+            related = model
+            for name in path.split('__'):
+                related = related._meta.get_field(name).related_model
+            models.append(related)
+        models.extend(self.conditional_models)
+        return list(dict.fromkeys(models))
+    
+    def get_conditional_state(self, request):
+        """(ETag، Last-Modified) پاسخ فعلی بدون اجرای کوئری روی داده‌ها"""
+        models = self.get_conditional_models()
+        now = time.time()
+        max_age = settings.CONDITIONAL_GET_MAX_AGE
+        window = int(now // max_age * max_age)
+        parts = [
+            f'{type(self).__module__}.{type(self).__qualname__}',
+            request.get_full_path(),
+            str(request.user.pk),
+            request.accepted_media_type or '',
+            str(window),
+            *(str(version) for version in get_table_versions(models)),
+        ]
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+        
+        modified = int(max(get_last_modified(models), window))
+        # Last-Modified دقت ثانیه دارد؛ اگر تغییر در همین ثانیه بوده، تغییر بعدی در همین ثانیه تشخیص داده نمی‌شد
+        return etag, modified if modified < int(now) else None
+    
+    def get_object(self):
+        if not hasattr(self, '_conditional_object'):
+            self._conditional_object = super().get_object()
+        return self._conditional_object
+    
+    def get(self, request, *args, **kwargs):
+        with use_primary():
+            if (self.lookup_url_kwarg or self.lookup_field) in kwargs:
+                self.get_object()
+            etag, last_modified = self.get_conditional_state(request)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = super().get(request, *args, **kwargs)
+        
+        if response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+        # مرورگر باید هر بار اعتبار پاسخ را بررسی کند و آن را از روی Last-Modified تازه فرض نکند
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
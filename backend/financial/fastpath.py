@@ -0,0 +1,174 @@
+"""سریالایز سریع لیست‌های فقط‌خواندنی از روی values()
+
+برای GET لیست، به جای ساختن نمونه مدل و اجرای to_representation هر فیلد
+سریالایزر، ستون‌های لازم مستقیماً با values() خوانده می‌شوند و هر ستون با
+مبدلی که یک بار برای هر کلاس سریالایزر ساخته شده به همان مقداری تبدیل می‌شود
+که DRF برمی‌گرداند (Decimal به رشته، تاریخ به ISO و ...). خروجی باید بایت به
+بایت با مسیر عادی یکسان بماند؛ سریالایزری که فیلدی خارج از انواع پشتیبانی‌شده
+یا تنظیمات غیرپیش‌فرض دارد از مسیر عادی DRF سریالایز می‌شود.
+"""
+import datetime
+import decimal
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .renderers import FastJSONRenderer
+
+
+# فیلدهای سریالایزر پشتیبانی‌شده و فیلدهای مدلی که مقدار خام values() آن‌ها همان ورودی to_representation است
+MODEL_FIELD_TYPES = {
+    serializers.BooleanField: (models.BooleanField,),
+    serializers.CharField: (models.CharField, models.TextField),
+    serializers.ChoiceField: (models.Field,),
+    serializers.DateField: (models.DateField,),
+    serializers.DateTimeField: (models.DateTimeField,),
+    serializers.DecimalField: (models.DecimalField,),
+    serializers.IntegerField: (models.IntegerField,),
+    serializers.PrimaryKeyRelatedField: (models.ForeignKey,),
+}
+
+_plans = {}
+
+
+class ValuesPlan:
+    """ستون‌های values() و سازنده مبدل هر فیلد خروجی یک سریالایزر"""
+
+    def __init__(self, names, paths, converter_factories):
+        self.names = names
+        self.paths = paths
+        self.converter_factories = converter_factories
+
+    def rows(self, values):
+        """دیکشنری خروجی هر ردیف values()؛ مبدل‌ها یک بار برای هر فراخوانی ساخته می‌شوند"""
+        columns = [
+            (name, path, factory() if factory is not None else None)
+            for name, path, factory in zip(self.names, self.paths, self.converter_factories)
+        ]
+        result = []
+        for row in values:
+            item = {}
+            for name, path, convert in columns:
+                value = row[path]
+                item[name] = value if convert is None or value is None else convert(value)
+            result.append(item)
+        return result
+
+
+def decimal_converter(field):
+    # همان quantize فیلد DRF با exponent و context از پیش ساخته‌شده
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    context.prec = field.max_digits
+    convert = lambda value: '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+    return lambda: convert
+
+
+def date_converter(field):
+    convert = datetime.date.isoformat
+    return lambda: convert
+
+
+def datetime_converter(field):
+    def bind():
+        # خواندن منطقه زمانی فعال کند است؛ برای هر پاسخ یک بار خوانده می‌شود
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if tz is None:
+            return field.to_representation
+
+        def convert(value):
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    return bind
+
+
+def field_converter(field):
+    """سازنده مبدل فیلد یا None برای مقدار بدون تغییر؛ تنظیمات غیرپیش‌فرض ValueError می‌دهند"""
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            raise ValueError(field.field_name)
+    elif isinstance(field, serializers.DecimalField):
+        if (field.normalize_output or field.localize or field.decimal_places is None or field.max_digits is None
+                or not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+            raise ValueError(field.field_name)
+        return decimal_converter(field)
+    elif isinstance(field, serializers.DateTimeField):
+        if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+            raise ValueError(field.field_name)
+        return datetime_converter(field)
+    elif isinstance(field, serializers.DateField):
+        if getattr(field, 'format', api_settings.DATE_FORMAT) != ISO_8601:
+            raise ValueError(field.field_name)
+        return date_converter(field)
+    return None
+
+
+def field_path(model, field):
+    """مسیر values() فیلد؛ روابط nullable پشتیبانی نمی‌شوند چون DRF فیلد را از خروجی حذف می‌کند"""
+    model_types = MODEL_FIELD_TYPES.get(type(field))
+    if model_types is None or field.source == '*':
+        raise ValueError(field.field_name)
+    related = model
+    for attr in field.source_attrs[:-1]:
+        model_field = related._meta.get_field(attr)
+        if not model_field.many_to_one or model_field.null:
+            raise ValueError(field.field_name)
+        related = model_field.related_model
+    model_field = related._meta.get_field(field.source_attrs[-1])
+    # DateTimeField جنگو زیرکلاس DateField است ولی DateField در DRF مقدار datetime نمی‌پذیرد
+    if not isinstance(model_field, model_types) or (
+            type(field) is serializers.DateField and isinstance(model_field, models.DateTimeField)):
+        raise ValueError(field.field_name)
+    return '__'.join(field.source_attrs)
+
+
+def get_values_plan(serializer_class):
+    """ValuesPlan سریالایزر یا None اگر خروجی آن با values() قابل بازسازی نباشد"""
+    if serializer_class not in _plans:
+        model = serializer_class.Meta.model
+        names, paths, converter_factories = [], [], []
+        try:
+            for field in serializer_class().fields.values():
+                if field.write_only:
+                    continue
+                names.append(field.field_name)
+                paths.append(field_path(model, field))
+                converter_factories.append(field_converter(field))
+        except (ValueError, LookupError):
+            plan = None
+        else:
+            plan = ValuesPlan(tuple(names), tuple(paths), tuple(converter_factories))
+        _plans[serializer_class] = plan
+    return _plans[serializer_class]
+
+
+class ValuesListMixin:
+    """GET لیست از مسیر values() و FastJSONRenderer؛ نوشتن و جزئیات از مسیر عادی سریالایزر
+
+    get_queryset ویو نباید annotate یا فیلد محاسبه‌شده‌ای اضافه کند که
+    سریالایزر از نمونه مدل بخواند؛ در آن صورت خروجی دو مسیر یکسان نمی‌ماند.
+    """
+
+    def get_values_plan(self):
+        return get_values_plan(self.get_serializer_class())
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.request.method != 'GET' or self.get_values_plan() is None:
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_values_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*plan.paths)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.rows(page))
+        return Response(plan.rows(queryset))
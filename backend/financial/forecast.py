@@ -0,0 +1,113 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Greatest
+
+from .cache import get_or_compute, get_table_versions
+from .models import Account, PayableCheck, ReceivableCheck, OngoingDebt
+from .totals import read_totals
+
+
+FORECAST_GRANULARITIES = {
+    'day': 1,
+    'week': 7,
+}
+MAX_FORECAST_HORIZON = 730
+
+# منبع پیش‌بینی: (مدل، فیلتر اقلام باز، علامت اثر روی نقدینگی)
+FORECAST_SOURCES = {
+    'receivable_checks': (ReceivableCheck, Q(status='received'), 1),
+    'payable_checks': (PayableCheck, Q(status='issued'), -1),
+    'ongoing_debts': (OngoingDebt, Q(status='pending'), -1),
+}
+FORECAST_MODELS = (Account,) + tuple(model for model, _, _ in FORECAST_SOURCES.values())
+
+FORECAST_CACHE_KEY_PREFIX = 'financial:cash-flow:'
+
+
+class ForecastError(ValueError):
+    """پارامترهای نامعتبر پیش‌بینی جریان نقدی"""
+
+
+def _to_cents(amount):
+    return int((Decimal(amount or 0) * 100).to_integral_value())
+
+
+def _money(cents):
+    return str(Decimal(int(cents)).scaleb(-2))
+
+
+def source_series(model, open_filter, start, end, periods, step):
+    """مبالغ یک منبع به تفکیک دوره با یک کوئری GROUP BY روی تاریخ سررسید
+
+    اقلام سررسید گذشته که هنوز باز هستند در روز شروع حساب می‌شوند.
+    """
+    rows = (
+        model.objects.filter(open_filter, due_date__lte=end)
+        .annotate(forecast_date=Greatest('due_date', Value(start)))
+        .values('forecast_date')
+        .annotate(total=Sum('amount'))
+        .values_list('forecast_date', 'total')
+        .order_by()
+    )
+    series = np.zeros(periods, dtype=np.int64)
+    rows = list(rows)
+    if rows:
+        dates, totals = zip(*rows)
+        offsets = (np.array(dates, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64)
+        np.add.at(series, offsets // step, np.fromiter((_to_cents(total) for total in totals), dtype=np.int64, count=len(totals)))
+    return series
+
+
+def compute_cash_flow_forecast(start, horizon, granularity):
+    step = FORECAST_GRANULARITIES[granularity]
+    end = start + timedelta(days=horizon)
+    periods = horizon // step + 1
+
+    series = {
+        source: sign * source_series(model, open_filter, start, end, periods, step)
+        for source, (model, open_filter, sign) in FORECAST_SOURCES.items()
+    }
+    net = np.sum(list(series.values()), axis=0)
+    opening_balance = _to_cents(read_totals()['total_balance'])
+    balance = opening_balance + np.cumsum(net)
+    lowest = int(np.argmin(balance))
+
+    period_starts = [start + timedelta(days=index * step) for index in range(periods)]
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'granularity': granularity,
+        'horizon_days': horizon,
+        'opening_balance': _money(opening_balance),
+        'closing_balance': _money(balance[-1]),
+        'lowest_balance': {'period_start': period_starts[lowest].isoformat(), 'balance': _money(balance[lowest])},
+        'periods': [
+            {
+                'period_start': period_starts[index].isoformat(),
+                **{source: _money(values[index]) for source, values in series.items()},
+                'net': _money(net[index]),
+                'balance': _money(balance[index]),
+            }
+            for index in range(periods)
+        ],
+    }
+
+
+def get_cash_flow_forecast(start, horizon, granularity):
+    """پیش‌بینی جریان نقدی از کش؛ کلید بر اساس افق، دوره‌بندی، روز شروع و نسخه جداول"""
+    if granularity not in FORECAST_GRANULARITIES:
+        raise ForecastError(f'granularity باید یکی از {", ".join(FORECAST_GRANULARITIES)} باشد.')
+    if not 0 < horizon <= MAX_FORECAST_HORIZON:
+        raise ForecastError(f'افق پیش‌بینی باید بین 1 و {MAX_FORECAST_HORIZON} روز باشد.')
+
+    versions = get_table_versions(FORECAST_MODELS)
+    key = FORECAST_CACHE_KEY_PREFIX + ':'.join(
+        [start.isoformat(), str(horizon), granularity] + [str(version) for version in versions]
+    )
+    return get_or_compute(
+        key, lambda: compute_cash_flow_forecast(start, horizon, granularity), settings.FINANCIAL_REPORT_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,148 @@
+import copy
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, transaction
+
+from financial.management.commands.benchmark_endpoints import percentile
+from financial.models import PayableCheck
+from financial.totals import compare_totals, rebuild_totals
+
+
+PROFILES = ('default', 'configured')
+
+
+def write_checks(worker, writes, results):
+    """یک worker نویسنده: هر نوشتن مانند یک درخواست API با چرخه اتصال همان درخواست"""
+    latencies = []
+    errors = {}
+    for index in range(writes):
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                number = f'BENCH-{worker}-{index}'
+                # خواندن پیش از نوشتن، مانند اعتبارسنجی شماره چک در درخواست واقعی
+                if not PayableCheck.objects.filter(check_number=number).exists():
+                    PayableCheck.objects.create(
+                        check_number=number,
+                        amount=Decimal('1000.00'),
+                        payee='بنچمارک',
+                        due_date=date.today(),
+                        bank_name='بانک ملی',
+                    )
+        except OperationalError as e:
+            errors[str(e)] = errors.get(str(e), 0) + 1
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+        close_old_connections()
+    connection.close()
+    results.put((latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent-write throughput: several worker processes create payable checks like parallel '
+        'gunicorn workers, once with Django default connection settings and once with the configured database '
+        'profile (DB_ENGINE, pragmas, persistent connections, pooling). Runs against a throw-away test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent writer processes')
+        parser.add_argument('--writes', type=int, default=200, help='Checks created by each worker')
+        parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles to run (default, configured)')
+
+    def handle(self, *args, **options):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('This benchmark needs the fork start method (Linux/macOS).')
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        unknown = set(profiles) - set(PROFILES)
+        if unknown:
+            raise CommandError(f'Unknown profiles: {", ".join(sorted(unknown))}')
+
+        original = copy.deepcopy(connection.settings_dict)
+        results = {}
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for profile in profiles:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f'Profile {profile} ({connection.vendor})'))
+                    results[profile] = self.run_profile(profile, original, directory, options)
+        finally:
+            connection.close()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
+
+        if 'default' in results and 'configured' in results and results['default']['throughput']:
+            speedup = results['configured']['throughput'] / results['default']['throughput']
+            self.stdout.write(self.style.SUCCESS(f'Configured profile: {speedup:.2f}x the write throughput of Django defaults.'))
+
+    def profile_settings(self, profile, original, directory):
+        settings_dict = copy.deepcopy(original)
+        if profile == 'default':
+            settings_dict.update({'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False})
+        if connection.vendor == 'sqlite':
+            # چند پردازش به یک پایگاه داده مشترک نیاز دارند؛ پایگاه داده تست در حافظه کافی نیست
+            settings_dict['TEST'] = {**settings_dict.get('TEST', {}), 'NAME': os.path.join(directory, f'benchmark-{profile}.sqlite3')}
+        return settings_dict
+
+    def close_connections(self):
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+
+    def run_profile(self, profile, original, directory, options):
+        self.close_connections()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(self.profile_settings(profile, original, directory))
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            rebuild_totals()
+            # پردازش‌های فرزند نباید اتصال پردازش والد را به ارث ببرند
+            self.close_connections()
+
+            context = multiprocessing.get_context('fork')
+            queue = context.Queue()
+            workers = [
+                context.Process(target=write_checks, args=(worker, options['writes'], queue))
+                for worker in range(options['workers'])
+            ]
+            started = time.perf_counter()
+            for process in workers:
+                process.start()
+            outcomes = [queue.get() for _ in workers]
+            elapsed = time.perf_counter() - started
+            for process in workers:
+                process.join()
+
+            latencies = sorted(latency for worker_latencies, _ in outcomes for latency in worker_latencies)
+            errors = {}
+            for _, worker_errors in outcomes:
+                for message, count in worker_errors.items():
+                    errors[message] = errors.get(message, 0) + count
+            mismatched = compare_totals()
+            result = {
+                'written': len(latencies),
+                'failed': sum(errors.values()),
+                'elapsed': elapsed,
+                'throughput': len(latencies) / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(latencies, 0.50),
+                'p95_ms': percentile(latencies, 0.95),
+            }
+        finally:
+            self.close_connections()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"written {result['written']:>6}  failed {result['failed']:>6}  "
+            f"{result['throughput']:>8.1f} writes/s  p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms"
+        )
+        for message, count in sorted(errors.items(), key=lambda item: -item[1]):
+            self.stdout.write(self.style.WARNING(f'  {count} x {message}'))
+        if mismatched:
+            self.stdout.write(self.style.ERROR(f'  financial totals out of sync: {mismatched}'))
+        return result
@@ -0,0 +1,281 @@
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+
+from authentication import urls as authentication_urls
+from financial import urls as financial_urls
+from financial.sample_data import generate
+
+
+BENCHMARK_USERNAME = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark-pass-123'
+
+URL_MODULES = [
+    ('/api/auth/', authentication_urls),
+    ('/api/financial/', financial_urls),
+]
+
+# مقدار ثابت پارامترهای مسیر غیر از pk
+ROUTE_KWARGS = {
+    'export_format': 'csv',
+}
+
+
+def percentile(sorted_values, fraction):
+    """صدک با درون‌یابی خطی روی مقادیر مرتب‌شده"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throw-away test database at several scales, log in through the API and measure '
+        'latency percentiles, throughput and query counts for every auth and financial route.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='100,1000', help='Comma-separated dataset scales (cumulative, see create_sample_data --scale)')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per route before measuring')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated dataset')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+        parser.add_argument('--compare', help='Previous JSON results to diff against')
+        parser.add_argument('--threshold', type=float, default=20.0, help='p50 slowdown in percent reported as a regression')
+
+    def handle(self, *args, **options):
+        try:
+            scales = sorted({int(scale) for scale in options['scales'].split(',') if scale.strip()})
+        except ValueError:
+            raise CommandError('--scales must be a comma-separated list of integers.')
+
+        setup_test_environment()
+        # create_test_db نام پایگاه داده تست را برمی‌گرداند؛ destroy_test_db نام اصلی را می‌خواهد
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run_benchmarks(scales, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            self.compare(options['compare'], results, options['threshold'])
+
+        failures = [
+            f'[{scale}] {name} ({status})'
+            for scale, failed in results['failures'].items()
+            for name, status in failed.items()
+        ]
+        if failures:
+            raise CommandError(f"{len(failures)} route(s) returned a non-2xx status: {', '.join(failures)}")
+
+    def run_benchmarks(self, scales, options):
+        User = get_user_model()
+        user = User.objects.create_user(
+            username=BENCHMARK_USERNAME,
+            password=BENCHMARK_PASSWORD,
+            role='management',
+            full_name='کاربر بنچمارک',
+        )
+        results = {
+            'meta': {
+                'commit': self.git_commit(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+            },
+            'scales': {},
+            'failures': {},
+        }
+
+        generated = 0
+        for index, scale in enumerate(scales):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Scale {scale}'))
+            generate(scale - generated, seed=options['seed'] + index, users=[user], log=lambda message: None)
+            generated = scale
+
+            client = Client()
+            token = self.login(client)
+            measured, failed = self.measure_routes(client, token, options)
+            results['scales'][str(scale)] = measured
+            if failed:
+                results['failures'][str(scale)] = failed
+
+        return results
+
+    def login(self, client):
+        response = client.post(
+            reverse('login'),
+            {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD},
+            content_type='application/json',
+        )
+        if response.status_code != 200:
+            raise CommandError(f'Login failed with status {response.status_code}: {response.content!r}')
+        return response.json()['access']
+
+    def routes(self):
+        """همه مسیرهای ماژول‌های URL به همراه متد و بدنه درخواست"""
+        for prefix, module in URL_MODULES:
+            for pattern in module.urlpatterns:
+                if not isinstance(pattern, URLPattern):
+                    continue
+                method, data = self.request_for(pattern.name)
+                if method == 'get' and not hasattr(pattern.callback.view_class, 'get'):
+                    # مسیرهای فقط‌نوشتنی مثل عملیات گروهی اندازه‌گیری نمی‌شوند
+                    continue
+                kwargs = {
+                    name: value for name, value in ROUTE_KWARGS.items()
+                    if name in pattern.pattern.converters
+                }
+                if 'pk' in pattern.pattern.converters:
+                    model = pattern.callback.view_class.queryset.model
+                    instance = model.objects.order_by('pk').first()
+                    if instance is None:
+                        self.stdout.write(f'  skipping {pattern.name}: no {model._meta.object_name} rows')
+                        continue
+                    kwargs['pk'] = instance.pk
+                yield pattern.name, method, reverse(pattern.name, kwargs=kwargs), data
+
+    def request_for(self, name):
+        if name == 'login':
+            return 'post', {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD}
+        if name == 'logout':
+            return 'post', {}
+        if name == 'change-password':
+            # رمز عبور با همان مقدار جایگزین می‌شود تا ورودهای بعدی معتبر بمانند؛ توکن با هر بار تغییر عوض می‌شود
+            return 'post', {
+                'old_password': BENCHMARK_PASSWORD,
+                'new_password': BENCHMARK_PASSWORD,
+                'confirm_password': BENCHMARK_PASSWORD,
+            }
+        if name == 'financial-search':
+            # بدنه درخواست‌های GET به عنوان query string ارسال می‌شود
+            return 'get', {'q': 'شرکت'}
+        return 'get', None
+
+    def measure_routes(self, client, token, options):
+        """نتایج مسیرهای موفق و وضعیت مسیرهایی که پاسخ غیر 2xx داده‌اند"""
+        results = {}
+        failed = {}
+        # تغییر رمز عبور توکن‌های قبلی را باطل می‌کند؛ توکن جدید پاسخ آن برای درخواست‌های بعدی استفاده می‌شود
+        auth = {'token': token}
+        for name, method, url, data in self.routes():
+            send = getattr(client, method)
+
+            def request():
+                headers = {'HTTP_AUTHORIZATION': f"Bearer {auth['token']}"}
+                if method == 'get':
+                    response = send(url, data, **headers)
+                else:
+                    response = send(url, data, content_type='application/json', **headers)
+                # بدنه پاسخ‌های جریانی (خروجی CSV) در زمان درخواست تولید و خوانده می‌شود
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                if name == 'change-password' and response.status_code == 200:
+                    auth['token'] = json.loads(body)['access']
+                return response, body
+
+            statuses = set()
+            for _ in range(options['warmup']):
+                statuses.add(request()[0].status_code)
+
+            latencies = []
+            queries = []
+            for _ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response, body = request()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                queries.append(len(context))
+                statuses.add(response.status_code)
+
+            # زمان پاسخ‌های خطا (401، 404، 500 و ...) معیار کارایی مسیر نیست؛ مسیر از نتایج کنار گذاشته می‌شود
+            errors = sorted(code for code in statuses if not 200 <= code < 300)
+            if errors:
+                failed[name] = errors
+                self.stdout.write(self.style.WARNING(
+                    f"{name:<28}{method.upper():<6}excluded: status {', '.join(map(str, errors))}"
+                ))
+                continue
+
+            latencies.sort()
+            total_seconds = sum(latencies) / 1000
+            results[name] = {
+                'method': method.upper(),
+                'url': url,
+                'status': response.status_code,
+                'p50_ms': round(percentile(latencies, 0.50), 3),
+                'p90_ms': round(percentile(latencies, 0.90), 3),
+                'p95_ms': round(percentile(latencies, 0.95), 3),
+                'p99_ms': round(percentile(latencies, 0.99), 3),
+                'max_ms': round(latencies[-1], 3),
+                'throughput_rps': round(len(latencies) / total_seconds, 1) if total_seconds else None,
+                'queries': max(queries),
+                'response_bytes': len(body),
+            }
+            self.stdout.write(
+                f"{name:<28}{method.upper():<6}{response.status_code:<5}"
+                f"p50 {results[name]['p50_ms']:>8.2f} ms  p95 {results[name]['p95_ms']:>8.2f} ms  "
+                f"queries {results[name]['queries']}"
+            )
+        return results, failed
+
+    def compare(self, path, current, threshold):
+        try:
+            with open(path, encoding='utf-8') as previous_file:
+                previous = json.load(previous_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Comparison with {previous['meta'].get('commit') or path} (p50, queries)"
+        ))
+        regressions = 0
+        for scale, routes in current['scales'].items():
+            previous_routes = previous['scales'].get(scale, {})
+            for name, result in routes.items():
+                before = previous_routes.get(name)
+                if not before:
+                    continue
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+                line = (
+                    f"[{scale}] {name:<28}{before['p50_ms']:>9.2f} -> {result['p50_ms']:>9.2f} ms "
+                    f"({change:+.1f}%)  queries {before['queries']} -> {result['queries']}"
+                )
+                if change > threshold or result['queries'] > before['queries']:
+                    regressions += 1
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f'{regressions} possible regression(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No regressions above threshold.'))
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
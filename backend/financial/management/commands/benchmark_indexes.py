@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from financial.models import PayableCheck, ReceivableCheck
+
+
+class Rollback(Exception):
+    """برای لغو تراکنش بنچمارک و پاک شدن داده‌های ساختگی"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed checks inside a transaction and compare query plans and latency of the hot '
+        'financial queries with and without the status/due-date indexes. All changes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=1_000_000, help='Number of checks to seed (split between payable and receivable)')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='bulk_create batch size')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated rows')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed_checks(options['checks'], options['batch_size'], options['seed'])
+                self.analyze()
+
+                self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+                with_indexes = self.run_queries(options['repeat'])
+
+                self.drop_indexes()
+                self.analyze()
+
+                self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+                without_indexes = self.run_queries(options['repeat'])
+
+                self.report(with_indexes, without_indexes)
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Seeded rows and dropped indexes rolled back.')
+
+    def seed_checks(self, total, batch_size, seed):
+        rng = random.Random(seed)
+        today = date.today()
+        banks = ['بانک ملی', 'بانک صادرات', 'بانک تجارت', 'بانک پاسارگاد', 'بانک ملت']
+        specs = [
+            (PayableCheck, 'payee', ['issued', 'paid', 'returned']),
+            (ReceivableCheck, 'payer', ['received', 'deposited', 'returned']),
+        ]
+        started = time.perf_counter()
+        for model, party_field, statuses in specs:
+            count = total // len(specs)
+            self.stdout.write(f'Seeding {count} {model._meta.object_name} rows...')
+            for offset in range(0, count, batch_size):
+                model.objects.bulk_create([
+                    model(**{
+                        'check_number': f'BM{offset + index}',
+                        'amount': Decimal(rng.randint(1_000, 50_000_000)),
+                        party_field: f'طرف حساب {rng.randint(1, 5_000)}',
+                        'due_date': today + timedelta(days=rng.randint(-365, 365)),
+                        'bank_name': rng.choice(banks),
+                        'status': rng.choices(statuses, weights=[6, 3, 1])[0],
+                    })
+                    for index in range(min(batch_size, count - offset))
+                ])
+        self.stdout.write(f'Seeded {total} checks in {time.perf_counter() - started:.1f}s')
+
+    def queries(self):
+        today = date.today()
+        window = (today, today + timedelta(days=30))
+        return [
+            ('payable: count issued (summary)',
+             lambda: PayableCheck.objects.filter(status='issued')),
+            ('payable: issued due in 30 days',
+             lambda: PayableCheck.objects.filter(status='issued', due_date__range=window).order_by('due_date')[:20]),
+            ('receivable: received due in 30 days',
+             lambda: ReceivableCheck.objects.filter(status='received', due_date__range=window).order_by('due_date')[:20]),
+            ('payable: newest page',
+             lambda: PayableCheck.objects.order_by('-created_at', '-id')[:20]),
+        ]
+
+    def run_queries(self, repeat):
+        results = {}
+        for label, build in self.queries():
+            queryset = build()
+            plan = queryset.explain()
+            evaluate = queryset.count if label.endswith('(summary)') else lambda: list(build())
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                evaluate()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = statistics.median(timings)
+            self.stdout.write(f'{label}: {results[label]:.2f} ms')
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+        return results
+
+    def drop_indexes(self):
+        # DROP INDEX مستقیم؛ schema editor در SQLite داخل تراکنش قابل استفاده نیست
+        with connection.cursor() as cursor:
+            for model in (PayableCheck, ReceivableCheck):
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+            elif connection.vendor == 'postgresql':
+                for model in (PayableCheck, ReceivableCheck):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def report(self, with_indexes, without_indexes):
+        self.stdout.write(self.style.MIGRATE_HEADING('Median latency (ms)'))
+        self.stdout.write(f'{"query":<40}{"indexed":>12}{"no index":>12}{"speed-up":>10}')
+        for label, indexed in with_indexes.items():
+            unindexed = without_indexes[label]
+            speedup = unindexed / indexed if indexed else float('inf')
+            self.stdout.write(f'{label:<40}{indexed:>12.2f}{unindexed:>12.2f}{speedup:>9.1f}x')
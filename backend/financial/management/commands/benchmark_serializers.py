@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from financial.fastpath import get_values_plan
+from financial.renderers import FastJSONRenderer, orjson
+from financial.serializers import (
+    AccountSerializer, DiscrepancySerializer, FollowUpSerializer, OngoingDebtSerializer,
+    OverdueAccountSerializer, PayableCheckSerializer, ReceivableCheckSerializer,
+)
+
+
+SERIALIZERS = [
+    AccountSerializer,
+    OverdueAccountSerializer,
+    DiscrepancySerializer,
+    FollowUpSerializer,
+    PayableCheckSerializer,
+    ReceivableCheckSerializer,
+    OngoingDebtSerializer,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare list serialisation of the financial serializers through DRF (model instances, '
+        'to_representation, JSONRenderer) against the values() fast path, and report milliseconds '
+        'per 1,000 rows including the query. Reads existing data only; seed it with create_sample_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows serialised per run')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per variant')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if rows < 1 or repeat < 1:
+            raise CommandError('--rows and --repeat must be positive.')
+
+        self.stdout.write(f'orjson: {orjson.__version__ if orjson else "not installed (FastJSONRenderer falls back to json)"}')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Median ms per 1,000 rows ({rows} rows x {repeat} runs)'))
+        self.stdout.write(f'{"serializer":<28}{"rows":>7}{"drf":>10}{"values":>10}{"fast":>10}{"speed-up":>10}')
+        for serializer_class in SERIALIZERS:
+            self.benchmark(serializer_class, rows, repeat)
+
+    def benchmark(self, serializer_class, rows, repeat):
+        plan = get_values_plan(serializer_class)
+        if plan is None:
+            raise CommandError(f'{serializer_class.__name__} is not eligible for the values() fast path.')
+        model = serializer_class.Meta.model
+        queryset = serializer_class.setup_eager_loading(model.objects.order_by('-created_at', '-id'))[:rows]
+        count = queryset.count()
+        if not count:
+            raise CommandError(f'No {model._meta.object_name} rows; run create_sample_data first.')
+
+        def drf():
+            return JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+
+        def values():
+            return JSONRenderer().render(plan.rows(queryset.values(*plan.paths)))
+
+        def fast():
+            return FastJSONRenderer().render(plan.rows(queryset.values(*plan.paths)))
+
+        expected = drf()
+        if values() != expected or fast() != expected:
+            raise CommandError(f'{serializer_class.__name__}: fast path output differs from DRF output.')
+
+        medians = [self.measure(variant, repeat) * 1000 / count for variant in (drf, values, fast)]
+        speedup = medians[0] / medians[2] if medians[2] else float('inf')
+        self.stdout.write(
+            f'{serializer_class.__name__:<28}{count:>7}'
+            + ''.join(f'{median:>10.2f}' for median in medians)
+            + self.style.SUCCESS(f'{speedup:>9.1f}x')
+        )
+
+    def measure(self, variant, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            variant()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from financial.models import Account, OverdueAccount, Discrepancy, FollowUp, PayableCheck, ReceivableCheck, OngoingDebt
 from decimal import Decimal
@@ -9,7 +9,43 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Create sample data for testing'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            help='Generate a large random dataset: N accounts plus proportional checks, debts, follow-ups, products, inventory transactions and tasks',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for --scale (same seed, same data)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size for --scale')
+        parser.add_argument('--workers', type=int, default=1, help='Parallel worker processes for --scale (use 1 with SQLite)')
+
     def handle(self, *args, **options):
+        admin_user, accounting_user = self.create_users()
+
+        if options['scale']:
+            self.create_scaled_data(options, [admin_user, accounting_user])
+            return
+
+        self.create_fixed_data(admin_user)
+
+    def create_scaled_data(self, options, users):
+        from financial.sample_data import generate
+
+        self.stdout.write(f"Generating scaled data (scale={options['scale']}, seed={options['seed']}, workers={options['workers']})...")
+        try:
+            generate(
+                options['scale'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                users=users,
+                log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS('Scaled sample data created successfully!'))
+
+    def create_users(self):
         # Create test users
         self.stdout.write('Creating test users...')
         
@@ -43,6 +79,9 @@ class Command(BaseCommand):
             accounting_user.save()
             self.stdout.write(f'Created accounting user: {accounting_user.username}')
 
+        return admin_user, accounting_user
+
+    def create_fixed_data(self, admin_user):
         # Create sample accounts
         self.stdout.write('Creating sample accounts...')
         
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from financial.models import Account
+from financial.reconciliation import (
+    DEFAULT_DATE_TOLERANCE, STATEMENT_PARSERS, StatementFormatError, detect_format, import_statement,
+)
+
+
+class Command(BaseCommand):
+    help = 'Match a CSV/OFX bank statement against checks and create discrepancies for unmatched lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('account_number', help='Account the statement belongs to')
+        parser.add_argument('path', help='Statement file (.csv or .ofx)')
+        parser.add_argument('--user', required=True, help='Username recorded as creator of the discrepancies')
+        parser.add_argument('--format', dest='statement_format', choices=sorted(STATEMENT_PARSERS), help='Defaults to the file extension')
+        parser.add_argument('--date-tolerance', type=int, default=DEFAULT_DATE_TOLERANCE, help='Allowed days between statement date and check due date')
+
+    def handle(self, *args, **options):
+        try:
+            account = Account.objects.get(account_number=options['account_number'])
+        except Account.DoesNotExist:
+            raise CommandError(f"Account {options['account_number']} does not exist.")
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+
+        statement_format = options['statement_format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as statement:
+                result = import_statement(statement, account, user, statement_format, options['date_tolerance'])
+        except (OSError, StatementFormatError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"line {error['line']}: {error['error']}"))
+        self.stdout.write(
+            f"{result['lines']} lines in {result['elapsed_seconds']}s: "
+            f"{result['matched_payable_checks']} payable and {result['matched_receivable_checks']} receivable checks matched, "
+            f"{result['discrepancies_created']} discrepancies created, {result['error_count']} invalid lines."
+        )
+        self.stdout.write(self.style.SUCCESS('Bank statement imported successfully!'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from financial.totals import GLOBAL_SCOPE, compare_totals, rebuild_totals
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the incrementally maintained financial totals and verify them against a full recompute'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scope', default=GLOBAL_SCOPE, help='Totals scope to rebuild')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only compare stored totals with a full recompute; exit with an error on mismatch',
+        )
+
+    def handle(self, *args, **options):
+        scope = options['scope']
+
+        self.stdout.write(f'Comparing stored totals for scope "{scope}" with a full recompute...')
+        mismatches = compare_totals(scope)
+        for field, (stored, expected) in mismatches.items():
+            self.stdout.write(f'  {field}: stored={stored} expected={expected}')
+
+        if options['check']:
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} totals field(s) drifted from the recomputed values.')
+            self.stdout.write(self.style.SUCCESS('Financial totals are consistent.'))
+            return
+
+        rebuild_totals(scope)
+        if compare_totals(scope):
+            raise CommandError('Totals still differ after rebuild; data changed during the rebuild, run it again.')
+        self.stdout.write(self.style.SUCCESS('Financial totals rebuilt successfully!'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialTotals',
+            fields=[
+                ('scope', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='دامنه')),
+                ('total_accounts', models.IntegerField(default=0, verbose_name='تعداد حساب\u200cها')),
+                ('total_balance', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='جمع مانده')),
+                ('overdue_accounts_count', models.IntegerField(default=0, verbose_name='تعداد حساب\u200cهای معوقه')),
+                ('overdue_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='جمع مبلغ معوقه')),
+                ('pending_discrepancies', models.IntegerField(default=0, verbose_name='مغایرت\u200cهای در انتظار')),
+                ('payable_checks_count', models.IntegerField(default=0, verbose_name='چک\u200cهای پرداختی صادر شده')),
+                ('receivable_checks_count', models.IntegerField(default=0, verbose_name='چک\u200cهای دریافتی')),
+                ('ongoing_debts_count', models.IntegerField(default=0, verbose_name='تعداد بدهی\u200cهای در انتظار')),
+                ('ongoing_debts_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='جمع بدهی\u200cهای در انتظار')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ به\u200cروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'جمع\u200cهای مالی',
+                'verbose_name_plural': 'جمع\u200cهای مالی',
+            },
+        ),
+    ]
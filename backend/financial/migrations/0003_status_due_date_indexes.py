@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0002_financialtotals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['-created_at', '-id'], name='account_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discrepancy',
+            index=models.Index(fields=['account', 'status'], name='discrepancy_account_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discrepancy',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at', '-id'], name='discrepancy_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discrepancy',
+            index=models.Index(fields=['-created_at', '-id'], name='discrepancy_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followup',
+            index=models.Index(fields=['status', 'follow_up_date'], name='followup_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followup',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress'])), fields=['follow_up_date'], name='followup_open_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followup',
+            index=models.Index(fields=['-created_at', '-id'], name='followup_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ongoingdebt',
+            index=models.Index(fields=['status', 'due_date'], name='debt_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ongoingdebt',
+            index=models.Index(fields=['-created_at', '-id'], name='debt_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overdueaccount',
+            index=models.Index(fields=['due_date'], name='overdue_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overdueaccount',
+            index=models.Index(fields=['-created_at', '-id'], name='overdue_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payablecheck',
+            index=models.Index(fields=['status', 'due_date'], name='payable_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payablecheck',
+            index=models.Index(fields=['-created_at', '-id'], name='payable_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receivablecheck',
+            index=models.Index(fields=['status', 'due_date'], name='receivable_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receivablecheck',
+            index=models.Index(fields=['-created_at', '-id'], name='receivable_created_idx'),
+        ),
+    ]
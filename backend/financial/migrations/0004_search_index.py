@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0003_status_due_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, unique=True, verbose_name='واژه')),
+                ('document_count', models.IntegerField(default=0, verbose_name='تعداد اسناد')),
+            ],
+            options={
+                'verbose_name': 'واژه جستجو',
+                'verbose_name_plural': 'واژگان جستجو',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=30, verbose_name='منبع')),
+                ('object_id', models.BigIntegerField(verbose_name='شناسه ردیف')),
+                ('title', models.CharField(max_length=255, verbose_name='عنوان')),
+                ('text', models.TextField(blank=True, verbose_name='متن')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ به\u200cروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'سند جستجو',
+                'verbose_name_plural': 'اسناد جستجو',
+                'constraints': [models.UniqueConstraint(fields=('source', 'object_id'), name='search_document_object_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='وزن')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='postings', to='financial.searchdocument', verbose_name='سند')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='postings', to='financial.searchterm', verbose_name='واژه')),
+            ],
+            options={
+                'verbose_name': 'ردیف نمایه جستجو',
+                'verbose_name_plural': 'ردیف\u200cهای نمایه جستجو',
+                'constraints': [models.UniqueConstraint(fields=('term', 'document'), name='search_posting_term_document_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTermTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3, verbose_name='سه\u200cحرفی')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='trigrams', to='financial.searchterm', verbose_name='واژه')),
+            ],
+            options={
+                'verbose_name': 'سه\u200cحرفی واژه',
+                'verbose_name_plural': 'سه\u200cحرفی\u200cهای واژگان',
+                'constraints': [models.UniqueConstraint(fields=('trigram', 'term'), name='search_trigram_term_uniq')],
+            },
+        ),
+    ]
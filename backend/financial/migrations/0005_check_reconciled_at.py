@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payablecheck',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='تاریخ تطبیق با صورتحساب'),
+        ),
+        migrations.AddField(
+            model_name='receivablecheck',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='تاریخ تطبیق با صورتحساب'),
+        ),
+    ]
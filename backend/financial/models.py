@@ -1,8 +1,25 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 
 
-class Account(models.Model):
+class AtomicSaveMixin:
+    """ذخیره و حذف ردیف در یک تراکنش
+
+    سیگنال‌های جمع‌های مالی مقدار فعلی ردیف را پیش از تغییر با قفل می‌خوانند و
+    تفاوت را پس از آن اعمال می‌کنند؛ هر دو باید در همان تراکنش باشند تا دو
+    به‌روزرسانی همزمان یک ردیف تفاوت‌های هم‌پوشان اعمال نکنند.
+    """
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+            return super().delete(*args, **kwargs)
+
+
+class Account(AtomicSaveMixin, models.Model):
     """مدل حساب‌ها"""
     name = models.CharField(max_length=200, verbose_name='نام حساب')
     account_number = models.CharField(max_length=50, unique=True, verbose_name='شماره حساب')
@@ -13,12 +30,15 @@ class Account(models.Model):
     class Meta:
         verbose_name = 'حساب'
         verbose_name_plural = 'حساب‌ها'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='account_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.account_number}"
 
 
-class OverdueAccount(models.Model):
+class OverdueAccount(AtomicSaveMixin, models.Model):
     """مدل حساب‌های معوقه"""
     account = models.ForeignKey(Account, on_delete=models.CASCADE, verbose_name='حساب')
     customer_name = models.CharField(max_length=200, verbose_name='نام مشتری')
@@ -30,12 +50,16 @@ class OverdueAccount(models.Model):
     class Meta:
         verbose_name = 'حساب معوقه'
         verbose_name_plural = 'حساب‌های معوقه'
+        indexes = [
+            models.Index(fields=['due_date'], name='overdue_due_date_idx'),
+            models.Index(fields=['-created_at', '-id'], name='overdue_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.customer_name} - {self.overdue_amount}"
 
 
-class Discrepancy(models.Model):
+class Discrepancy(AtomicSaveMixin, models.Model):
     """مدل مغایرت‌ها"""
     title = models.CharField(max_length=200, verbose_name='عنوان مغایرت')
     description = models.TextField(verbose_name='توضیحات')
@@ -52,6 +76,11 @@ class Discrepancy(models.Model):
     class Meta:
         verbose_name = 'مغایرت'
         verbose_name_plural = 'مغایرت‌ها'
+        indexes = [
+            models.Index(fields=['account', 'status'], name='discrepancy_account_status_idx'),
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(status='pending'), name='discrepancy_pending_idx'),
+            models.Index(fields=['-created_at', '-id'], name='discrepancy_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -74,12 +103,17 @@ class FollowUp(models.Model):
     class Meta:
         verbose_name = 'پیگیری'
         verbose_name_plural = 'پیگیری‌ها'
+        indexes = [
+            models.Index(fields=['status', 'follow_up_date'], name='followup_status_date_idx'),
+            models.Index(fields=['follow_up_date'], condition=models.Q(status__in=['pending', 'in_progress']), name='followup_open_date_idx'),
+            models.Index(fields=['-created_at', '-id'], name='followup_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
 
-class PayableCheck(models.Model):
+class PayableCheck(AtomicSaveMixin, models.Model):
     """مدل چک‌های پرداختی"""
     check_number = models.CharField(max_length=50, verbose_name='شماره چک')
     amount = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='مبلغ')
@@ -91,17 +125,22 @@ class PayableCheck(models.Model):
         ('paid', 'پرداخت شده'),
         ('returned', 'برگشت خورده')
     ], default='issued', verbose_name='وضعیت')
+    reconciled_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='تاریخ تطبیق با صورتحساب')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = 'چک پرداختی'
         verbose_name_plural = 'چک‌های پرداختی'
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='payable_status_due_idx'),
+            models.Index(fields=['-created_at', '-id'], name='payable_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.check_number} - {self.payee}"
 
 
-class ReceivableCheck(models.Model):
+class ReceivableCheck(AtomicSaveMixin, models.Model):
     """مدل چک‌های دریافتی"""
     check_number = models.CharField(max_length=50, verbose_name='شماره چک')
     amount = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='مبلغ')
@@ -113,17 +152,22 @@ class ReceivableCheck(models.Model):
         ('deposited', 'واریز شده'),
         ('returned', 'برگشت خورده')
     ], default='received', verbose_name='وضعیت')
+    reconciled_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='تاریخ تطبیق با صورتحساب')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = 'چک دریافتی'
         verbose_name_plural = 'چک‌های دریافتی'
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='receivable_status_due_idx'),
+            models.Index(fields=['-created_at', '-id'], name='receivable_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.check_number} - {self.payer}"
 
 
-class OngoingDebt(models.Model):
+class OngoingDebt(AtomicSaveMixin, models.Model):
     """مدل بدهی‌های در جریان"""
     creditor_name = models.CharField(max_length=200, verbose_name='نام طلبکار')
     amount = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='مبلغ')
@@ -139,6 +183,92 @@ class OngoingDebt(models.Model):
     class Meta:
         verbose_name = 'بدهی در جریان'
         verbose_name_plural = 'بدهی‌های در جریان'
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='debt_status_due_idx'),
+            models.Index(fields=['-created_at', '-id'], name='debt_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.creditor_name} - {self.amount}"
+
+
+class FinancialTotals(models.Model):
+    """مدل جمع‌های مالی که با هر تغییر به صورت افزایشی به‌روز می‌شود"""
+    scope = models.CharField(max_length=50, primary_key=True, verbose_name='دامنه')
+    total_accounts = models.IntegerField(default=0, verbose_name='تعداد حساب‌ها')
+    total_balance = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name='جمع مانده')
+    overdue_accounts_count = models.IntegerField(default=0, verbose_name='تعداد حساب‌های معوقه')
+    overdue_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name='جمع مبلغ معوقه')
+    pending_discrepancies = models.IntegerField(default=0, verbose_name='مغایرت‌های در انتظار')
+    payable_checks_count = models.IntegerField(default=0, verbose_name='چک‌های پرداختی صادر شده')
+    receivable_checks_count = models.IntegerField(default=0, verbose_name='چک‌های دریافتی')
+    ongoing_debts_count = models.IntegerField(default=0, verbose_name='تعداد بدهی‌های در انتظار')
+    ongoing_debts_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name='جمع بدهی‌های در انتظار')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='تاریخ به‌روزرسانی')
+    
+    class Meta:
+        verbose_name = 'جمع‌های مالی'
+        verbose_name_plural = 'جمع‌های مالی'
+    
+    def __str__(self):
+        return f"جمع‌های مالی - {self.scope}"
+
+
+class SearchDocument(models.Model):
+    """مدل سند نمایه جستجو؛ برای هر ردیف قابل جستجو یک سند با متن نرمال‌شده نگه داشته می‌شود"""
+    source = models.CharField(max_length=30, verbose_name='منبع')
+    object_id = models.BigIntegerField(verbose_name='شناسه ردیف')
+    title = models.CharField(max_length=255, verbose_name='عنوان')
+    text = models.TextField(blank=True, verbose_name='متن')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='تاریخ به‌روزرسانی')
+    
+    class Meta:
+        verbose_name = 'سند جستجو'
+        verbose_name_plural = 'اسناد جستجو'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'object_id'], name='search_document_object_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.source} {self.object_id} - {self.title}"
+
+
+class SearchTerm(models.Model):
+    """مدل واژگان نمایه جستجو؛ document_count تعداد اسنادی است که واژه در آن‌ها آمده"""
+    term = models.CharField(max_length=64, unique=True, verbose_name='واژه')
+    document_count = models.IntegerField(default=0, verbose_name='تعداد اسناد')
+    
+    class Meta:
+        verbose_name = 'واژه جستجو'
+        verbose_name_plural = 'واژگان جستجو'
+    
+    def __str__(self):
+        return self.term
+
+
+class SearchPosting(models.Model):
+    """مدل فهرست معکوس: حضور یک واژه در یک سند با وزن فیلد"""
+    # ردیف‌های نمایه صریحاً پیش از واژه و سند حذف می‌شوند؛ DO_NOTHING حذف گروهی را به یک DELETE تبدیل می‌کند
+    term = models.ForeignKey(SearchTerm, on_delete=models.DO_NOTHING, related_name='postings', verbose_name='واژه')
+    document = models.ForeignKey(SearchDocument, on_delete=models.DO_NOTHING, related_name='postings', verbose_name='سند')
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name='وزن')
+    
+    class Meta:
+        verbose_name = 'ردیف نمایه جستجو'
+        verbose_name_plural = 'ردیف‌های نمایه جستجو'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'document'], name='search_posting_term_document_uniq'),
+        ]
+
+
+class SearchTermTrigram(models.Model):
+    """مدل سه‌حرفی‌های واژگان برای جستجوی تقریبی (غلط املایی)"""
+    trigram = models.CharField(max_length=3, verbose_name='سه‌حرفی')
+    term = models.ForeignKey(SearchTerm, on_delete=models.DO_NOTHING, related_name='trigrams', verbose_name='واژه')
+    
+    class Meta:
+        verbose_name = 'سه‌حرفی واژه'
+        verbose_name_plural = 'سه‌حرفی‌های واژگان'
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'term'], name='search_trigram_term_uniq'),
+        ]
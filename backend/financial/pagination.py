@@ -0,0 +1,82 @@
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """صفحه‌بندی کرسری روی کلیدهای ایندکس‌شده (created_at، id) بدون COUNT"""
+    ordering = ('-created_at', '-id')
+    count_query_param = 'count'
+    
+    def get_ordering(self, request, queryset, view):
+        # کلید کرسر همیشه (created_at، id) ایندکس‌شده است؛ ?ordering روی ستون غیریکتا
+        # باعث می‌شد DRF ردیف‌های هم‌مقدار را با offset رد کند
+        return self.ordering
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        # شمارش کل فقط در صورت درخواست صریح انجام می‌شود
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+
+class OptInCursorPagination(BasePagination):
+    """صفحه‌بندی شماره‌ای پیش‌فرض؛ با ?pagination=cursor یا ?cursor=... حالت کرسری فعال می‌شود
+
+    صفحه‌بندی شماره‌ای هم در صورت نبود ?ordering یا order_by صریح ویو به ترتیب
+    (created_at، id) نزولی است تا ردیف‌های با زمان ایجاد یکسان بین صفحات
+    جابه‌جا نشوند.
+    """
+    mode_query_param = 'pagination'
+    ordering = CreatedAtCursorPagination.ordering
+    
+    def __init__(self):
+        self.page_number_paginator = PageNumberPagination()
+        self.cursor_paginator = CreatedAtCursorPagination()
+        self.active_paginator = self.page_number_paginator
+    
+    @property
+    def display_page_controls(self):
+        return self.active_paginator.display_page_controls
+    
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_paginator.cursor_query_param in request.query_params
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.active_paginator = self.cursor_paginator
+        else:
+            self.active_paginator = self.page_number_paginator
+            # ترتیب پیش‌فرض Meta مدل (مثل ['-created_at']) ردیف‌های هم‌زمان را یکتا مرتب نمی‌کند
+            if not queryset.query.order_by:
+                queryset = queryset.order_by(*self.ordering)
+        return self.active_paginator.paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        return self.active_paginator.get_paginated_response(data)
+    
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_paginator.get_paginated_response_schema(schema)
+    
+    def to_html(self):
+        return self.active_paginator.to_html()
+    
+    def get_results(self, data):
+        return data['results']
+    
+    def get_schema_fields(self, view):
+        return self.page_number_paginator.get_schema_fields(view) + self.cursor_paginator.get_schema_fields(view)
+    
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number_paginator.get_schema_operation_parameters(view)
+            + self.cursor_paginator.get_schema_operation_parameters(view)
+        )
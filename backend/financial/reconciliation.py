@@ -0,0 +1,318 @@
+import csv
+import io
+import re
+import time
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_table_version
+from .models import Discrepancy, PayableCheck, ReceivableCheck
+from .search import index_instances
+from .totals import apply_totals_delta, merge_deltas, totals_delta
+
+
+# اختلاف مجاز بین تاریخ صورتحساب و تاریخ سررسید چک (روز)
+DEFAULT_DATE_TOLERANCE = 3
+MAX_DATE_TOLERANCE = 31
+# خطوط صورتحساب دسته‌ای خوانده و تطبیق داده می‌شوند تا کل فایل در حافظه نماند
+STATEMENT_BATCH_SIZE = 5000
+DISCREPANCY_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# مبالغ با دقت و سقف ستون‌های مبلغ مدل‌ها (max_digits=15، decimal_places=2) خوانده می‌شوند
+AMOUNT_QUANTUM = Decimal('0.01')
+MAX_AMOUNT_DIGITS = 13
+# وضعیت‌هایی که چک هنوز می‌تواند در صورتحساب بانک تسویه شود و وضعیت چک پس از تطبیق
+CLEARING_STATUSES = {
+    PayableCheck: (('issued', 'paid'), 'paid'),
+    ReceivableCheck: (('received', 'deposited'), 'deposited'),
+}
+
+StatementLine = namedtuple('StatementLine', ['line_number', 'date', 'amount', 'check_number', 'description'])
+
+_PERSIAN_DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+CSV_COLUMN_ALIASES = {
+    'date': 'date', 'تاریخ': 'date',
+    'amount': 'amount', 'مبلغ': 'amount',
+    'debit': 'debit', 'بدهکار': 'debit', 'برداشت': 'debit',
+    'credit': 'credit', 'بستانکار': 'credit', 'واریز': 'credit',
+    'check_number': 'check_number', 'check': 'check_number', 'شماره چک': 'check_number',
+    'description': 'description', 'شرح': 'description', 'توضیحات': 'description',
+}
+
+
+class StatementFormatError(ValueError):
+    """خطای ساختار کلی فایل صورتحساب"""
+
+
+def normalize_check_number(value):
+    """شماره چک با ارقام لاتین؛ شماره‌ها با ارقام فارسی یا عربی هم ثبت یا چاپ می‌شوند"""
+    return (value or '').translate(_PERSIAN_DIGITS).strip() or None
+
+
+def parse_amount(value):
+    value = (value or '').translate(_PERSIAN_DIGITS).replace(',', '').replace('٬', '').strip()
+    if not value:
+        return None
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f'invalid amount: {value!r}')
+    # NaN و Infinity در مقایسه یا ذخیره خطا می‌دهند؛ مانند هر مبلغ نامعتبر دیگر خطای همان ردیف‌اند
+    if not amount.is_finite() or amount.adjusted() >= MAX_AMOUNT_DIGITS:
+        raise ValueError(f'invalid amount: {value!r}')
+    return amount.quantize(AMOUNT_QUANTUM)
+
+
+def parse_date(value):
+    value = (value or '').translate(_PERSIAN_DIGITS).strip()
+    # تاریخ‌های OFX مثل 20250101120000[-5:EST] فقط بخش روزشان خوانده می‌شود
+    candidate = value[:10] if value[4:5] in ('-', '/') else value[:8]
+    for pattern in ('%Y-%m-%d', '%Y/%m/%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(candidate, pattern).date()
+        except ValueError:
+            continue
+    raise ValueError(f'invalid date: {value!r}')
+
+
+def iter_csv_lines(text_stream, errors):
+    """خواندن جریانی صورتحساب CSV با ستون‌های date، amount (یا debit/credit)، check_number"""
+    reader = csv.reader(text_stream)
+    try:
+        header = next(reader, None)
+    except csv.Error as e:
+        raise StatementFormatError(f'سرستون صورتحساب قابل خواندن نیست: {e}')
+    if header is None:
+        raise StatementFormatError('فایل صورتحساب خالی است.')
+    columns = [CSV_COLUMN_ALIASES.get(name.strip().lower()) for name in header]
+    if 'date' not in columns or not ({'amount', 'debit', 'credit'} & set(columns)):
+        raise StatementFormatError('ستون‌های تاریخ و مبلغ در سرستون صورتحساب یافت نشد.')
+
+    while True:
+        # هر فراخوانی reader دست کم یک سطر فایل را مصرف می‌کند؛ سطر خراب رد می‌شود
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            errors.append({'line': reader.line_num, 'error': str(e)})
+            continue
+        line_number = reader.line_num
+        if not any(cell.strip() for cell in row):
+            continue
+        values = {column: cell for column, cell in zip(columns, row) if column}
+        try:
+            amount = parse_amount(values.get('amount'))
+            if amount is None:
+                amount = (parse_amount(values.get('credit')) or 0) - (parse_amount(values.get('debit')) or 0)
+            yield StatementLine(
+                line_number,
+                parse_date(values['date']),
+                amount,
+                normalize_check_number(values.get('check_number')),
+                (values.get('description') or '').strip(),
+            )
+        except (ValueError, InvalidOperation, KeyError) as e:
+            errors.append({'line': line_number, 'error': str(e)})
+
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def iter_ofx_lines(text_stream, errors):
+    """خواندن جریانی تراکنش‌های STMTTRN از فایل OFX (SGML یا XML)"""
+    transaction_number = 0
+    current = None
+    for text_line in text_stream:
+        for closing, tag, value in _OFX_TAG.findall(text_line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not closing:
+                    transaction_number += 1
+                    current = {}
+                    continue
+                if current is not None:
+                    try:
+                        yield StatementLine(
+                            transaction_number,
+                            parse_date(current['DTPOSTED']),
+                            parse_amount(current['TRNAMT']),
+                            normalize_check_number(current.get('CHECKNUM')),
+                            current.get('MEMO') or current.get('NAME') or '',
+                        )
+                    except (ValueError, InvalidOperation, KeyError) as e:
+                        errors.append({'line': transaction_number, 'error': str(e)})
+                current = None
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+STATEMENT_PARSERS = {
+    'csv': iter_csv_lines,
+    'ofx': iter_ofx_lines,
+}
+
+
+def detect_format(filename):
+    return 'ofx' if filename.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+def _shift(day, days):
+    """جابه‌جایی تاریخ محدود به بازه date"""
+    try:
+        return day + timedelta(days=days)
+    except OverflowError:
+        return date.max if days > 0 else date.min
+
+
+class CheckIndex:
+    """ایندکس هش چک‌های تطبیق‌نشده برای تطبیق با شماره چک و مبلغ یا مبلغ و تاریخ
+
+    چک‌هایی که در ورودهای قبلی تطبیق داده شده‌اند (reconciled_at دارند) و
+    چک‌های برگشتی بارگذاری نمی‌شوند. ردیف‌ها قفل می‌شوند تا دو ورود هم‌زمان یک
+    چک را تطبیق ندهند.
+    """
+
+    def __init__(self, model, start, end, tolerance):
+        self.model = model
+        self.tolerance = tolerance
+        clearable, self.cleared_status = CLEARING_STATUSES[model]
+        self.by_number = defaultdict(list)
+        self.by_amount_date = defaultdict(list)
+        self.statuses = {}
+        self.matched = set()
+        rows = model.objects.select_for_update().filter(
+            reconciled_at__isnull=True,
+            status__in=clearable,
+            due_date__range=(_shift(start, -tolerance), _shift(end, tolerance)),
+        ).values_list('pk', 'check_number', 'amount', 'due_date', 'status')
+        for pk, check_number, amount, due_date, status in rows.iterator(chunk_size=5000):
+            self.statuses[pk] = status
+            self.by_number[(normalize_check_number(check_number), amount)].append((pk, due_date))
+            self.by_amount_date[(amount, due_date)].append(pk)
+
+    def match(self, line, amount):
+        if line.check_number:
+            candidates = [
+                (abs((due_date - line.date).days), pk)
+                for pk, due_date in self.by_number.get((line.check_number, amount), ())
+                if pk not in self.matched and abs((due_date - line.date).days) <= self.tolerance
+            ]
+            if candidates:
+                return self._take(min(candidates)[1])
+            return None
+        # بدون شماره چک: نزدیک‌ترین تاریخ با مبلغ یکسان
+        for offset in range(self.tolerance + 1):
+            for day in {_shift(line.date, -offset), _shift(line.date, offset)}:
+                for pk in self.by_amount_date.get((amount, day), ()):
+                    if pk not in self.matched:
+                        return self._take(pk)
+        return None
+
+    def _take(self, pk):
+        self.matched.add(pk)
+        return pk
+
+
+def _discrepancy(line, account, user):
+    return Discrepancy(
+        title=f'مغایرت صورتحساب بانکی - ردیف {line.line_number}',
+        description=(
+            f'تاریخ: {line.date.isoformat()} - مبلغ: {line.amount}'
+            + (f' - شماره چک: {line.check_number}' if line.check_number else '')
+            + (f' - شرح: {line.description}' if line.description else '')
+        ),
+        amount=abs(line.amount),
+        account=account,
+        status='pending',
+        created_by=user,
+    )
+
+
+def _reconcile_batch(lines, account, user, tolerance, reconciled_at):
+    """تطبیق یک دسته از خطوط؛ تعداد چک‌های تطبیق‌یافته و مغایرت‌های ثبت‌شده"""
+    start = min(line.date for line in lines)
+    end = max(line.date for line in lines)
+    payable_index = CheckIndex(PayableCheck, start, end, tolerance)
+    receivable_index = CheckIndex(ReceivableCheck, start, end, tolerance)
+
+    unmatched = []
+    for line in lines:
+        if line.amount < 0:
+            if payable_index.match(line, -line.amount) is not None:
+                continue
+        elif receivable_index.match(line, line.amount) is not None:
+            continue
+        unmatched.append(line)
+
+    # چک‌های تطبیق‌یافته ثبت می‌شوند تا ورود دوباره همان صورتحساب آن‌ها را دوباره تطبیق ندهد؛
+    # چکی که در بانک تسویه شده پرداخت‌شده یا واریزشده است
+    deltas = []
+    for index in (payable_index, receivable_index):
+        if index.matched:
+            index.model.objects.filter(pk__in=index.matched).update(reconciled_at=reconciled_at, status=index.cleared_status)
+            deltas.extend(
+                totals_delta(index.model, {'status': index.statuses[pk]}, {'status': index.cleared_status})
+                for pk in index.matched
+            )
+    apply_totals_delta(merge_deltas(deltas))
+
+    created = Discrepancy.objects.bulk_create(
+        [_discrepancy(line, account, user) for line in unmatched],
+        batch_size=DISCREPANCY_BATCH_SIZE,
+    )
+    index_instances(Discrepancy, created)
+    return len(payable_index.matched), len(receivable_index.matched), len(created)
+
+
+def import_statement(stream, account, user, statement_format='csv', tolerance=DEFAULT_DATE_TOLERANCE, encoding='utf-8-sig'):
+    """تطبیق خطوط صورتحساب با چک‌ها و ثبت گروهی مغایرت برای خطوط تطبیق‌نیافته
+
+    برداشت‌ها (مبلغ منفی) با چک‌های پرداختی و واریزها با چک‌های دریافتی تطبیق
+    داده می‌شوند. خطوط در دسته‌های STATEMENT_BATCH_SIZE خوانده و تطبیق داده
+    می‌شوند؛ کل ورود در یک تراکنش است تا خطای خواندن فایل در میانه کار هیچ
+    تغییری باقی نگذارد.
+    """
+    if not 0 <= tolerance <= MAX_DATE_TOLERANCE:
+        raise ValueError(f'tolerance must be between 0 and {MAX_DATE_TOLERANCE}')
+
+    started = time.perf_counter()
+    errors = []
+    text_stream = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding=encoding, newline='')
+    lines = STATEMENT_PARSERS[statement_format](text_stream, errors)
+    reconciled_at = timezone.now()
+
+    result = {
+        'lines': 0,
+        'matched_payable_checks': 0,
+        'matched_receivable_checks': 0,
+        'discrepancies_created': 0,
+    }
+    with transaction.atomic():
+        while batch := list(islice(lines, STATEMENT_BATCH_SIZE)):
+            payable, receivable, created = _reconcile_batch(batch, account, user, tolerance, reconciled_at)
+            result['lines'] += len(batch)
+            result['matched_payable_checks'] += payable
+            result['matched_receivable_checks'] += receivable
+            result['discrepancies_created'] += created
+
+        # bulk_create و update سیگنال ندارند؛ جمع‌ها و نسخه کش دستی به‌روز می‌شوند
+        apply_totals_delta({'pending_discrepancies': result['discrepancies_created']})
+        for model, key in (
+            (Discrepancy, 'discrepancies_created'),
+            (PayableCheck, 'matched_payable_checks'),
+            (ReceivableCheck, 'matched_receivable_checks'),
+        ):
+            if result[key]:
+                transaction.on_commit(lambda model=model: bump_table_version(model))
+
+    result['errors'] = errors[:MAX_REPORTED_ERRORS]
+    result['error_count'] = len(errors)
+    result['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return result
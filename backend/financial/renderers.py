@@ -0,0 +1,37 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson اختیاری است؛ بدون آن خروجی با json استاندارد ساخته می‌شود
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer با orjson در صورت نصب بودن و خروجی بایت به بایت یکسان با JSONRenderer
+
+    فقط برای داده‌هایی مناسب است که از رشته، عدد صحیح، بولی، None، لیست و
+    دیکشنری با کلید رشته‌ای ساخته شده‌اند (مثل خروجی مسیر values()). اعداد
+    اعشاری را orjson متفاوت از json می‌نویسد؛ هر چیزی که orjson نتواند
+    بنویسد، مثل اعداد خارج از بازه ۶۴ بیتی یا کلید غیررشته‌ای، از مسیر عادی
+    JSONRenderer ساخته می‌شود. انواع دیگر (datetime، Decimal و ...) به
+    encoder خود DRF سپرده می‌شوند.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.uses_default_format(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # مثل JSONRenderer، \u2028 و \u2029 escape می‌شوند تا خروجی زیرمجموعه JavaScript باشد
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def uses_default_format(self, accepted_media_type, renderer_context):
+        """orjson فقط خروجی فشرده و UTF-8 بدون تورفتگی تولید می‌کند"""
+        return (
+            self.compact and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
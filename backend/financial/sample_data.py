@@ -0,0 +1,314 @@
+"""تولید داده نمونه در مقیاس بالا برای تست بار و بنچمارک
+
+هر دسته با یک مولد تصادفی مستقل بر اساس (seed، نوع داده، شماره دسته) ساخته
+می‌شود و کلیدهای خارجی با اندیس در فهرست مرتب‌شده بر اساس شماره حساب و کد
+کالا انتخاب می‌شوند، بنابراین خروجی با هر تعداد پردازش موازی (و هر ترتیب
+تخصیص شناسه‌ها) یکسان است. موجودی اولیه هر کالا یک تراکنش تعدیل است و
+Product.quantity در پایان برابر جمع تراکنش‌های آن قرار می‌گیرد، مثل ثبت از
+طریق دفتر موجودی.
+"""
+import multiprocessing
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+
+from inventory.ledger import signed_sum
+from inventory.models import Product, InventoryTransaction
+from tasks.models import Task
+from .cache import bump_table_version
+from .models import Account, OverdueAccount, Discrepancy, FollowUp, PayableCheck, ReceivableCheck, OngoingDebt
+from .search import rebuild_search_index
+from .summary import SUMMARY_MODELS
+from .totals import rebuild_totals
+
+
+BANKS = ['بانک ملی', 'بانک صادرات', 'بانک تجارت', 'بانک پاسارگاد', 'بانک ملت', 'بانک سپه']
+COMPANY_PREFIXES = ['شرکت', 'فروشگاه', 'بازرگانی', 'تأمین‌کننده', 'گروه صنعتی']
+COMPANY_NAMES = ['البرز', 'پارس', 'مهر', 'نور', 'آریا', 'سپهر', 'کیمیا', 'زاگرس', 'کوثر', 'دنا']
+CATEGORIES = ['لوازم اداری', 'مواد اولیه', 'قطعات یدکی', 'بسته‌بندی', 'تجهیزات']
+
+
+def _company_name(rng):
+    return f'{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_NAMES)} {rng.randint(1, 999)}'
+
+
+def _amount(rng, low=100_000, high=50_000_000):
+    return Decimal(rng.randrange(low, high, 1_000))
+
+
+def _due_date(rng, today, past=180, future=180):
+    return today + timedelta(days=rng.randint(-past, future))
+
+
+def build_accounts(rng, start, count, refs):
+    return [
+        Account(
+            name=_company_name(rng),
+            account_number=f"{refs['prefix']}A{index:09d}",
+            balance=_amount(rng, -20_000_000, 80_000_000),
+            is_active=rng.random() > 0.05,
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_products(rng, start, count, refs):
+    products = []
+    for index in range(start, start + count):
+        minimum_stock = rng.randint(0, 50)
+        products.append(Product(
+            name=f'کالای {index}',
+            code=f"{refs['prefix']}P{index:09d}",
+            unit_price=_amount(rng, 10_000, 5_000_000),
+            # موجودی از روی تراکنش‌ها محاسبه می‌شود (build_opening_stock)
+            quantity=0,
+            minimum_stock=minimum_stock,
+            category=rng.choice(CATEGORIES),
+            is_active=rng.random() > 0.05,
+        ))
+    return products
+
+
+def build_overdue_accounts(rng, start, count, refs):
+    return [
+        OverdueAccount(
+            account_id=rng.choice(refs['account_ids']),
+            customer_name=_company_name(rng),
+            overdue_amount=_amount(rng),
+            due_date=_due_date(rng, refs['today'], past=365, future=0),
+            contact_info=f'تلفن: 021-{rng.randint(10_000_000, 99_999_999)}',
+        )
+        for _ in range(count)
+    ]
+
+
+def build_discrepancies(rng, start, count, refs):
+    return [
+        Discrepancy(
+            title=f'مغایرت {index}',
+            description='مغایرت تولید شده برای تست بار',
+            amount=_amount(rng, 1_000, 5_000_000),
+            account_id=rng.choice(refs['account_ids']),
+            status=rng.choices(['pending', 'resolved', 'rejected'], weights=[5, 4, 1])[0],
+            created_by_id=rng.choice(refs['user_ids']),
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_follow_ups(rng, start, count, refs):
+    return [
+        FollowUp(
+            title=f'پیگیری {index}',
+            description='پیگیری تولید شده برای تست بار',
+            customer_name=_company_name(rng),
+            follow_up_date=_due_date(rng, refs['today'], past=30, future=60),
+            status=rng.choices(['pending', 'in_progress', 'completed'], weights=[4, 2, 4])[0],
+            created_by_id=rng.choice(refs['user_ids']),
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_payable_checks(rng, start, count, refs):
+    return [
+        PayableCheck(
+            check_number=f"{refs['prefix']}PC{index:09d}",
+            amount=_amount(rng),
+            payee=_company_name(rng),
+            due_date=_due_date(rng, refs['today']),
+            bank_name=rng.choice(BANKS),
+            status=rng.choices(['issued', 'paid', 'returned'], weights=[6, 3, 1])[0],
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_receivable_checks(rng, start, count, refs):
+    return [
+        ReceivableCheck(
+            check_number=f"{refs['prefix']}RC{index:09d}",
+            amount=_amount(rng),
+            payer=_company_name(rng),
+            due_date=_due_date(rng, refs['today']),
+            bank_name=rng.choice(BANKS),
+            status=rng.choices(['received', 'deposited', 'returned'], weights=[6, 3, 1])[0],
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_ongoing_debts(rng, start, count, refs):
+    return [
+        OngoingDebt(
+            creditor_name=_company_name(rng),
+            amount=_amount(rng, 1_000_000, 500_000_000),
+            description='بدهی تولید شده برای تست بار',
+            due_date=_due_date(rng, refs['today'], past=30, future=720),
+            status=rng.choices(['pending', 'partial_paid', 'paid'], weights=[5, 2, 3])[0],
+        )
+        for _ in range(count)
+    ]
+
+
+def build_opening_stock(rng, start, count, refs):
+    # تعداد این نوع داده با تعداد کالاها برابر است؛ هر کالا یک تراکنش موجودی اولیه دارد
+    return [
+        InventoryTransaction(
+            product_id=refs['product_ids'][index],
+            transaction_type='adjustment',
+            quantity=rng.randint(100, 600),
+            unit_price=_amount(rng, 10_000, 5_000_000),
+            description='موجودی اولیه',
+            reference_number=f"{refs['prefix']}O{index:09d}",
+            created_by_id=refs['user_ids'][0],
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_inventory_transactions(rng, start, count, refs):
+    return [
+        InventoryTransaction(
+            product_id=rng.choice(refs['product_ids']),
+            transaction_type=rng.choices(['in', 'out', 'adjustment'], weights=[5, 4, 1])[0],
+            quantity=rng.randint(1, 100),
+            unit_price=_amount(rng, 10_000, 5_000_000),
+            reference_number=f"{refs['prefix']}T{index:09d}",
+            created_by_id=rng.choice(refs['user_ids']),
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def build_tasks(rng, start, count, refs):
+    now = refs['now']
+    tasks = []
+    for index in range(start, start + count):
+        status = rng.choices(['pending', 'in_progress', 'completed', 'cancelled'], weights=[4, 3, 2, 1])[0]
+        tasks.append(Task(
+            title=f'کار {index}',
+            description='کار تولید شده برای تست بار',
+            assigned_to_id=rng.choice(refs['user_ids']),
+            created_by_id=rng.choice(refs['user_ids']),
+            priority=rng.choice(['low', 'medium', 'high', 'urgent']),
+            status=status,
+            due_date=now + timedelta(hours=rng.randint(-24 * 30, 24 * 60)),
+            is_completed=status == 'completed',
+            completed_at=now if status == 'completed' else None,
+        ))
+    return tasks
+
+
+# نوع داده: (مولد، تعداد به ازای هر واحد مقیاس)
+# موجودیت‌های مستقل ابتدا ساخته می‌شوند تا شناسه‌هایشان برای کلیدهای خارجی در دسترس باشد
+INDEPENDENT_ENTITIES = {
+    'accounts': (build_accounts, 1),
+    'products': (build_products, 0.2),
+}
+DEPENDENT_ENTITIES = {
+    'overdue_accounts': (build_overdue_accounts, 0.2),
+    'discrepancies': (build_discrepancies, 0.1),
+    'follow_ups': (build_follow_ups, 0.5),
+    'payable_checks': (build_payable_checks, 2),
+    'receivable_checks': (build_receivable_checks, 2),
+    'ongoing_debts': (build_ongoing_debts, 0.5),
+    'opening_stock': (build_opening_stock, 0.2),
+    'inventory_transactions': (build_inventory_transactions, 1),
+    'tasks': (build_tasks, 0.5),
+}
+ENTITIES = {**INDEPENDENT_ENTITIES, **DEPENDENT_ENTITIES}
+
+# مقادیر مشترک بین پردازش‌ها؛ پیش از ساخت pool مقداردهی و با fork به ارث برده می‌شود
+_refs = {}
+
+
+def _init_worker():
+    # اتصال‌های به ارث رسیده از پردازش والد نباید مشترک استفاده شوند
+    connections.close_all()
+
+
+def _create_batch(job):
+    entity, batch_index, start, count = job
+    builder, _ = ENTITIES[entity]
+    rng = random.Random(f"{_refs['seed']}:{entity}:{batch_index}")
+    objects = builder(rng, start, count, _refs)
+    type(objects[0]).objects.bulk_create(objects, batch_size=len(objects))
+    return entity, count
+
+
+def entity_counts(scale):
+    return {entity: max(1, int(scale * ratio)) for entity, (_, ratio) in ENTITIES.items()}
+
+
+def generate(scale, seed=0, batch_size=5_000, workers=1, users=None, log=print):
+    """تولید داده در مقیاس scale و برگرداندن آمار سرعت هر نوع داده"""
+    User = get_user_model()
+    prefix = f'S{seed}-'
+    if Account.objects.filter(account_number__startswith=prefix).exists():
+        raise ValueError(f'Scaled data for seed {seed} already exists; use a different seed.')
+
+    _refs.clear()
+    _refs.update({
+        'seed': seed,
+        'prefix': prefix,
+        'today': date.today(),
+        'now': timezone.make_aware(datetime.combine(date.today(), datetime.min.time())),
+        'user_ids': sorted(user.pk for user in users) if users else list(User.objects.order_by('pk').values_list('pk', flat=True)),
+    })
+    counts = entity_counts(scale)
+    stats = {}
+
+    def run(entities):
+        jobs = [
+            (entity, batch_index, start, min(batch_size, counts[entity] - start))
+            for entity in entities
+            for batch_index, start in enumerate(range(0, counts[entity], batch_size))
+        ]
+        if workers > 1:
+            # با اجرای موازی زمان هر نوع داده از شروع مرحله تا پایان آخرین دسته آن است
+            started = time.perf_counter()
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers, initializer=_init_worker) as pool:
+                for entity, _ in pool.imap_unordered(_create_batch, jobs):
+                    stats[entity] = time.perf_counter() - started
+        else:
+            for job in jobs:
+                started = time.perf_counter()
+                entity, _ = _create_batch(job)
+                stats[entity] = stats.get(entity, 0) + time.perf_counter() - started
+        for entity in entities:
+            rate = counts[entity] / stats[entity] if stats[entity] else float('inf')
+            log(f'{entity}: {counts[entity]} rows in {stats[entity]:.1f}s ({rate:,.0f} rows/s)')
+
+    started = time.perf_counter()
+    run(INDEPENDENT_ENTITIES)
+    # ترتیب بر اساس شماره حساب و کد کالا؛ شناسه‌ها با اجرای موازی به ترتیب دیگری تخصیص می‌یابند
+    _refs['account_ids'] = list(
+        Account.objects.filter(account_number__startswith=prefix).order_by('account_number').values_list('pk', flat=True)
+    )
+    _refs['product_ids'] = list(
+        Product.objects.filter(code__startswith=prefix).order_by('code').values_list('pk', flat=True)
+    )
+    run(DEPENDENT_ENTITIES)
+    # bulk_create تراکنش‌ها موجودی کالا را تغییر نمی‌دهد؛ موجودی برابر جمع تراکنش‌ها قرار می‌گیرد
+    Product.objects.filter(code__startswith=prefix).update(quantity=signed_sum(InventoryTransaction.objects.all()))
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    log(f'total: {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)')
+
+    # bulk_create سیگنال‌ها را اجرا نمی‌کند؛ جمع‌ها و نسخه کش به‌روز می‌شوند
+    rebuild_totals()
+    for model in SUMMARY_MODELS + (FollowUp, Product, InventoryTransaction, Task):
+        bump_table_version(model)
+    started = time.perf_counter()
+    rebuild_search_index()
+    log(f'search index rebuilt in {time.perf_counter() - started:.1f}s')
+
+    return {entity: (counts[entity], stats[entity]) for entity in counts}
@@ -0,0 +1,459 @@
+"""نمایه جستجوی یکپارچه روی حساب‌های معوقه، پیگیری‌ها، چک‌ها، بدهی‌ها و مغایرت‌ها
+
+متن هر ردیف نرمال می‌شود (یکسان‌سازی ی/ي و ک/ك، حذف نیم‌فاصله و اعراب،
+تبدیل ارقام فارسی و عربی) و به واژه تبدیل می‌شود. برای هر واژه فهرست اسناد
+(SearchPosting) و برای واژگان، سه‌حرفی‌ها (SearchTermTrigram) نگه داشته
+می‌شود؛ جستجو به جای LIKE '%x%' روی جدول‌های اصلی، جستجوی بازه‌ای روی ایندکس
+واژه‌ها و فهرست اسناد است. هر واژه پرس‌وجو با واژه کامل، پیشوند یا (اگر
+پیدا نشود) با شباهت سه‌حرفی تطبیق داده می‌شود و سندها باید همه واژه‌ها را
+داشته باشند. امتیاز هر سند مجموع وزن بهترین تطبیق هر واژه است که با کمیاب
+بودن واژه و وزن فیلد (عنوان و نام‌ها دو برابر توضیحات) افزایش می‌یابد.
+
+سیگنال‌ها نمایه را همراه هر ذخیره و حذف به‌روز می‌کنند؛ مسیرهای گروهی
+(bulk_create، bulk_update و حذف گروهی) باید index_instances یا
+deferred_search_index را خودشان فراخوانی کنند. فیلدهای مدل‌های مرتبط (مثل
+نام حساب مغایرت) با مسیر account__name نمایه می‌شوند و تغییر آن‌ها سندهای
+وابسته را دوباره نمایه می‌کند.
+
+نمایه‌سازی همزمان یک سند خطای یکتایی نمی‌دهد: ردیف‌های تازه با
+ignore_conflicts ساخته می‌شوند و سندها پیش از محاسبه تغییرات قفل می‌شوند.
+"""
+import math
+import re
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Max, Value, When
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Discrepancy, FollowUp, OngoingDebt, OverdueAccount, PayableCheck, ReceivableCheck,
+    SearchDocument, SearchPosting, SearchTerm, SearchTermTrigram,
+)
+
+
+# منبع جستجو: (مدل، فیلدهای متن با وزن، نام مسیر جزئیات)
+SEARCH_SOURCES = {
+    'overdue_account': (OverdueAccount, (('customer_name', 2), ('account__name', 1), ('contact_info', 1)), 'overdue-account-detail'),
+    'follow_up': (FollowUp, (('title', 2), ('customer_name', 2), ('description', 1)), 'followup-detail'),
+    'payable_check': (PayableCheck, (('check_number', 2), ('payee', 2), ('bank_name', 1)), 'payable-check-detail'),
+    'receivable_check': (ReceivableCheck, (('check_number', 2), ('payer', 2), ('bank_name', 1)), 'receivable-check-detail'),
+    'ongoing_debt': (OngoingDebt, (('creditor_name', 2), ('description', 1)), 'ongoing-debt-detail'),
+    'discrepancy': (Discrepancy, (('title', 2), ('account__name', 1), ('description', 1)), 'discrepancy-detail'),
+}
+SOURCE_BY_MODEL = {model: source for source, (model, _, _) in SEARCH_SOURCES.items()}
+
+
+def _related_sources():
+    """{مدل مرتبط: [(منبع، رابطه، فیلدهای نمایه‌شده)]} برای فیلدهای مسیردار منابع"""
+    related = {}
+    for source, (model, fields, _) in SEARCH_SOURCES.items():
+        relations = {}
+        for field, _ in fields:
+            if '__' in field:
+                relation, name = field.split('__', 1)
+                relations.setdefault(relation, []).append(name)
+        for relation, names in relations.items():
+            related_model = model._meta.get_field(relation).related_model
+            related.setdefault(related_model, []).append((source, relation, tuple(names)))
+    return related
+
+
+RELATED_SOURCES = _related_sources()
+
+
+def related_fields(model):
+    """فیلدهای مدل مرتبط که در سند منابع دیگر نمایه می‌شوند"""
+    return sorted({name for _, _, names in RELATED_SOURCES[model] for name in names})
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 6
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 30
+MAX_FUZZY_EXPANSIONS = 10
+MIN_TRIGRAM_SIMILARITY = 0.3
+# سقف اسناد نامزد از کمیاب‌ترین واژه پرس‌وجو؛ برای واژه‌های بسیار پرتکرار جدیدترین اسناد رتبه‌بندی می‌شوند
+MAX_CANDIDATES = 10000
+MAX_LIMIT = 100
+# تعداد پارامترهای هر کوئری IN برای سازگاری با محدودیت SQLite
+IN_BATCH_SIZE = 500
+TEXT_PREVIEW_LENGTH = 300
+
+_CHARACTER_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    'ة': 'ه', 'ۀ': 'ه',
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    # نیم‌فاصله و نویسه‌های بدون عرض حذف می‌شوند تا «می‌شود» و «میشود» یکی شوند
+    '\u200c': None, '\u200d': None, '\u200b': None, '\ufeff': None,
+    # کشیده
+    '\u0640': None,
+})
+_DIACRITICS = re.compile('[\u064b-\u065f\u0670\u06d6-\u06ed]')
+_TOKEN = re.compile(r'\w+')
+
+
+class SearchError(ValueError):
+    """پارامترهای نامعتبر جستجو"""
+
+
+def normalize(text):
+    """نرمال‌سازی متن فارسی و لاتین برای نمایه و پرس‌وجو"""
+    return _DIACRITICS.sub('', str(text).translate(_CHARACTER_MAP)).casefold()
+
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in _TOKEN.findall(normalize(text))]
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def _chunks(values, size=IN_BATCH_SIZE):
+    values = list(values)
+    for offset in range(0, len(values), size):
+        yield values[offset:offset + size]
+
+
+def document_for(source, instance):
+    """عنوان، متن نمایش و وزن واژه‌های سند یک ردیف"""
+    _, fields, _ = SEARCH_SOURCES[source]
+    weights = {}
+    parts = []
+    for field, weight in fields:
+        value = instance
+        for attr in field.split('__'):
+            value = getattr(value, attr) if value is not None else None
+        value = str(value or '')
+        if not value:
+            continue
+        parts.append(value)
+        for token in tokenize(value):
+            if weights.get(token, 0) < weight:
+                weights[token] = weight
+    return str(instance)[:255], ' | '.join(parts)[:TEXT_PREVIEW_LENGTH], weights
+
+
+def _insert_rows(model, rows):
+    """درج گروهی ردیف‌های نمایه؛ ردیف‌های تکراری (نمایه‌سازی همزمان یک سند یا واژه) نادیده گرفته می‌شوند"""
+    model.objects.bulk_create(rows, batch_size=IN_BATCH_SIZE, ignore_conflicts=True)
+
+
+def _term_ids(terms):
+    """شناسه واژه‌ها؛ واژه‌های جدید همراه با سه‌حرفی‌هایشان ساخته می‌شوند"""
+    ids = {}
+    for batch in _chunks(terms):
+        ids.update(SearchTerm.objects.filter(term__in=batch).values_list('term', 'pk'))
+    missing = [term for term in terms if term not in ids]
+    if missing:
+        _insert_rows(SearchTerm, [SearchTerm(term=term, document_count=0) for term in missing])
+        created = {}
+        for batch in _chunks(missing):
+            created.update(SearchTerm.objects.filter(term__in=batch).values_list('term', 'pk'))
+        _insert_rows(SearchTermTrigram, [
+            SearchTermTrigram(trigram=trigram, term_id=pk) for term, pk in created.items() for trigram in trigrams(term)
+        ])
+        ids.update(created)
+    return ids
+
+
+def _update_document_counts(changes):
+    """اعمال تغییر تعداد اسناد واژه‌ها؛ changes: {شناسه واژه: تغییر}"""
+    by_delta = {}
+    for term_id, delta in changes.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(term_id)
+    for delta, term_ids in by_delta.items():
+        for batch in _chunks(term_ids):
+            SearchTerm.objects.filter(pk__in=batch).update(document_count=F('document_count') + delta)
+
+
+def _locked_documents(source, object_ids):
+    documents = {}
+    for batch in _chunks(object_ids):
+        documents.update(
+            (document.object_id, document)
+            for document in SearchDocument.objects.select_for_update().filter(source=source, object_id__in=batch)
+        )
+    return documents
+
+
+def _index(source, instances):
+    documents = {instance.pk: document_for(source, instance) for instance in instances}
+    if not documents:
+        return
+
+    # سندها قفل می‌شوند تا نمایه‌سازی همزمان همان سند منتظر بماند و تغییرات را روی وضعیت ثبت‌شده حساب کند
+    existing = _locked_documents(source, documents)
+    new_documents = [
+        SearchDocument(source=source, object_id=object_id, title=title, text=text)
+        for object_id, (title, text, _) in documents.items()
+        if object_id not in existing
+    ]
+    if new_documents:
+        SearchDocument.objects.bulk_create(new_documents, batch_size=IN_BATCH_SIZE, ignore_conflicts=True)
+        existing.update(_locked_documents(source, [document.object_id for document in new_documents]))
+    changed_documents = []
+    for object_id, document in existing.items():
+        title, text, _ = documents[object_id]
+        if (document.title, document.text) != (title, text):
+            document.title, document.text, document.updated_at = title, text, timezone.now()
+            changed_documents.append(document)
+    if changed_documents:
+        SearchDocument.objects.bulk_update(changed_documents, ['title', 'text', 'updated_at'], batch_size=IN_BATCH_SIZE)
+
+    # فهرست فعلی واژه‌های هر سند؛ سندهایی که واژه‌هایشان تغییر نکرده دست نمی‌خورند
+    document_ids = {object_id: existing[object_id].pk for object_id in documents}
+    current = {}
+    for batch in _chunks(document_ids.values()):
+        for document_id, term, weight in SearchPosting.objects.filter(document_id__in=batch).values_list('document_id', 'term__term', 'weight'):
+            current.setdefault(document_id, {})[term] = weight
+    stale = {
+        object_id: document_ids[object_id]
+        for object_id, (_, _, weights) in documents.items()
+        if current.get(document_ids[object_id], {}) != weights
+    }
+    if not stale:
+        return
+
+    term_ids = _term_ids({term for object_id in stale for term in documents[object_id][2]} | {
+        term for document_id in stale.values() for term in current.get(document_id, {})
+    })
+    counts = {}
+    for object_id, document_id in stale.items():
+        for term in current.get(document_id, {}):
+            counts[term_ids[term]] = counts.get(term_ids[term], 0) - 1
+        for term in documents[object_id][2]:
+            counts[term_ids[term]] = counts.get(term_ids[term], 0) + 1
+    for batch in _chunks(stale.values()):
+        SearchPosting.objects.filter(document_id__in=batch).delete()
+    _insert_rows(SearchPosting, [
+        SearchPosting(term_id=term_ids[term], document_id=document_id, weight=weight)
+        for object_id, document_id in stale.items()
+        for term, weight in documents[object_id][2].items()
+    ])
+    _update_document_counts(counts)
+
+
+def _remove(source, object_ids):
+    for batch in _chunks(object_ids):
+        document_ids = list(SearchDocument.objects.filter(source=source, object_id__in=batch).values_list('pk', flat=True))
+        if not document_ids:
+            continue
+        counts = {}
+        for term_id in SearchPosting.objects.filter(document_id__in=document_ids).values_list('term_id', flat=True):
+            counts[term_id] = counts.get(term_id, 0) - 1
+        SearchPosting.objects.filter(document_id__in=document_ids).delete()
+        SearchDocument.objects.filter(pk__in=document_ids).delete()
+        _update_document_counts(counts)
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_search_index():
+    """تغییرات نمایه داخل بلاک جمع و در پایان گروهی اعمال می‌شوند (برای حذف و ذخیره‌های گروهی)"""
+    if getattr(_deferred, 'pending', None) is not None:
+        yield
+        return
+    _deferred.pending = {}
+    try:
+        yield
+        pending = _deferred.pending
+    finally:
+        _deferred.pending = None
+    for (model, removed), object_ids in pending.items():
+        if removed:
+            remove_objects(model, object_ids)
+        else:
+            index_instances(model, source_queryset(SOURCE_BY_MODEL[model]).filter(pk__in=object_ids))
+
+
+def source_queryset(source):
+    """ردیف‌های یک منبع همراه با روابطی که فیلدهایشان نمایه می‌شوند"""
+    model, fields, _ = SEARCH_SOURCES[source]
+    relations = {field.rsplit('__', 1)[0] for field, _ in fields if '__' in field}
+    return model._default_manager.select_related(*relations)
+
+
+def index_related(model, pk):
+    """نمایه دوباره سندهایی که فیلدی از ردیف مرتبط pk را نمایه می‌کنند (مثل مغایرت‌های یک حساب)"""
+    for source, relation, _ in RELATED_SOURCES.get(model, ()):
+        source_model = SEARCH_SOURCES[source][0]
+        for batch in _chunks(source_queryset(source).filter(**{relation: pk}).values_list('pk', flat=True)):
+            index_instances(source_model, source_queryset(source).filter(pk__in=batch))
+
+
+def index_instances(model, instances):
+    """افزودن یا به‌روزرسانی اسناد ردیف‌های یک مدل"""
+    source = SOURCE_BY_MODEL[model]
+    if getattr(_deferred, 'pending', None) is not None:
+        _deferred.pending.setdefault((model, False), set()).update(instance.pk for instance in instances)
+        return
+    with transaction.atomic():
+        _index(source, instances)
+
+
+def remove_objects(model, object_ids):
+    source = SOURCE_BY_MODEL[model]
+    if getattr(_deferred, 'pending', None) is not None:
+        _deferred.pending.setdefault((model, True), set()).update(object_ids)
+        return
+    with transaction.atomic():
+        _remove(source, object_ids)
+
+
+def rebuild_search_index(batch_size=2000, log=None):
+    """بازسازی کامل نمایه از جدول‌های اصلی"""
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchTermTrigram.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        SearchDocument.objects.all().delete()
+    totals = {}
+    for source in SEARCH_SOURCES:
+        queryset = source_queryset(source).order_by('pk')
+        last_pk = 0
+        count = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                _index(source, batch)
+            last_pk = batch[-1].pk
+            count += len(batch)
+        totals[source] = count
+        if log:
+            log(f'{source}: {count} documents')
+    return totals
+
+
+# Query
+def _prefix_filter(token):
+    if connection.vendor == 'postgresql':
+        # ایندکس varchar_pattern_ops ستون unique برای LIKE 'x%' استفاده می‌شود
+        return {'term__startswith': token}
+    return {'term__gte': token, 'term__lt': token + '\U0010ffff'}
+
+
+def _idf(document_count):
+    return 1 / math.log(2 + document_count)
+
+
+def _weighted(matches):
+    """وزن نهایی تطبیق‌ها: کیفیت تطبیق ضربدر کمیابی واژه پرس‌وجو
+
+    کمیابی از مجموع تعداد اسناد همه تطبیق‌های یک واژه حساب می‌شود تا یک
+    گسترش پیشوندی کمیاب از تطبیق کامل همان واژه امتیاز بیشتری نگیرد.
+    """
+    idf = _idf(sum(document_count for _, document_count in matches.values()))
+    return {term_id: (quality * idf, document_count) for term_id, (quality, document_count) in matches.items()}
+
+
+def match_terms(token):
+    """واژه‌های نمایه منطبق با یک واژه پرس‌وجو: {شناسه واژه: (وزن تطبیق، تعداد اسناد)}"""
+    if len(token) >= MIN_PREFIX_LENGTH:
+        rows = SearchTerm.objects.filter(document_count__gt=0, **_prefix_filter(token)).order_by('term')[:MAX_PREFIX_EXPANSIONS]
+    else:
+        rows = SearchTerm.objects.filter(document_count__gt=0, term=token)
+    matches = {
+        pk: (0.4 + 0.6 * len(token) / len(term), document_count)
+        for pk, term, document_count in rows.values_list('pk', 'term', 'document_count')
+    }
+    if matches or len(token) < 3:
+        return _weighted(matches)
+
+    # تطبیق تقریبی روی واژگان با شباهت سه‌حرفی (مانند pg_trgm)
+    query_trigrams = trigrams(token)
+    candidates = (
+        SearchTermTrigram.objects.filter(trigram__in=query_trigrams, term__document_count__gt=0)
+        .values('term_id', 'term__term', 'term__document_count')
+        .annotate(shared=Count('id'))
+        .order_by('-shared')[:MAX_FUZZY_EXPANSIONS * 5]
+    )
+    scored = []
+    for row in candidates:
+        similarity = row['shared'] / (len(query_trigrams) + len(trigrams(row['term__term'])) - row['shared'])
+        if similarity >= MIN_TRIGRAM_SIMILARITY:
+            scored.append((similarity, row['term_id'], row['term__document_count']))
+    scored.sort(reverse=True)
+    return _weighted({
+        term_id: (0.5 * similarity, document_count)
+        for similarity, term_id, document_count in scored[:MAX_FUZZY_EXPANSIONS]
+    })
+
+
+def resolve_sources(sources):
+    if not sources:
+        return None
+    for source in sources:
+        if source not in SEARCH_SOURCES:
+            raise SearchError(f'منبع نامعتبر: {source}')
+    return list(dict.fromkeys(sources))
+
+
+def search(query, sources=None, limit=20):
+    """جستجوی رتبه‌بندی‌شده در همه منابع؛ سندهایی که همه واژه‌های پرس‌وجو را دارند"""
+    sources = resolve_sources(sources)
+    if not 0 < limit <= MAX_LIMIT:
+        raise SearchError(f'limit باید بین 1 و {MAX_LIMIT} باشد.')
+    tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not tokens:
+        raise SearchError('عبارت جستجو خالی است.')
+
+    matches = [match_terms(token) for token in tokens]
+    if not all(matches):
+        return []
+
+    # اسناد نامزد از کمیاب‌ترین واژه؛ رتبه‌بندی فقط روی همین اسناد انجام می‌شود
+    rarest = min(matches, key=lambda terms: sum(document_count for _, document_count in terms.values()))
+    candidates = SearchPosting.objects.filter(term_id__in=list(rarest))
+    if sources:
+        candidates = candidates.filter(document__source__in=sources)
+    candidates = candidates.order_by('-document_id').values('document_id')[:MAX_CANDIDATES]
+
+    scores = {
+        f'match_{index}': Max(Case(
+            *[When(term_id=term_id, then=Value(weight) * F('weight')) for term_id, (weight, _) in terms.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
+        for index, terms in enumerate(matches)
+    }
+    score = sum((F(name) for name in scores), Value(0.0))
+    rows = list(
+        SearchPosting.objects.filter(
+            document_id__in=candidates,
+            term_id__in=[term_id for terms in matches for term_id in terms],
+        )
+        .values('document_id')
+        .annotate(**scores)
+        .filter(**{f'{name}__gt': 0 for name in scores})
+        .annotate(score=score)
+        .order_by('-score', '-document_id')
+        .values_list('document_id', 'score')[:limit]
+    )
+
+    documents = SearchDocument.objects.in_bulk([document_id for document_id, _ in rows])
+    results = []
+    for document_id, score in rows:
+        document = documents[document_id]
+        _, _, url_name = SEARCH_SOURCES[document.source]
+        results.append({
+            'source': document.source,
+            'id': document.object_id,
+            'title': document.title,
+            'text': document.text,
+            'score': round(score, 4),
+            'url': reverse(url_name, kwargs={'pk': document.object_id}),
+        })
+    return results
@@ -2,7 +2,23 @@ from rest_framework import serializers
 from .models import *
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """تعریف select_related/only برای جلوگیری از کوئری‌های N+1 در لیست‌ها"""
+    select_related_fields = ()
+    related_only_fields = ()
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.related_only_fields:
+            # فقط فیلدهای خود مدل و فیلدهای مرتبطی که سریالایزر می‌خواند بارگذاری می‌شوند
+            own_fields = [field.name for field in queryset.model._meta.concrete_fields]
+            queryset = queryset.only(*own_fields, *cls.related_only_fields)
+        return queryset
+
+
+class AccountSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر حساب‌ها"""
     
     class Meta:
@@ -10,37 +26,46 @@ class AccountSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class OverdueAccountSerializer(serializers.ModelSerializer):
+class OverdueAccountSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر حساب‌های معوقه"""
     account_name = serializers.CharField(source='account.name', read_only=True)
     
+    select_related_fields = ('account',)
+    related_only_fields = ('account__name',)
+    
     class Meta:
         model = OverdueAccount
         fields = '__all__'
 
 
-class DiscrepancySerializer(serializers.ModelSerializer):
+class DiscrepancySerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر مغایرت‌ها"""
     account_name = serializers.CharField(source='account.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
     
+    select_related_fields = ('account', 'created_by')
+    related_only_fields = ('account__name', 'created_by__full_name')
+    
     class Meta:
         model = Discrepancy
         fields = '__all__'
         read_only_fields = ['created_by']
 
 
-class FollowUpSerializer(serializers.ModelSerializer):
+class FollowUpSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر پیگیری‌ها"""
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
     
+    select_related_fields = ('created_by',)
+    related_only_fields = ('created_by__full_name',)
+    
     class Meta:
         model = FollowUp
         fields = '__all__'
         read_only_fields = ['created_by']
 
 
-class PayableCheckSerializer(serializers.ModelSerializer):
+class PayableCheckSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر چک‌های پرداختی"""
     
     class Meta:
@@ -48,7 +73,7 @@ class PayableCheckSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ReceivableCheckSerializer(serializers.ModelSerializer):
+class ReceivableCheckSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر چک‌های دریافتی"""
     
     class Meta:
@@ -56,7 +81,7 @@ class ReceivableCheckSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class OngoingDebtSerializer(serializers.ModelSerializer):
+class OngoingDebtSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """سریالایزر بدهی‌های در جریان"""
     
     class Meta:
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, pre_delete, post_save, post_delete
+
+from .cache import bump_table_version
+from .models import FollowUp
+from .search import RELATED_SOURCES, SOURCE_BY_MODEL, index_instances, index_related, related_fields, remove_objects
+from .summary import SUMMARY_MODELS
+from .totals import TRACKED_MODELS, apply_totals_delta, totals_deferred, totals_delta, tracked_values
+
+
+# جدول‌هایی که نسخه‌شان با هر تغییر افزایش می‌یابد (کش خلاصه و ETag لیست‌ها)
+VERSIONED_MODELS = SUMMARY_MODELS + (FollowUp,)
+# فیلدهای کاربر که در خروجی ویوها دیده می‌شوند یا دسترسی را تعیین می‌کنند
+USER_VERSION_FIELDS = frozenset(['full_name', 'role', 'is_active'])
+
+
+def invalidate_table_version(sender, **kwargs):
+    """پس از ثبت تراکنش، نسخه جدول را افزایش می‌دهد تا کش‌های وابسته باطل شوند"""
+    transaction.on_commit(lambda: bump_table_version(sender))
+
+
+def invalidate_user_table_version(sender, update_fields=None, **kwargs):
+    """نام کاربر در خروجی‌ها و نقش او در دسترسی‌ها اثر دارد؛ ذخیره‌هایی مثل تغییر رمز عبور نسخه را تغییر نمی‌دهند"""
+    if update_fields is not None and not USER_VERSION_FIELDS.intersection(update_fields):
+        return
+    invalidate_table_version(sender)
+
+
+def _locked_values(sender, instance, using):
+    fields, _ = TRACKED_MODELS[sender]
+    # save و delete مدل‌های ردیابی‌شده در تراکنش اجرا می‌شوند (AtomicSaveMixin)؛ قفل تا اعمال تفاوت باقی می‌ماند
+    queryset = sender._default_manager.using(using).select_for_update().filter(pk=instance.pk)
+    return queryset.values(*fields).first()
+
+
+def remember_previous_totals_values(sender, instance, raw=False, using=None, **kwargs):
+    """مقادیر فعلی ردیف را پیش از ذخیره با قفل ردیف برای محاسبه تفاوت جمع‌ها نگه می‌دارد"""
+    instance._totals_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._totals_previous = _locked_values(sender, instance, using)
+
+
+def remember_deleted_totals_values(sender, instance, using=None, **kwargs):
+    """مقادیر فعلی ردیف حذف‌شده؛ نمونه ممکن است پیش از به‌روزرسانی‌های همزمان خوانده شده باشد"""
+    instance._totals_previous = None
+    if not totals_deferred():
+        # در حذف گروهی (deferred_totals) ردیف‌ها پیش از حذف قفل و تازه خوانده شده‌اند
+        instance._totals_previous = _locked_values(sender, instance, using)
+
+
+def update_totals_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """اعمال تفاوت سهم ردیف ذخیره‌شده در جمع‌های مالی"""
+    if raw:
+        return
+    before = getattr(instance, '_totals_previous', None)
+    after = tracked_values(sender, instance)
+    if before is not None and update_fields is not None:
+        # فیلدهایی که ذخیره نشده‌اند همان مقدار فعلی ردیف را دارند، نه مقدار نمونه
+        after = {field: after[field] if field in update_fields else value for field, value in before.items()}
+    apply_totals_delta(totals_delta(sender, before, after))
+
+
+def update_totals_on_delete(sender, instance, **kwargs):
+    """کسر سهم ردیف حذف‌شده از جمع‌های مالی"""
+    before = getattr(instance, '_totals_previous', None) or tracked_values(sender, instance)
+    apply_totals_delta(totals_delta(sender, before=before))
+
+
+def index_search_document(sender, instance, raw=False, **kwargs):
+    """به‌روزرسانی سند جستجوی ردیف ذخیره‌شده"""
+    if raw:
+        return
+    index_instances(sender, [instance])
+
+
+def remove_search_document(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+def remember_previous_search_values(sender, instance, raw=False, using=None, **kwargs):
+    """مقادیر فعلی فیلدهایی از ردیف مرتبط که در سندهای جستجوی دیگر نمایه شده‌اند"""
+    instance._search_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    queryset = sender._default_manager.using(using).filter(pk=instance.pk)
+    instance._search_previous = queryset.values(*related_fields(sender)).first()
+
+
+def reindex_related_documents(sender, instance, raw=False, **kwargs):
+    """نمایه دوباره سندهای وابسته وقتی فیلد نمایه‌شده ردیف مرتبط (مثل نام حساب) تغییر کرده است"""
+    previous = getattr(instance, '_search_previous', None)
+    if raw or previous is None:
+        return
+    if any(getattr(instance, field) != value for field, value in previous.items()):
+        index_related(sender, instance.pk)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(invalidate_table_version, sender=model, dispatch_uid=f'financial-version-save-{model.__name__}')
+    post_delete.connect(invalidate_table_version, sender=model, dispatch_uid=f'financial-version-delete-{model.__name__}')
+
+post_save.connect(invalidate_user_table_version, sender=get_user_model(), dispatch_uid='financial-version-save-user')
+post_delete.connect(invalidate_table_version, sender=get_user_model(), dispatch_uid='financial-version-delete-user')
+
+for model in TRACKED_MODELS:
+    pre_save.connect(remember_previous_totals_values, sender=model, dispatch_uid=f'financial-totals-pre-save-{model.__name__}')
+    post_save.connect(update_totals_on_save, sender=model, dispatch_uid=f'financial-totals-save-{model.__name__}')
+    pre_delete.connect(remember_deleted_totals_values, sender=model, dispatch_uid=f'financial-totals-pre-delete-{model.__name__}')
+    post_delete.connect(update_totals_on_delete, sender=model, dispatch_uid=f'financial-totals-delete-{model.__name__}')
+
+for model in SOURCE_BY_MODEL:
+    post_save.connect(index_search_document, sender=model, dispatch_uid=f'financial-search-save-{model.__name__}')
+    post_delete.connect(remove_search_document, sender=model, dispatch_uid=f'financial-search-delete-{model.__name__}')
+
+for model in RELATED_SOURCES:
+    pre_save.connect(remember_previous_search_values, sender=model, dispatch_uid=f'financial-search-related-pre-save-{model.__name__}')
+    post_save.connect(reindex_related_documents, sender=model, dispatch_uid=f'financial-search-related-save-{model.__name__}')
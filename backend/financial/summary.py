@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+from .cache import get_or_compute, get_table_versions
+from .models import Account, OverdueAccount, Discrepancy, PayableCheck, ReceivableCheck, OngoingDebt
+from .totals import read_totals
+
+
+# مدل‌هایی که خلاصه مالی به آن‌ها وابسته است
+SUMMARY_MODELS = (Account, OverdueAccount, Discrepancy, PayableCheck, ReceivableCheck, OngoingDebt)
+
+SUMMARY_CACHE_KEY_PREFIX = 'financial:summary:'
+
+
+def compute_financial_summary():
+    """محاسبه کامل خلاصه مالی با یک کوئری تجمیعی برای هر جدول
+
+    مسیر خواندن از جدول جمع‌ها استفاده می‌کند؛ این تابع برای بازسازی و
+    بررسی صحت جمع‌ها است.
+    """
+    accounts = Account.objects.aggregate(
+        total_accounts=Count('id'),
+        total_balance=Sum('balance'),
+    )
+    overdue = OverdueAccount.objects.aggregate(
+        overdue_accounts_count=Count('id'),
+        overdue_amount=Sum('overdue_amount'),
+    )
+    discrepancies = Discrepancy.objects.aggregate(
+        pending_discrepancies=Count('id', filter=Q(status='pending')),
+    )
+    payable_checks = PayableCheck.objects.aggregate(
+        payable_checks_count=Count('id', filter=Q(status='issued')),
+    )
+    receivable_checks = ReceivableCheck.objects.aggregate(
+        receivable_checks_count=Count('id', filter=Q(status='received')),
+    )
+    ongoing_debts = OngoingDebt.objects.aggregate(
+        ongoing_debts_count=Count('id', filter=Q(status='pending')),
+        ongoing_debts_amount=Sum('amount', filter=Q(status='pending')),
+    )
+
+    return {
+        'total_accounts': accounts['total_accounts'],
+        'total_balance': accounts['total_balance'] or 0,
+        'overdue_accounts_count': overdue['overdue_accounts_count'],
+        'overdue_amount': overdue['overdue_amount'] or 0,
+        'pending_discrepancies': discrepancies['pending_discrepancies'],
+        'payable_checks_count': payable_checks['payable_checks_count'],
+        'receivable_checks_count': receivable_checks['receivable_checks_count'],
+        'ongoing_debts_count': ongoing_debts['ongoing_debts_count'],
+        'ongoing_debts_amount': ongoing_debts['ongoing_debts_amount'] or 0,
+    }
+
+
+def get_financial_summary():
+    """خلاصه مالی از کش؛ کلید کش از نسخه جداول وابسته ساخته می‌شود
+
+    برخورد به کش هیچ کوئری روی جدول‌های مالی ندارد ولی خود کش (با DatabaseCache
+    پیش‌فرض) دو SELECT روی جدول کش اجرا می‌کند.
+    """
+    versions = get_table_versions(SUMMARY_MODELS)
+    key = SUMMARY_CACHE_KEY_PREFIX + ':'.join(str(version) for version in versions)
+    return get_or_compute(key, read_totals, settings.FINANCIAL_SUMMARY_CACHE_TIMEOUT)
@@ -1,3 +1,1132 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils.http import http_date
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.cache import user_cache
+from authentication.models import User
+from inventory.ledger import find_stock_drift, record_transaction, signed_sum, take_snapshots
+from inventory.models import InventoryTransaction, Product
+from .cache import bump_table_version, get_table_versions
+from .checks import check_shared_cache
+from .fastpath import ValuesListMixin, get_values_plan
+from .forecast import ForecastError, get_cash_flow_forecast
+from .pagination import CreatedAtCursorPagination, OptInCursorPagination
+from .reconciliation import import_statement
+from .models import *
+from .renderers import FastJSONRenderer
+from . import search as search_module
+from .search import SEARCH_SOURCES, normalize, rebuild_search_index, remove_objects, tokenize
+from .serializers import *
+from .sample_data import generate
+from .summary import get_financial_summary
+from .totals import compare_totals, read_totals, rebuild_totals
+from .views import OngoingDebtBulkView
+
+
+class QueryCountAssertionsMixin:
+    """ابزار بررسی ثابت ماندن تعداد کوئری‌ها با افزایش تعداد ردیف‌ها"""
+
+    def count_queries(self, url):
+        """تعداد کوئری‌های داده؛ کوئری‌های جدول DatabaseCache شمرده نمی‌شوند
+
+        درخواست اول نسخه جداول را در کش می‌سازد و اندازه‌گیری نمی‌شود.
+        """
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        cache_table = connection.ops.quote_name(settings.CACHES['default']['LOCATION'])
+        return len([query for query in context.captured_queries if cache_table not in query['sql']])
+
+    def assertQueryCountIndependentOfRows(self, url, create_rows, small=1, large=25):
+        """تعداد کوئری‌های یک صفحه نباید با تعداد ردیف‌ها رشد کند"""
+        create_rows(small)
+        small_count = self.count_queries(url)
+        create_rows(large - small)
+        large_count = self.count_queries(url)
+        self.assertEqual(
+            small_count, large_count,
+            f'{url}: {small_count} queries for {small} rows but {large_count} for {large} rows',
+        )
+
+
+class ConditionalGetAssertionsMixin:
+    """ابزار بررسی پاسخ‌های GET شرطی"""
+
+    def get_etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response['ETag']
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return response
+
+    def assertModified(self, url, etag):
+        """پاسخ کامل با ETag تازه؛ ETag قبلی دیگر 304 نمی‌گیرد"""
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+
+class FinancialQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    """بررسی نبود کوئری‌های N+1 در اندپوینت‌های مالی"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='manager', password='pass', role='management', full_name='مدیر')
+        cls.account = Account.objects.create(name='حساب اصلی', account_number='ACC-0', balance=Decimal('100.00'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.sequence = 0
+
+    def next_number(self):
+        self.sequence += 1
+        return f'N{self.sequence}'
+
+    def create_accounts(self, count):
+        for _ in range(count):
+            Account.objects.create(name='حساب', account_number=self.next_number(), balance=Decimal('10.00'))
+
+    def create_overdue_accounts(self, count):
+        for _ in range(count):
+            account = Account.objects.create(name='حساب', account_number=self.next_number())
+            OverdueAccount.objects.create(account=account, customer_name='مشتری', overdue_amount=Decimal('5.00'), due_date=date.today())
+
+    def create_discrepancies(self, count):
+        for _ in range(count):
+            account = Account.objects.create(name='حساب', account_number=self.next_number())
+            creator = User.objects.create_user(username=self.next_number(), full_name='کاربر')
+            Discrepancy.objects.create(title='مغایرت', description='-', amount=Decimal('1.00'), account=account, created_by=creator)
+
+    def create_follow_ups(self, count):
+        for _ in range(count):
+            creator = User.objects.create_user(username=self.next_number(), full_name='کاربر')
+            FollowUp.objects.create(title='پیگیری', description='-', customer_name='مشتری', follow_up_date=date.today(), created_by=creator)
+
+    def create_payable_checks(self, count):
+        for _ in range(count):
+            PayableCheck.objects.create(check_number=self.next_number(), amount=Decimal('1.00'), payee='گیرنده', due_date=date.today(), bank_name='ملی')
+
+    def create_receivable_checks(self, count):
+        for _ in range(count):
+            ReceivableCheck.objects.create(check_number=self.next_number(), amount=Decimal('1.00'), payer='پرداخت کننده', due_date=date.today(), bank_name='ملی')
+
+    def create_ongoing_debts(self, count):
+        for _ in range(count):
+            OngoingDebt.objects.create(creditor_name='طلبکار', amount=Decimal('1.00'), description='-', due_date=date.today())
+
+    def test_account_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('account-list'), self.create_accounts)
+
+    def test_overdue_account_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('overdue-account-list'), self.create_overdue_accounts)
+
+    def test_discrepancy_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('discrepancy-list'), self.create_discrepancies)
+
+    def test_follow_up_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('followup-list'), self.create_follow_ups)
+
+    def test_payable_check_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('payable-check-list'), self.create_payable_checks)
+
+    def test_receivable_check_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('receivable-check-list'), self.create_receivable_checks)
+
+    def test_ongoing_debt_list(self):
+        self.assertQueryCountIndependentOfRows(reverse('ongoing-debt-list'), self.create_ongoing_debts)
+
+    def test_discrepancy_detail_uses_single_query(self):
+        self.create_discrepancies(1)
+        discrepancy = Discrepancy.objects.get()
+        url = reverse('discrepancy-detail', args=[discrepancy.pk])
+        self.assertEqual(self.count_queries(url), 1)
+
+
+class ValuesListFastPathTests(TestCase):
+    """خروجی مسیر values() باید بایت به بایت با سریالایزر و JSONRenderer یکسان باشد"""
+    
+    list_urls = [
+        'account-list', 'overdue-account-list', 'discrepancy-list', 'followup-list',
+        'payable-check-list', 'receivable-check-list', 'ongoing-debt-list',
+    ]
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='manager', password='pass', role='management', full_name='مدیر "ارشد"')
+        # رشته‌هایی که escape آن‌ها در JSON حساس است
+        text = 'متن \u2028خط\u2029 "نقل" \\ / \t\x1f 😀'
+        amounts = [Decimal('0'), Decimal('-12.5'), Decimal('1234567890123.45')]
+        # بیش از یک صفحه (PAGE_SIZE=20) تا لینک‌های صفحه بعد هم مقایسه شوند
+        for index in range(21):
+            amount = amounts[index % len(amounts)]
+            account = Account.objects.create(name=text, account_number=f'ACC-{index}', balance=amount, is_active=bool(index % 2))
+            OverdueAccount.objects.create(account=account, customer_name=text, overdue_amount=amount, due_date=date(2024, 3, 20), contact_info='')
+            Discrepancy.objects.create(title=text, description='', amount=amount, account=account, created_by=cls.user)
+            FollowUp.objects.create(title=text, description=text, customer_name='مشتری', follow_up_date=date(2024, 1, 1), created_by=cls.user)
+            PayableCheck.objects.create(check_number=f'P{index}', amount=amount, payee=text, due_date=date(2025, 12, 31), bank_name='ملی')
+            ReceivableCheck.objects.create(check_number=f'R{index}', amount=amount, payer=text, due_date=date(2025, 12, 31), bank_name='ملی')
+            OngoingDebt.objects.create(creditor_name=text, amount=amount, description=text, due_date=date(2024, 6, 1))
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def assertSameAsSerializer(self, url):
+        fast = self.client.get(url)
+        with mock.patch.object(ValuesListMixin, 'get_values_plan', return_value=None):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200, fast.content)
+        self.assertIsInstance(fast.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(fast.content, slow.content, url)
+    
+    def test_financial_serializers_have_values_plan(self):
+        serializer_classes = [
+            AccountSerializer, OverdueAccountSerializer, DiscrepancySerializer, FollowUpSerializer,
+            PayableCheckSerializer, ReceivableCheckSerializer, OngoingDebtSerializer,
+        ]
+        for serializer_class in serializer_classes:
+            self.assertIsNotNone(get_values_plan(serializer_class), serializer_class.__name__)
+    
+    def test_list_output_is_byte_identical(self):
+        for name in self.list_urls:
+            url = reverse(name)
+            self.assertSameAsSerializer(url)
+            self.assertSameAsSerializer(f'{url}?page=2')
+            next_url = self.client.get(f'{url}?pagination=cursor&count=1').json()['next']
+            self.assertSameAsSerializer(f'{url}?pagination=cursor&count=1')
+            self.assertSameAsSerializer(next_url)
+    
+    def test_list_output_follows_active_timezone(self):
+        with timezone.override('UTC'):
+            for name in self.list_urls:
+                self.assertSameAsSerializer(reverse(name))
+
+
+class FinancialSummaryCacheTests(TestCase):
+    """باطل شدن کش خلاصه مالی با نسخه جداول پس از ثبت تراکنش"""
+    
+    def create_account(self, number):
+        return Account.objects.create(name='حساب', account_number=number, balance=Decimal('10.00'))
+    
+    def test_summary_is_invalidated_on_commit(self):
+        self.assertEqual(get_financial_summary()['total_accounts'], 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_account('A1')
+            # تا پیش از ثبت تراکنش نسخه تغییر نمی‌کند و خلاصه کش‌شده برمی‌گردد
+            self.assertEqual(get_financial_summary()['total_accounts'], 0)
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        summary = get_financial_summary()
+        self.assertEqual(summary['total_accounts'], 1)
+        self.assertEqual(summary['total_balance'], Decimal('10.00'))
+    
+    def test_cache_hit_reads_only_the_cache_table(self):
+        get_financial_summary()
+        with CaptureQueriesContext(connection) as context:
+            get_financial_summary()
+        cache_table = connection.ops.quote_name(settings.CACHES['default']['LOCATION'])
+        # با DatabaseCache نسخه جداول و خلاصه هر کدام یک SELECT روی جدول کش هستند
+        self.assertEqual([query['sql'].split()[0] for query in context.captured_queries], ['SELECT', 'SELECT'])
+        self.assertTrue(all(cache_table in query['sql'] for query in context.captured_queries))
+    
+    def test_rolled_back_write_keeps_version(self):
+        versions = get_table_versions([Account])
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_account('A1')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(get_table_versions([Account]), versions)
+    
+    def test_bump_always_sets_new_version(self):
+        seen = set(get_table_versions([Account]))
+        for _ in range(5):
+            bump_table_version(Account)
+            seen.update(get_table_versions([Account]))
+        self.assertEqual(len(seen), 6)
+    
+    def test_process_local_cache_is_rejected(self):
+        self.assertEqual(check_shared_cache(None), [])
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['financial.E001'])
+            with override_settings(CACHE_SINGLE_PROCESS=True):
+                self.assertEqual(check_shared_cache(None), [])
+
+
+class FinancialTotalsTests(TestCase):
+    """جمع‌های افزایشی پس از هر نوع تغییر باید با محاسبه کامل یکسان بمانند"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='accountant', password='pass', role='accounting')
+        cls.account = Account.objects.create(name='حساب', account_number='ACC-1', balance=Decimal('100.00'))
+    
+    def setUp(self):
+        rebuild_totals()
+    
+    def assertTotalsConsistent(self):
+        self.assertEqual(compare_totals(), {})
+    
+    def test_create_update_and_delete(self):
+        debt = OngoingDebt.objects.create(creditor_name='طلبکار', amount=Decimal('40.00'), description='-', due_date=date.today())
+        self.assertTotalsConsistent()
+        self.assertEqual(read_totals()['ongoing_debts_amount'], Decimal('40.00'))
+        
+        debt.amount = Decimal('55.50')
+        debt.save()
+        self.assertTotalsConsistent()
+        
+        self.account.balance = Decimal('-20.00')
+        self.account.save()
+        self.assertTotalsConsistent()
+        
+        debt.delete()
+        self.assertTotalsConsistent()
+        self.assertEqual(read_totals()['ongoing_debts_count'], 0)
+    
+    def test_status_changes(self):
+        check = PayableCheck.objects.create(check_number='P1', amount=Decimal('1.00'), payee='گیرنده', due_date=date.today(), bank_name='ملی')
+        discrepancy = Discrepancy.objects.create(title='مغایرت', description='-', amount=Decimal('1.00'), account=self.account, created_by=self.user)
+        debt = OngoingDebt.objects.create(creditor_name='طلبکار', amount=Decimal('9.00'), description='-', due_date=date.today())
+        for instance, statuses in [
+            (check, ['paid', 'returned', 'issued']),
+            (discrepancy, ['resolved', 'pending', 'rejected']),
+            (debt, ['partial_paid', 'pending', 'paid']),
+        ]:
+            for value in statuses:
+                instance.status = value
+                instance.save()
+                self.assertTotalsConsistent()
+    
+    def test_stale_instances_do_not_drift(self):
+        debt = OngoingDebt.objects.create(creditor_name='طلبکار', amount=Decimal('10.00'), description='-', due_date=date.today())
+        stale = OngoingDebt.objects.get(pk=debt.pk)
+        debt.status = 'paid'
+        debt.save()
+        
+        # نمونه کهنه هنوز وضعیت pending دارد؛ تفاوت باید از مقدار فعلی ردیف حساب شود
+        stale.amount = Decimal('70.00')
+        stale.save(update_fields=['amount'])
+        self.assertTotalsConsistent()
+        
+        stale = OngoingDebt.objects.get(pk=debt.pk)
+        OngoingDebt.objects.filter(pk=debt.pk).update(status='pending')
+        rebuild_totals()
+        stale.delete()
+        self.assertTotalsConsistent()
+    
+    def test_cascade_delete(self):
+        account = Account.objects.create(name='حساب دوم', account_number='ACC-2', balance=Decimal('5.00'))
+        OverdueAccount.objects.create(account=account, customer_name='مشتری', overdue_amount=Decimal('3.00'), due_date=date.today())
+        Discrepancy.objects.create(title='مغایرت', description='-', amount=Decimal('1.00'), account=account, created_by=self.user)
+        account.delete()
+        self.assertTotalsConsistent()
+    
+    def test_bulk_delete(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        checks = [
+            PayableCheck.objects.create(check_number=f'P{index}', amount=Decimal('1.00'), payee='گیرنده', due_date=date.today(), bank_name='ملی')
+            for index in range(3)
+        ]
+        response = client.delete(reverse('payable-check-bulk'), {'ids': [check.pk for check in checks]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTotalsConsistent()
+
+
+class BulkOperationsTests(TestCase):
+    """ایجاد، ویرایش و حذف گروهی در یک تراکنش"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='bulk', password='pass', role='accounting')
+    
+    def setUp(self):
+        rebuild_totals()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('ongoing-debt-bulk')
+    
+    def debt_row(self, amount, **fields):
+        return {'creditor_name': 'طلبکار', 'amount': amount, 'description': '-', 'due_date': date.today().isoformat(), **fields}
+    
+    def create_debts(self, *amounts):
+        return [
+            OngoingDebt.objects.create(creditor_name='طلبکار', amount=Decimal(amount), description='-', due_date=date.today())
+            for amount in amounts
+        ]
+    
+    def test_create(self):
+        versions = get_table_versions([OngoingDebt])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, [self.debt_row('10.00'), self.debt_row('2.50')], format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual([row['amount'] for row in response.data], ['10.00', '2.50'])
+        self.assertEqual(OngoingDebt.objects.count(), 2)
+        self.assertEqual(compare_totals(), {})
+        self.assertNotEqual(get_table_versions([OngoingDebt]), versions)
+    
+    def test_invalid_row_creates_nothing(self):
+        response = self.client.post(self.url, [self.debt_row('10.00'), self.debt_row('x')], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('amount', response.data['errors'][1])
+        self.assertFalse(OngoingDebt.objects.exists())
+    
+    def test_payload_shape_and_size(self):
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'amount': '1'}, format='json').status_code, 400)
+        with mock.patch.object(OngoingDebtBulkView, 'max_batch_size', 1):
+            response = self.client.post(self.url, [self.debt_row('1.00'), self.debt_row('2.00')], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(OngoingDebt.objects.exists())
+    
+    def test_update(self):
+        first, second = self.create_debts('10.00', '20.00')
+        response = self.client.patch(self.url, [
+            {'id': second.pk, 'amount': '25.00'},
+            {'id': first.pk, 'status': 'paid'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row['id'] for row in response.data], [second.pk, first.pk])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.amount), ('paid', Decimal('25.00')))
+        self.assertEqual(compare_totals(), {})
+    
+    def test_update_errors_roll_back(self):
+        debt, = self.create_debts('10.00')
+        response = self.client.patch(self.url, [
+            {'id': debt.pk, 'amount': '99.00'},
+            {'id': debt.pk + 1000, 'amount': '1.00'},
+            {'amount': '1.00'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('id', response.data['errors'][1])
+        self.assertIn('id', response.data['errors'][2])
+        debt.refresh_from_db()
+        self.assertEqual(debt.amount, Decimal('10.00'))
+        self.assertEqual(compare_totals(), {})
+    
+    def test_duplicate_ids_are_rejected(self):
+        debt, = self.create_debts('10.00')
+        response = self.client.patch(self.url, [
+            {'id': debt.pk, 'amount': '20.00'},
+            {'id': debt.pk, 'amount': '30.00'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('id', response.data['errors'][1])
+        debt.refresh_from_db()
+        self.assertEqual(debt.amount, Decimal('10.00'))
+    
+    def test_delete_reports_missing_ids(self):
+        first, second = self.create_debts('10.00', '20.00')
+        response = self.client.delete(self.url, {'ids': [first.pk, 9999]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data, {'deleted': 1, 'not_found': [9999]})
+        self.assertEqual(list(OngoingDebt.objects.values_list('pk', flat=True)), [second.pk])
+        self.assertEqual(compare_totals(), {})
+        
+        self.assertEqual(self.client.delete(self.url, {'ids': ['1']}, format='json').status_code, 400)
+
+
+class StatementReconciliationTests(TestCase):
+    """تطبیق صورتحساب بانکی با چک‌ها"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reconciler', password='pass', role='accounting')
+        cls.account = Account.objects.create(name='حساب بانکی', account_number='BANK-1')
+    
+    def setUp(self):
+        rebuild_totals()
+        self.payable = PayableCheck.objects.create(
+            check_number='۱۲۳۴۵', amount=Decimal('500.00'), payee='گیرنده', due_date=date(2025, 3, 10), bank_name='ملی',
+        )
+        self.receivable = ReceivableCheck.objects.create(
+            check_number='R-9', amount=Decimal('80.00'), payer='پرداخت کننده', due_date=date(2025, 3, 12), bank_name='ملت',
+        )
+    
+    def import_csv(self, text, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_statement(io.BytesIO(text.encode('utf-8')), self.account, self.user, **kwargs)
+    
+    def test_matches_and_discrepancies(self):
+        result = self.import_csv(
+            'تاریخ,مبلغ,شماره چک,شرح\n'
+            '2025-03-11,-500,12345,چک پرداختی\n'
+            '2025/03/14,80,,واریز\n'
+            '۲۰۲۵-۰۳-۱۵,"-1,200",,کارمزد\n'
+        )
+        self.assertEqual(
+            {key: result[key] for key in ('lines', 'matched_payable_checks', 'matched_receivable_checks', 'discrepancies_created')},
+            {'lines': 3, 'matched_payable_checks': 1, 'matched_receivable_checks': 1, 'discrepancies_created': 1},
+        )
+        self.assertEqual(Discrepancy.objects.get().amount, Decimal('1200'))
+        self.assertEqual(compare_totals(), {})
+        self.payable.refresh_from_db()
+        self.assertIsNotNone(self.payable.reconciled_at)
+        self.assertEqual(self.payable.status, 'paid')
+        self.receivable.refresh_from_db()
+        self.assertEqual(self.receivable.status, 'deposited')
+    
+    def test_returned_checks_are_not_matched(self):
+        PayableCheck.objects.filter(pk=self.payable.pk).update(status='returned')
+        self.receivable.status = 'deposited'
+        self.receivable.save()
+        rebuild_totals()
+        result = self.import_csv('date,amount,check_number\n2025-03-10,-500,12345\n2025-03-12,80,R-9\n')
+        self.assertEqual(
+            (result['matched_payable_checks'], result['matched_receivable_checks'], result['discrepancies_created']), (0, 1, 1),
+        )
+        self.payable.refresh_from_db()
+        self.assertEqual((self.payable.status, self.payable.reconciled_at), ('returned', None))
+        self.assertEqual(compare_totals(), {})
+    
+    def test_over_precise_amounts_are_rounded(self):
+        result = self.import_csv('date,amount\n2025-03-10,-500.001\n2025-03-20,-7.456\n')
+        self.assertEqual((result['matched_payable_checks'], result['discrepancies_created']), (1, 1))
+        self.assertEqual(Discrepancy.objects.get().amount, Decimal('7.46'))
+    
+    def test_reimport_does_not_match_again(self):
+        statement = 'date,amount,check_number\n2025-03-10,-500,12345\n'
+        self.assertEqual(self.import_csv(statement)['matched_payable_checks'], 1)
+        result = self.import_csv(statement)
+        self.assertEqual((result['matched_payable_checks'], result['discrepancies_created']), (0, 1))
+    
+    def test_matches_across_batches_use_each_check_once(self):
+        lines = ''.join(f'2025-03-{day},-500,\n' for day in (8, 9, 10, 11, 12))
+        with mock.patch('financial.reconciliation.STATEMENT_BATCH_SIZE', 2):
+            result = self.import_csv('date,amount,check_number\n' + lines)
+        self.assertEqual((result['lines'], result['matched_payable_checks'], result['discrepancies_created']), (5, 1, 4))
+        self.assertEqual(compare_totals(), {})
+    
+    def test_ofx_check_numbers_with_arabic_digits(self):
+        statement = (
+            '<OFX><BANKTRANLIST><STMTTRN><TRNTYPE>CHECK<DTPOSTED>20250310120000[-5:EST]'
+            '<TRNAMT>-500.00<CHECKNUM>١٢٣٤٥<MEMO>چک</STMTTRN></BANKTRANLIST></OFX>'
+        )
+        result = self.import_csv(statement, statement_format='ofx')
+        self.assertEqual(result['matched_payable_checks'], 1)
+    
+    def test_bad_rows_are_reported(self):
+        result = self.import_csv(
+            'date,amount\n'
+            '2025-03-10,abc\n'
+            '2025-03-10,"' + 'x' * 200000 + '"\n'
+            '0001-01-01,-5\n'
+        )
+        self.assertEqual(result['error_count'], 2)
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3])
+        self.assertIn('field limit', result['errors'][1]['error'])
+        self.assertEqual((result['lines'], result['discrepancies_created']), (1, 1))
+    
+    def test_view_validates_tolerance(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('account-import-statement', kwargs={'pk': self.account.pk})
+        for tolerance in ('x', '-1', '1000000000'):
+            upload = SimpleUploadedFile('statement.csv', b'date,amount\n2025-03-10,-500\n')
+            response = client.post(url, {'file': upload, 'date_tolerance': tolerance})
+            self.assertEqual(response.status_code, 400, tolerance)
+        
+        upload = SimpleUploadedFile('statement.csv', b'date,amount\n2025-03-10,-500\n')
+        response = client.post(url, {'file': upload, 'date_tolerance': '0'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['matched_payable_checks'], 1)
+    
+    def test_non_finite_amounts_are_row_errors(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('account-import-statement', kwargs={'pk': self.account.pk})
+        upload = SimpleUploadedFile(
+            'statement.csv', b'date,amount\n2025-03-10,NaN\n2025-03-10,sNaN\n2025-03-10,-Infinity\n2025-03-10,1e20\n2025-03-12,80\n',
+        )
+        response = client.post(url, {'file': upload})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 3, 4, 5])
+        self.assertEqual((response.data['lines'], response.data['matched_receivable_checks']), (1, 1))
+        self.assertFalse(Discrepancy.objects.exists())
+
+
+class AgingReportTests(TestCase):
+    """بازه‌های گزارش سن بدهی و مرزهای آن"""
+    
+    as_of = date(2025, 6, 30)
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='aging', password='pass', role='accounting')
+        cls.account = Account.objects.create(name='حساب', account_number='AGE-1')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_overdue(self, days_past_due, amount='10.00', customer_name='مشتری'):
+        return OverdueAccount.objects.create(
+            account=self.account, customer_name=customer_name, overdue_amount=Decimal(amount),
+            due_date=self.as_of - timezone.timedelta(days=days_past_due),
+        )
+    
+    def report(self, **params):
+        response = self.client.get(reverse('aging-report'), {'as_of': self.as_of.isoformat(), **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+    
+    def test_bucket_boundaries(self):
+        for days in (-1, 0, 30, 31, 60, 61, 90, 91, 400):
+            self.create_overdue(days)
+        buckets = self.report(sources='overdue_accounts')['reports']['overdue_accounts']['buckets']
+        self.assertEqual({name: value['count'] for name, value in buckets.items()}, {
+            'current': 1, '0-30': 2, '31-60': 2, '61-90': 2, '90+': 2,
+        })
+        self.assertEqual(buckets['90+']['amount'], '20.00')
+    
+    def test_only_open_checks_are_counted(self):
+        for status_value in ('received', 'deposited', 'returned'):
+            ReceivableCheck.objects.create(
+                check_number=status_value, amount=Decimal('5.00'), payer='پرداخت کننده',
+                due_date=self.as_of, bank_name='ملی', status=status_value,
+            )
+        report = self.report(sources='receivable_checks')['reports']['receivable_checks']
+        self.assertEqual(report['total'], {'count': 1, 'amount': '5.00'})
+    
+    def test_group_by_party(self):
+        self.create_overdue(10, '5.00', customer_name='الف')
+        self.create_overdue(70, '50.00', customer_name='ب')
+        self.create_overdue(75, '1.00', customer_name='الف')
+        groups = self.report(sources='overdue_accounts', group_by='party')['reports']['overdue_accounts']['groups']
+        self.assertEqual([(group['key'], group['total_amount']) for group in groups], [('ب', '50.00'), ('الف', '6.00')])
+        self.assertEqual(groups[1]['buckets']['61-90'], {'count': 1, 'amount': '1.00'})
+    
+    def test_new_rows_invalidate_cached_report(self):
+        self.assertEqual(self.report()['reports']['overdue_accounts']['total']['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_overdue(5)
+        self.assertEqual(self.report()['reports']['overdue_accounts']['total']['count'], 1)
+    
+    def test_renamed_account_relabels_cached_report(self):
+        self.create_overdue(5)
+        groups = self.report(sources='overdue_accounts', group_by='account')['reports']['overdue_accounts']['groups']
+        self.assertEqual([group['label'] for group in groups], ['حساب'])
+        account = Account.objects.get(pk=self.account.pk)
+        account.name = 'حساب جاری'
+        with self.captureOnCommitCallbacks(execute=True):
+            account.save()
+        groups = self.report(sources='overdue_accounts', group_by='account')['reports']['overdue_accounts']['groups']
+        self.assertEqual([group['label'] for group in groups], ['حساب جاری'])
+    
+    def test_invalid_parameters(self):
+        for params in (
+            {'as_of': '0001-01-01'},
+            {'as_of': '9999-12-31'},
+            {'as_of': '2025-13-01'},
+            {'group_by': 'nothing'},
+            {'sources': 'payable_checks', 'group_by': 'account'},
+        ):
+            response = self.client.get(reverse('aging-report'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class CashFlowForecastTests(TestCase):
+    """دوره‌بندی پیش‌بینی جریان نقدی"""
+    
+    start = date(2025, 1, 1)
+    
+    @classmethod
+    def setUpTestData(cls):
+        Account.objects.create(name='حساب', account_number='CF-1', balance=Decimal('1000.00'))
+    
+    def setUp(self):
+        rebuild_totals()
+    
+    def days(self, count):
+        return self.start + timezone.timedelta(days=count)
+    
+    def receivable(self, due_date, amount, status_value='received'):
+        ReceivableCheck.objects.create(
+            check_number='R', amount=Decimal(amount), payer='پرداخت کننده', due_date=due_date, bank_name='ملی', status=status_value,
+        )
+    
+    def payable(self, due_date, amount):
+        PayableCheck.objects.create(check_number='P', amount=Decimal(amount), payee='گیرنده', due_date=due_date, bank_name='ملی')
+    
+    def test_daily_periods_and_balance(self):
+        self.receivable(self.days(1), '100.00')
+        self.payable(self.days(1), '30.50')
+        self.payable(self.days(3), '2000.00')
+        OngoingDebt.objects.create(creditor_name='طلبکار', amount=Decimal('5.00'), description='-', due_date=self.days(2))
+        forecast = get_cash_flow_forecast(self.start, 3, 'day')
+        
+        self.assertEqual(len(forecast['periods']), 4)
+        self.assertEqual(forecast['opening_balance'], '1000.00')
+        self.assertEqual(forecast['periods'][1]['net'], '69.50')
+        self.assertEqual([period['balance'] for period in forecast['periods']], ['1000.00', '1069.50', '1064.50', '-935.50'])
+        self.assertEqual(forecast['lowest_balance'], {'period_start': '2025-01-04', 'balance': '-935.50'})
+    
+    def test_weekly_buckets(self):
+        for offset, amount in ((0, '1.00'), (6, '2.00'), (7, '4.00'), (13, '8.00'), (14, '16.00'), (15, '32.00')):
+            self.receivable(self.days(offset), amount)
+        forecast = get_cash_flow_forecast(self.start, 14, 'week')
+        
+        self.assertEqual([period['period_start'] for period in forecast['periods']], ['2025-01-01', '2025-01-08', '2025-01-15'])
+        # روز پانزدهم بعد از پایان افق است
+        self.assertEqual([period['receivable_checks'] for period in forecast['periods']], ['3.00', '12.00', '16.00'])
+    
+    def test_overdue_items_fall_on_the_first_day(self):
+        self.receivable(self.days(-40), '7.00')
+        self.receivable(self.days(-1), '3.00')
+        self.receivable(self.days(-5), '100.00', status_value='deposited')
+        self.payable(self.days(-2), '1.00')
+        forecast = get_cash_flow_forecast(self.start, 7, 'week')
+        
+        self.assertEqual(forecast['periods'][0]['receivable_checks'], '10.00')
+        self.assertEqual(forecast['periods'][0]['payable_checks'], '-1.00')
+        self.assertEqual(forecast['closing_balance'], '1009.00')
+    
+    def test_invalid_parameters(self):
+        for horizon, granularity in ((0, 'day'), (731, 'day'), (30, 'month')):
+            with self.assertRaises(ForecastError):
+                get_cash_flow_forecast(self.start, horizon, granularity)
+
+
+class SampleDataTests(TestCase):
+    """داده مقیاس‌پذیر باید تکرارپذیر و با دفتر موجودی سازگار باشد"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='loader', password='pass', role='management')
+    
+    def generate(self, seed=7):
+        generate(20, seed=seed, users=[self.user], log=lambda message: None)
+    
+    def fingerprint(self):
+        return sorted(
+            list(OverdueAccount.objects.values_list('customer_name', 'account__account_number', 'overdue_amount'))
+            + list(Discrepancy.objects.values_list('title', 'account__account_number', 'status'))
+            + list(InventoryTransaction.objects.values_list('reference_number', 'product__code', 'quantity'))
+        )
+    
+    def test_stock_matches_ledger(self):
+        self.generate()
+        mismatched = Product.objects.annotate(expected=signed_sum(InventoryTransaction.objects.all())).exclude(quantity=F('expected'))
+        self.assertFalse(mismatched.exists())
+        
+        take_snapshots()
+        product = Product.objects.order_by('code').first()
+        record_transaction(product, 'in', 5, Decimal('1.00'), self.user)
+        self.assertEqual(find_stock_drift(), [])
+    
+    def test_same_seed_gives_same_data(self):
+        self.generate()
+        first = self.fingerprint()
+        for model in (InventoryTransaction, Product, OverdueAccount, Discrepancy, Account):
+            model.objects.all().delete()
+        # بار دوم شناسه‌ها متفاوت‌اند؛ ارجاع‌ها بر اساس شماره حساب و کد کالا یکسان می‌مانند
+        self.generate()
+        self.assertEqual(self.fingerprint(), first)
+
+
+class FinancialExportTests(TestCase):
+    """خروجی جریانی CSV و XLSX"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='exporter', password='pass', role='accounting')
+        Account.objects.create(name='حساب "اصلی", تهران', account_number='ACC-1', balance=Decimal('1250.50'))
+        Account.objects.create(name='حساب بسته', account_number='ACC-2', is_active=False)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def export(self, export_format, **params):
+        response = self.client.get(reverse('account-export', kwargs={'export_format': export_format}), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+    
+    def test_csv_rows_and_filters(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="account-', response['Content-Disposition'])
+        
+        text = body.decode('utf-8')
+        self.assertTrue(text.startswith('\ufeff'))
+        rows = list(csv.reader(io.StringIO(text[1:])))
+        self.assertEqual(rows[0], ['ID', 'نام حساب', 'شماره حساب', 'مانده', 'فعال', 'تاریخ ایجاد'])
+        self.assertEqual([row[1:5] for row in rows[1:]], [
+            ['حساب "اصلی", تهران', 'ACC-1', '1250.50', 'True'],
+            ['حساب بسته', 'ACC-2', '0.00', 'False'],
+        ])
+        
+        _, body = self.export('csv', is_active='false')
+        self.assertEqual([row[2] for row in csv.reader(io.StringIO(body.decode('utf-8')[1:]))][1:], ['ACC-2'])
+    
+    def test_xlsx_is_a_valid_workbook(self):
+        response, body = self.export('xlsx')
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(set(archive.namelist()), {
+                '[Content_Types].xml', '_rels/.rels', 'xl/_rels/workbook.xml.rels',
+                'xl/workbook.xml', 'xl/worksheets/sheet1.xml',
+            })
+            workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        self.assertEqual(workbook.find('s:sheets/s:sheet', namespace).get('name'), 'حساب‌ها')
+        rows = [
+            [''.join(cell.itertext()) for cell in row.findall('s:c', namespace)]
+            for row in sheet.findall('s:sheetData/s:row', namespace)
+        ]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][1:5], ['حساب "اصلی", تهران', 'ACC-1', '1250.50', '1'])
+    
+    def test_unknown_format_and_permissions(self):
+        self.assertEqual(self.client.get(reverse('account-export', kwargs={'export_format': 'pdf'})).status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse('account-export', kwargs={'export_format': 'csv'})).status_code, 401)
+
+
+class BenchmarkEndpointsCommandTests(TransactionTestCase):
+    """اجرای کامل benchmark_endpoints در مقیاس کوچک؛ همه مسیرها باید پاسخ 2xx بدهند"""
+    
+    def setUp(self):
+        user_cache.clear()
+        # فرمان خودش محیط تست را راه‌اندازی می‌کند
+        teardown_test_environment()
+        self.addCleanup(setup_test_environment)
+    
+    def test_all_routes_are_measured(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark_endpoints', scales='10', iterations=1, warmup=0, output=output,
+                stdout=io.StringIO(),
+            )
+            with open(output, encoding='utf-8') as results_file:
+                results = json.load(results_file)
+        
+        self.assertEqual(results['failures'], {})
+        routes = results['scales']['10']
+        # مسیرهای بعد از تغییر رمز عبور هم با توکن جدید اندازه‌گیری می‌شوند
+        for name in ('change-password', 'user-list', 'account-export', 'financial-search'):
+            self.assertIn(name, routes)
+        self.assertTrue(routes['account-export']['url'].endswith('/export/csv/'))
+
+
+@mock.patch.object(CreatedAtCursorPagination, 'page_size', 2)
+class CursorPaginationTests(TestCase):
+    """صفحه‌بندی پایدار ردیف‌هایی که زمان ایجاد یکسان دارند"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='pager', password='pass', role='accounting')
+        for index in range(7):
+            Account.objects.create(name=f'حساب {index}', account_number=f'P{index}')
+        tied = timezone.now().replace(microsecond=0)
+        # پنج ردیف هم‌زمان بین دو ردیف با زمان متفاوت
+        Account.objects.filter(account_number__in=['P1', 'P2', 'P3', 'P4', 'P5']).update(created_at=tied)
+        Account.objects.filter(account_number='P0').update(created_at=tied - timezone.timedelta(days=1))
+        Account.objects.filter(account_number='P6').update(created_at=tied + timezone.timedelta(days=1))
+        cls.expected = list(Account.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def walk(self, url, link):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data[link]
+        return ids
+    
+    def test_cursor_returns_every_row_once_in_key_order(self):
+        ids = self.walk(reverse('account-list') + '?pagination=cursor', 'next')
+        self.assertEqual(ids, self.expected)
+    
+    def test_previous_links_walk_back_through_ties(self):
+        url = reverse('account-list') + '?pagination=cursor'
+        while True:
+            response = self.client.get(url)
+            if not response.data['next']:
+                break
+            url = response.data['next']
+        previous = self.walk(response.data['previous'], 'previous')
+        # هر صفحه به ترتیب خودش برمی‌گردد؛ صفحات از آخر به اول خوانده شده‌اند
+        pages = [self.expected[index:index + 2] for index in range(0, len(self.expected), 2)]
+        self.assertEqual(previous, [row for page in reversed(pages[:-1]) for row in page])
+    
+    def test_client_ordering_does_not_change_cursor_key(self):
+        ids = self.walk(reverse('account-list') + '?pagination=cursor&ordering=name', 'next')
+        self.assertEqual(ids, self.expected)
+    
+    @mock.patch('rest_framework.pagination.PageNumberPagination.page_size', 2)
+    def test_page_numbers_use_the_same_order(self):
+        ids = self.walk(reverse('account-list'), 'next')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(self.walk(reverse('account-list') + '?ordering=account_number', 'next'), sorted(
+            self.expected, key=lambda pk: Account.objects.get(pk=pk).account_number,
+        ))
+    
+    def test_page_controls_follow_active_paginator(self):
+        paginator = OptInCursorPagination()
+        self.assertFalse(paginator.display_page_controls)
+        paginator.active_paginator = paginator.cursor_paginator
+        paginator.cursor_paginator.display_page_controls = True
+        self.assertTrue(paginator.display_page_controls)
+
+
+class SearchIndexTests(TestCase):
+    """نمایه جستجو: نرمال‌سازی، تطبیق پیشوندی و تقریبی، رتبه‌بندی و نگهداری نمایه"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='searcher', password='pass', role='accounting')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_debt(self, creditor_name, description='-'):
+        return OngoingDebt.objects.create(creditor_name=creditor_name, amount=Decimal('1.00'), description=description, due_date=date.today())
+    
+    def create_follow_up(self, title, description='-'):
+        return FollowUp.objects.create(
+            title=title, description=description, customer_name='مشتری', follow_up_date=date.today(), created_by=self.user,
+        )
+    
+    def found(self, query, **params):
+        response = self.client.get(reverse('financial-search'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row['source'], row['id']) for row in response.data['results']]
+    
+    def test_normalisation(self):
+        self.assertEqual(normalize('كيك'), 'کیک')
+        self.assertEqual(normalize('می‌شود'), 'میشود')
+        self.assertEqual(normalize('۱۲۳ ١٢٣ ABC'), '123 123 abc')
+        self.assertEqual(tokenize('چک‌های ۱۴۰۲'), ['چکهای', '1402'])
+        
+        debt = self.create_debt('شركت علي', description='قرارداد ١٤٠٢ ضمانت‌نامه')
+        for query in ('شرکت علی', 'شركت', 'قرارداد 1402', '۱۴۰۲', 'ضمانتنامه', 'ضمانت‌نامه'):
+            self.assertEqual(self.found(query), [('ongoing_debt', debt.pk)], query)
+    
+    def test_prefix_and_all_terms(self):
+        tehran = self.create_debt('بانک تهران')
+        tejarat = self.create_debt('بانک تجارت')
+        self.assertEqual(self.found('تهر'), [('ongoing_debt', tehran.pk)])
+        self.assertEqual(set(self.found('بان')), {('ongoing_debt', tehran.pk), ('ongoing_debt', tejarat.pk)})
+        self.assertEqual(self.found('بانک تج'), [('ongoing_debt', tejarat.pk)])
+        self.assertEqual(self.found('بانک ملت'), [])
+    
+    def test_trigram_fallback(self):
+        debt = self.create_debt('خاورمیانه')
+        self.create_debt('پارسیان')
+        # هیچ واژه‌ای با «خاورمیانا» شروع نمی‌شود؛ تطبیق از شباهت سه‌حرفی است
+        self.assertEqual(self.found('خاورمیانا'), [('ongoing_debt', debt.pk)])
+        self.assertEqual(self.found('زمستان'), [])
+        # واژه‌های کوتاه‌تر از سه حرف تطبیق تقریبی ندارند
+        self.assertEqual(self.found('خو'), [])
+    
+    def test_ranking(self):
+        in_description = self.create_follow_up('تماس', description='تسویه حساب')
+        in_title = self.create_follow_up('تسویه حساب')
+        exact = self.create_debt('تسویه')
+        prefix = self.create_debt('تسویه‌نشده')
+        rows = self.found('تسویه')
+        # وزن عنوان دو برابر توضیحات است و تطبیق کامل از پیشوندی جلوتر است
+        self.assertLess(rows.index(('follow_up', in_title.pk)), rows.index(('follow_up', in_description.pk)))
+        self.assertLess(rows.index(('ongoing_debt', exact.pk)), rows.index(('ongoing_debt', prefix.pk)))
+        self.assertEqual(self.found('تسویه', sources='ongoing_debt'), [('ongoing_debt', exact.pk), ('ongoing_debt', prefix.pk)])
+        
+        response = self.client.get(reverse('financial-search'), {'q': 'تسویه', 'limit': 1})
+        self.assertEqual([(row['source'], row['id']) for row in response.data['results']], rows[:1])
+        for params in ({'q': ''}, {'q': 'x', 'limit': 0}, {'q': 'x', 'sources': 'tasks'}):
+            self.assertEqual(self.client.get(reverse('financial-search'), params).status_code, 400)
+    
+    def test_signals_maintain_the_index(self):
+        debt = self.create_debt('سپهر')
+        self.assertEqual(self.found('سپهر'), [('ongoing_debt', debt.pk)])
+        
+        debt.creditor_name = 'آرمان'
+        debt.save()
+        self.assertEqual(self.found('سپهر'), [])
+        self.assertEqual(self.found('آرمان'), [('ongoing_debt', debt.pk)])
+        self.assertEqual(SearchTerm.objects.get(term='سپهر').document_count, 0)
+        
+        debt.delete()
+        self.assertEqual(self.found('آرمان'), [])
+        self.assertFalse(SearchDocument.objects.exists())
+        self.assertFalse(SearchPosting.objects.exists())
+    
+    def test_bulk_paths_maintain_the_index(self):
+        url = reverse('ongoing-debt-bulk')
+        rows = [
+            {'creditor_name': name, 'amount': '1.00', 'description': 'گروهی', 'due_date': date.today().isoformat()}
+            for name in ('نیلوفر', 'نسترن')
+        ]
+        response = self.client.post(url, rows, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        first, second = (row['id'] for row in response.data)
+        self.assertEqual(set(self.found('گروهی')), {('ongoing_debt', first), ('ongoing_debt', second)})
+        
+        response = self.client.patch(url, [{'id': first, 'creditor_name': 'یاسمن'}], format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.found('یاسمن'), [('ongoing_debt', first)])
+        self.assertEqual(self.found('نیلوفر'), [])
+        
+        with mock.patch('financial.search.remove_objects', wraps=remove_objects) as remove:
+            response = self.client.delete(url, {'ids': [first, second]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.found('گروهی'), [])
+        self.assertEqual(SearchTerm.objects.get(term='گروهی').document_count, 0)
+        # حذف گروهی نمایه را یک بار برای همه ردیف‌ها به‌روز می‌کند
+        remove.assert_called_once_with(OngoingDebt, {first, second})
+    
+    def test_account_name_is_indexed_for_discrepancies(self):
+        account = Account.objects.create(name='حساب سپرده', account_number='S1')
+        discrepancy = Discrepancy.objects.create(title='مغایرت', description='-', amount=Decimal('1.00'), account=account, created_by=self.user)
+        self.assertEqual(self.found('سپرده'), [('discrepancy', discrepancy.pk)])
+        
+        account.name = 'حساب قرض‌الحسنه'
+        account.save()
+        self.assertEqual(self.found('سپرده'), [])
+        self.assertEqual(self.found('قرضالحسنه'), [('discrepancy', discrepancy.pk)])
+        with mock.patch('financial.signals.index_related') as index_related:
+            account.balance = Decimal('5.00')
+            account.save()
+        index_related.assert_not_called()
+    
+    def test_concurrently_created_document_does_not_fail_the_save(self):
+        debt = self.create_debt('همزمان')
+        locked_documents = search_module._locked_documents
+        calls = []
+        
+        def stale_read(source, object_ids):
+            # نمایه‌سازی دیگری سند را بین خواندن و درج این نمایه‌سازی ساخته است
+            calls.append(object_ids)
+            return {} if len(calls) == 1 else locked_documents(source, object_ids)
+        
+        debt.creditor_name = 'همزمان دوم'
+        with mock.patch('financial.search._locked_documents', side_effect=stale_read):
+            debt.save()
+        self.assertEqual(SearchDocument.objects.filter(source='ongoing_debt', object_id=debt.pk).count(), 1)
+        self.assertEqual(self.found('دوم'), [('ongoing_debt', debt.pk)])
+        self.assertEqual(SearchTerm.objects.get(term='همزمان').document_count, 1)
+    
+    def test_rebuild_matches_incremental_index(self):
+        for name in ('مهرگان', 'مهرآیین', 'کیان'):
+            self.create_debt(name, description='مهر')
+        self.create_follow_up('پیگیری مهرگان')
+        before = self.found('مهر')
+        self.assertEqual(len(before), 4)
+        SearchPosting.objects.all().delete()
+        self.assertEqual(rebuild_search_index(), {**dict.fromkeys(SEARCH_SOURCES, 0), 'follow_up': 1, 'ongoing_debt': 3})
+        self.assertEqual(set(self.found('مهر')), set(before))
+
+
+class ConditionalGetTests(ConditionalGetAssertionsMixin, TestCase):
+    """پاسخ 304 برای داده تغییرنکرده و Last-Modified با دقت ثانیه"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='conditional', password='pass', role='accounting')
+        cls.other = User.objects.create_user(username='conditional2', password='pass', role='accounting')
+        cls.account = Account.objects.create(name='حساب', account_number='E1', balance=Decimal('1.00'))
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def test_unchanged_response_is_not_modified(self):
+        for url in (reverse('account-list'), reverse('account-detail', args=[self.account.pk])):
+            etag = self.get_etag(url)
+            response = self.assertNotModified(url, etag)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['Cache-Control'], 'private, no-cache')
+            self.assertModified(url + '?ordering=name', etag)
+        
+        # ETag هر کاربر جداست
+        url = reverse('account-list')
+        etag = self.get_etag(url)
+        self.client.force_authenticate(self.other)
+        self.assertModified(url, etag)
+    
+    def test_writes_change_the_etag(self):
+        url = reverse('account-detail', args=[self.account.pk])
+        etag = self.get_etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.patch(url, {'name': 'حساب جدید'}, format='json').status_code, 200)
+        self.assertEqual(self.assertModified(url, etag).data['name'], 'حساب جدید')
+        
+        list_url = reverse('ongoing-debt-list')
+        etag = self.get_etag(list_url)
+        row = {'creditor_name': 'طلبکار', 'amount': '1.00', 'description': '-', 'due_date': date.today().isoformat()}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('ongoing-debt-bulk'), [row], format='json')
+        self.assertEqual(self.assertModified(list_url, etag).data['count'], 1)
+    
+    def test_missing_object_is_not_hidden_behind_not_modified(self):
+        url = reverse('account-detail', args=[self.account.pk])
+        etag = self.get_etag(url)
+        # حذفی که نسخه جدول را تغییر نمی‌دهد؛ ردیف پیش از مقایسه ETag خوانده می‌شود
+        with mock.patch('financial.signals.bump_table_version'):
+            self.account.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+    
+    def test_last_modified_is_omitted_within_the_same_second(self):
+        url = reverse('account-list')
+        # زمانی بعد از شروع بازه اعتبار ETag تا Last-Modified همان زمان تغییر باشد
+        changed = settings.CONDITIONAL_GET_MAX_AGE * 5_000_000 + 10.25
+        with mock.patch('financial.cache.time.time', return_value=changed):
+            bump_table_version(Account)
+        
+        with mock.patch('financial.conditional.time.time', return_value=changed + 0.5):
+            response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        
+        with mock.patch('financial.conditional.time.time', return_value=changed + 1):
+            response = self.client.get(url)
+            self.assertEqual(response['Last-Modified'], http_date(int(changed)))
+            revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
@@ -0,0 +1,168 @@
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Account, OverdueAccount, Discrepancy, PayableCheck, ReceivableCheck, OngoingDebt, FinancialTotals
+
+
+GLOBAL_SCOPE = 'global'
+
+TOTALS_FIELDS = [
+    'total_accounts',
+    'total_balance',
+    'overdue_accounts_count',
+    'overdue_amount',
+    'pending_discrepancies',
+    'payable_checks_count',
+    'receivable_checks_count',
+    'ongoing_debts_count',
+    'ongoing_debts_amount',
+]
+
+
+def _account_contribution(values):
+    return {'total_accounts': 1, 'total_balance': values['balance']}
+
+
+def _overdue_account_contribution(values):
+    return {'overdue_accounts_count': 1, 'overdue_amount': values['overdue_amount']}
+
+
+def _discrepancy_contribution(values):
+    return {'pending_discrepancies': int(values['status'] == 'pending')}
+
+
+def _payable_check_contribution(values):
+    return {'payable_checks_count': int(values['status'] == 'issued')}
+
+
+def _receivable_check_contribution(values):
+    return {'receivable_checks_count': int(values['status'] == 'received')}
+
+
+def _ongoing_debt_contribution(values):
+    if values['status'] != 'pending':
+        return {}
+    return {'ongoing_debts_count': 1, 'ongoing_debts_amount': values['amount']}
+
+
+# برای هر مدل: فیلدهایی که روی جمع‌ها اثر دارند و سهم یک ردیف در جمع‌ها
+TRACKED_MODELS = {
+    Account: (('balance',), _account_contribution),
+    OverdueAccount: (('overdue_amount',), _overdue_account_contribution),
+    Discrepancy: (('status',), _discrepancy_contribution),
+    PayableCheck: (('status',), _payable_check_contribution),
+    ReceivableCheck: (('status',), _receivable_check_contribution),
+    OngoingDebt: (('status', 'amount'), _ongoing_debt_contribution),
+}
+
+
+def tracked_values(model, obj):
+    """مقادیر فیلدهای اثرگذار یک نمونه یا دیکشنری ردیف"""
+    fields, _ = TRACKED_MODELS[model]
+    get_value = obj.__getitem__ if isinstance(obj, dict) else lambda field: getattr(obj, field)
+    # مقادیر تازه‌ساخته ممکن است هنوز رشته باشند؛ به نوع فیلد تبدیل می‌شوند
+    return {field: model._meta.get_field(field).to_python(get_value(field)) for field in fields}
+
+
+def totals_delta(model, before=None, after=None):
+    """تفاوت سهم یک ردیف در جمع‌ها قبل و بعد از تغییر
+
+    before برای ردیف جدید و after برای ردیف حذف‌شده None است.
+    """
+    _, contribution = TRACKED_MODELS[model]
+    delta = {}
+    if after is not None:
+        for field, value in contribution(after).items():
+            delta[field] = delta.get(field, 0) + value
+    if before is not None:
+        for field, value in contribution(before).items():
+            delta[field] = delta.get(field, 0) - value
+    return {field: value for field, value in delta.items() if value}
+
+
+def merge_deltas(deltas):
+    """جمع چند تفاوت برای اعمال با یک UPDATE"""
+    merged = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] = merged.get(field, 0) + value
+    return {field: value for field, value in merged.items() if value}
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_totals(scope=GLOBAL_SCOPE):
+    """تفاوت‌های داخل بلاک جمع می‌شوند و در پایان با یک UPDATE اعمال می‌شوند
+
+    برای عملیات گروهی که در غیر این صورت به ازای هر ردیف یک UPDATE اجرا می‌کردند.
+    ردیف‌هایی که داخل بلاک حذف می‌شوند دوباره خوانده نمی‌شوند؛ فراخواننده باید
+    پیش از حذف آن‌ها را در همان تراکنش قفل کند (select_for_update).
+    """
+    if totals_deferred():
+        yield
+        return
+    _deferred.deltas = []
+    try:
+        yield
+        deltas = _deferred.deltas
+    finally:
+        _deferred.deltas = None
+    apply_totals_delta(merge_deltas(deltas), scope)
+
+
+def totals_deferred():
+    return getattr(_deferred, 'deltas', None) is not None
+
+
+def apply_totals_delta(delta, scope=GLOBAL_SCOPE):
+    """اعمال اتمیک تفاوت روی ردیف جمع‌ها با عبارت‌های F"""
+    if not delta:
+        return
+    if totals_deferred():
+        _deferred.deltas.append(delta)
+        return
+    updated = FinancialTotals.objects.filter(pk=scope).update(
+        **{field: F(field) + value for field, value in delta.items()}
+    )
+    if not updated:
+        # ردیف هنوز ساخته نشده؛ محاسبه کامل شامل همین تغییر هم هست
+        rebuild_totals(scope)
+
+
+def rebuild_totals(scope=GLOBAL_SCOPE):
+    """بازسازی ردیف جمع‌ها از روی محاسبه کامل"""
+    from .summary import compute_financial_summary
+
+    with transaction.atomic():
+        values = compute_financial_summary()
+        FinancialTotals.objects.update_or_create(scope=scope, defaults=values)
+    return values
+
+
+def read_totals(scope=GLOBAL_SCOPE):
+    """خواندن جمع‌ها با یک جستجوی کلید اصلی"""
+    values = FinancialTotals.objects.filter(pk=scope).values(*TOTALS_FIELDS).first()
+    if values is None:
+        values = rebuild_totals(scope)
+    return values
+
+
+def compare_totals(scope=GLOBAL_SCOPE):
+    """مقایسه جمع‌های ذخیره‌شده با محاسبه کامل؛ فیلدهای ناهمخوان را برمی‌گرداند"""
+    from .summary import compute_financial_summary
+
+    stored = FinancialTotals.objects.filter(pk=scope).values(*TOTALS_FIELDS).first()
+    expected = compute_financial_summary()
+    if stored is None:
+        return {field: (None, expected[field]) for field in TOTALS_FIELDS}
+    return {
+        field: (stored[field], expected[field])
+        for field in TOTALS_FIELDS
+        if Decimal(stored[field]) != Decimal(expected[field])
+    }
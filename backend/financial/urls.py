@@ -5,31 +5,50 @@ urlpatterns = [
     # Account URLs
     path('accounts/', AccountListCreateView.as_view(), name='account-list'),
     path('accounts/<int:pk>/', AccountDetailView.as_view(), name='account-detail'),
+    path('accounts/export/<str:export_format>/', AccountExportView.as_view(), name='account-export'),
+    path('accounts/<int:pk>/import-statement/', AccountStatementImportView.as_view(), name='account-import-statement'),
     
     # Overdue Account URLs
     path('overdue-accounts/', OverdueAccountListCreateView.as_view(), name='overdue-account-list'),
     path('overdue-accounts/<int:pk>/', OverdueAccountDetailView.as_view(), name='overdue-account-detail'),
+    path('overdue-accounts/export/<str:export_format>/', OverdueAccountExportView.as_view(), name='overdue-account-export'),
+    path('overdue-accounts/bulk/', OverdueAccountBulkView.as_view(), name='overdue-account-bulk'),
     
     # Discrepancy URLs
     path('discrepancies/', DiscrepancyListCreateView.as_view(), name='discrepancy-list'),
     path('discrepancies/<int:pk>/', DiscrepancyDetailView.as_view(), name='discrepancy-detail'),
+    path('discrepancies/export/<str:export_format>/', DiscrepancyExportView.as_view(), name='discrepancy-export'),
     
     # Follow Up URLs
     path('follow-ups/', FollowUpListCreateView.as_view(), name='followup-list'),
     path('follow-ups/<int:pk>/', FollowUpDetailView.as_view(), name='followup-detail'),
+    path('follow-ups/export/<str:export_format>/', FollowUpExportView.as_view(), name='followup-export'),
     
     # Payable Check URLs
     path('payable-checks/', PayableCheckListCreateView.as_view(), name='payable-check-list'),
     path('payable-checks/<int:pk>/', PayableCheckDetailView.as_view(), name='payable-check-detail'),
+    path('payable-checks/export/<str:export_format>/', PayableCheckExportView.as_view(), name='payable-check-export'),
+    path('payable-checks/bulk/', PayableCheckBulkView.as_view(), name='payable-check-bulk'),
     
     # Receivable Check URLs
     path('receivable-checks/', ReceivableCheckListCreateView.as_view(), name='receivable-check-list'),
     path('receivable-checks/<int:pk>/', ReceivableCheckDetailView.as_view(), name='receivable-check-detail'),
+    path('receivable-checks/export/<str:export_format>/', ReceivableCheckExportView.as_view(), name='receivable-check-export'),
+    path('receivable-checks/bulk/', ReceivableCheckBulkView.as_view(), name='receivable-check-bulk'),
     
     # Ongoing Debt URLs
     path('ongoing-debts/', OngoingDebtListCreateView.as_view(), name='ongoing-debt-list'),
     path('ongoing-debts/<int:pk>/', OngoingDebtDetailView.as_view(), name='ongoing-debt-detail'),
+    path('ongoing-debts/export/<str:export_format>/', OngoingDebtExportView.as_view(), name='ongoing-debt-export'),
+    path('ongoing-debts/bulk/', OngoingDebtBulkView.as_view(), name='ongoing-debt-bulk'),
     
     # Summary
     path('summary/', financial_summary, name='financial-summary'),
+    
+    # Reports
+    path('reports/aging/', aging_report, name='aging-report'),
+    path('reports/cash-flow/', cash_flow_forecast, name='cash-flow-forecast'),
+    
+    # Search
+    path('search/', financial_search, name='financial-search'),
 ]
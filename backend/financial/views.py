@@ -1,9 +1,28 @@
+from datetime import date
+
 from rest_framework import generics, permissions, status
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.parsers import MultiPartParser
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Sum, Count
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from .cache import bump_table_version
+from .conditional import ConditionalGetMixin
+from .export import EXPORT_FORMATS, export_columns
+from .fastpath import ValuesListMixin
+from .forecast import ForecastError, get_cash_flow_forecast
 from .models import *
+from .pagination import OptInCursorPagination
+from .reconciliation import (
+    DEFAULT_DATE_TOLERANCE, MAX_DATE_TOLERANCE, STATEMENT_PARSERS, StatementFormatError, detect_format, import_statement,
+)
+from .reports import AgingReportError, get_aging_report
+from .search import MAX_LIMIT, SearchError, deferred_search_index, index_instances, search
 from .serializers import *
+from .summary import get_financial_summary
+from .totals import apply_totals_delta, deferred_totals, merge_deltas, totals_delta, tracked_values
 
 
 class IsAccountingOrManagement(permissions.BasePermission):
@@ -13,151 +32,452 @@ class IsAccountingOrManagement(permissions.BasePermission):
         return request.user.is_authenticated and request.user.has_accounting_access
 
 
+class OptimizedQuerysetMixin:
+    """اعمال select_related/only تعریف‌شده در سریالایزر روی کوئری‌ست ویو
+    
+    ویوهایی که کوئری‌ست پایه‌شان به درخواست وابسته است get_base_queryset را
+    بازنویسی می‌کنند.
+    """
+    
+    def get_base_queryset(self):
+        return super().get_queryset()
+    
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(self.get_base_queryset())
+
+
+class BulkOperationsView(OptimizedQuerysetMixin, generics.GenericAPIView):
+    """ویو پایه ایجاد، ویرایش و حذف گروهی در یک تراکنش
+    
+    همه ردیف‌ها در یک مرحله اعتبارسنجی می‌شوند؛ اگر ردیفی خطا داشته باشد هیچ
+    تغییری ذخیره نمی‌شود و خطاها به ترتیب ردیف‌های ورودی برگردانده می‌شوند.
+    """
+    permission_classes = [IsAccountingOrManagement]
+    max_batch_size = 1000
+    
+    def validate_payload(self, rows):
+        if not isinstance(rows, list) or not rows:
+            return 'یک آرایه غیرخالی از ردیف‌ها ارسال کنید.'
+        if len(rows) > self.max_batch_size:
+            return f'حداکثر {self.max_batch_size} ردیف در هر درخواست مجاز است.'
+        return None
+    
+    def record_changes(self, changes):
+        """اعمال تغییرات جمع‌های مالی و باطل کردن کش برای ردیف‌هایی که سیگنال ندارند"""
+        model = self.get_queryset().model
+        apply_totals_delta(merge_deltas(totals_delta(model, before, after) for before, after in changes))
+        transaction.on_commit(lambda: bump_table_version(model))
+    
+    def post(self, request):
+        """ایجاد گروهی ردیف‌ها با bulk_create"""
+        error = self.validate_payload(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        model = self.get_queryset().model
+        objects = [model(**attrs) for attrs in serializer.validated_data]
+        with transaction.atomic():
+            created = model.objects.bulk_create(objects)
+            self.record_changes((None, tracked_values(model, obj)) for obj in created)
+            index_instances(model, created)
+        
+        return Response(self.get_serializer(created, many=True).data, status=status.HTTP_201_CREATED)
+    
+    def patch(self, request):
+        """ویرایش گروهی ردیف‌ها با bulk_update؛ هر ردیف باید شامل id باشد"""
+        error = self.validate_payload(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            ids = [row.get('id') if isinstance(row, dict) and isinstance(row.get('id'), int) else None for row in request.data]
+            instances = self.get_queryset().select_for_update().in_bulk([pk for pk in ids if pk is not None])
+            model = self.get_queryset().model
+            
+            errors = []
+            changes = []
+            updated_fields = set()
+            seen = set()
+            for pk, row in zip(ids, request.data):
+                instance = instances.get(pk)
+                if instance is None:
+                    errors.append({'id': ['ردیفی با این شناسه یافت نشد.']})
+                    continue
+                # دو ردیف برای یک شناسه نتیجه را به ترتیب ورودی وابسته می‌کرد
+                if pk in seen:
+                    errors.append({'id': ['این شناسه بیش از یک بار ارسال شده است.']})
+                    continue
+                seen.add(pk)
+                serializer = self.get_serializer(instance, data=row, partial=True)
+                if not serializer.is_valid():
+                    errors.append(serializer.errors)
+                    continue
+                errors.append({})
+                before = tracked_values(model, instance)
+                for attr, value in serializer.validated_data.items():
+                    setattr(instance, attr, value)
+                    updated_fields.add(attr)
+                changes.append((before, tracked_values(model, instance)))
+            
+            if any(errors):
+                transaction.set_rollback(True)
+                return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+            
+            updated = [instances[pk] for pk in ids]
+            if updated_fields:
+                model.objects.bulk_update(updated, sorted(updated_fields))
+                self.record_changes(changes)
+                index_instances(model, updated)
+        
+        return Response(self.get_serializer(updated, many=True).data, status=status.HTTP_200_OK)
+    
+    def delete(self, request):
+        """حذف گروهی ردیف‌ها با فهرست شناسه‌ها در {"ids": [...]}"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        error = self.validate_payload(ids)
+        if not error and not all(isinstance(pk, int) for pk in ids):
+            error = 'شناسه‌ها باید عدد صحیح باشند.'
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic(), deferred_totals(), deferred_search_index():
+            queryset = self.get_queryset().filter(pk__in=ids)
+            # قفل ردیف‌ها تا مقادیری که حذف از جمع‌ها کم می‌کند همان مقادیر فعلی باشد
+            found = set(queryset.select_for_update().values_list('pk', flat=True))
+            queryset.delete()
+        
+        return Response({
+            'deleted': len(found),
+            'not_found': [pk for pk in ids if pk not in found],
+        }, status=status.HTTP_200_OK)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """خروجی فایل از رندررهای DRF استفاده نمی‌کند؛ هدر Accept کلاینت نادیده گرفته می‌شود"""
+    
+    def select_parser(self, request, parsers):
+        return parsers[0]
+    
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+class FinancialExportView(OptimizedQuerysetMixin, generics.GenericAPIView):
+    """ویو پایه خروجی CSV/XLSX به صورت جریانی
+    
+    فیلترهای filterset_fields روی خروجی هم اعمال می‌شوند تا زیرمجموعه‌ای از
+    داده‌ها قابل دریافت باشد.
+    """
+    permission_classes = [IsAccountingOrManagement]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        stream, content_type = EXPORT_FORMATS[export_format]
+        
+        queryset = self.filter_queryset(self.get_queryset()).order_by('pk')
+        columns = export_columns(self.get_serializer())
+        model_meta = queryset.model._meta
+        if export_format == 'xlsx':
+            content = stream(queryset, columns, sheet_name=str(model_meta.verbose_name_plural))
+        else:
+            content = stream(queryset, columns)
+        
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f'{model_meta.model_name}-{timezone.localdate().isoformat()}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 # Account Views
-class AccountListCreateView(generics.ListCreateAPIView):
+class AccountListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد حساب‌ها"""
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
 
 
-class AccountDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AccountDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات حساب"""
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class AccountExportView(FinancialExportView):
+    """ویو خروجی حساب‌ها"""
+    queryset = Account.objects.all()
+    serializer_class = AccountSerializer
+    filterset_fields = {'is_active': ['exact']}
+
+
+class AccountStatementImportView(generics.GenericAPIView):
+    """ویو بارگذاری صورتحساب بانکی حساب و ثبت خودکار مغایرت‌ها"""
+    queryset = Account.objects.all()
+    permission_classes = [IsAccountingOrManagement]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request, pk):
+        account = self.get_object()
+        statement = request.FILES.get('file')
+        if statement is None:
+            return Response({'error': 'فایل صورتحساب ارسال نشده است.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        statement_format = request.data.get('statement_format') or detect_format(statement.name)
+        if statement_format not in STATEMENT_PARSERS:
+            return Response({'error': 'قالب صورتحساب باید csv یا ofx باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tolerance = int(request.data.get('date_tolerance', DEFAULT_DATE_TOLERANCE))
+        except ValueError:
+            return Response({'error': 'بازه تطبیق تاریخ باید عدد باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= tolerance <= MAX_DATE_TOLERANCE:
+            return Response(
+                {'error': f'بازه تطبیق تاریخ باید بین 0 و {MAX_DATE_TOLERANCE} روز باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        try:
+            result = import_statement(statement.open('rb'), account, request.user, statement_format, tolerance)
+        except (StatementFormatError, UnicodeDecodeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
+
 # Overdue Account Views
-class OverdueAccountListCreateView(generics.ListCreateAPIView):
+class OverdueAccountListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد حساب‌های معوقه"""
     queryset = OverdueAccount.objects.all()
     serializer_class = OverdueAccountSerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
 
 
-class OverdueAccountDetailView(generics.RetrieveUpdateDestroyAPIView):
+class OverdueAccountDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات حساب معوقه"""
     queryset = OverdueAccount.objects.all()
     serializer_class = OverdueAccountSerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class OverdueAccountExportView(FinancialExportView):
+    """ویو خروجی حساب‌های معوقه"""
+    queryset = OverdueAccount.objects.all()
+    serializer_class = OverdueAccountSerializer
+    filterset_fields = {'account': ['exact'], 'due_date': ['gte', 'lte']}
+
+
+class OverdueAccountBulkView(BulkOperationsView):
+    """ویو عملیات گروهی حساب‌های معوقه"""
+    queryset = OverdueAccount.objects.all()
+    serializer_class = OverdueAccountSerializer
+
+
 # Discrepancy Views
-class DiscrepancyListCreateView(generics.ListCreateAPIView):
+class DiscrepancyListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد مغایرت‌ها"""
     queryset = Discrepancy.objects.all()
     serializer_class = DiscrepancySerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class DiscrepancyDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DiscrepancyDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات مغایرت"""
     queryset = Discrepancy.objects.all()
     serializer_class = DiscrepancySerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class DiscrepancyExportView(FinancialExportView):
+    """ویو خروجی مغایرت‌ها"""
+    queryset = Discrepancy.objects.all()
+    serializer_class = DiscrepancySerializer
+    filterset_fields = {'account': ['exact'], 'status': ['exact']}
+
+
 # Follow Up Views
-class FollowUpListCreateView(generics.ListCreateAPIView):
+class FollowUpListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد پیگیری‌ها"""
     queryset = FollowUp.objects.all()
     serializer_class = FollowUpSerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class FollowUpDetailView(generics.RetrieveUpdateDestroyAPIView):
+class FollowUpDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات پیگیری"""
     queryset = FollowUp.objects.all()
     serializer_class = FollowUpSerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class FollowUpExportView(FinancialExportView):
+    """ویو خروجی پیگیری‌ها"""
+    queryset = FollowUp.objects.all()
+    serializer_class = FollowUpSerializer
+    filterset_fields = {'status': ['exact'], 'follow_up_date': ['gte', 'lte']}
+
+
 # Payable Check Views
-class PayableCheckListCreateView(generics.ListCreateAPIView):
+class PayableCheckListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد چک‌های پرداختی"""
     queryset = PayableCheck.objects.all()
     serializer_class = PayableCheckSerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
 
 
-class PayableCheckDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PayableCheckDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات چک پرداختی"""
     queryset = PayableCheck.objects.all()
     serializer_class = PayableCheckSerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class PayableCheckExportView(FinancialExportView):
+    """ویو خروجی چک‌های پرداختی"""
+    queryset = PayableCheck.objects.all()
+    serializer_class = PayableCheckSerializer
+    filterset_fields = {'status': ['exact'], 'bank_name': ['exact'], 'due_date': ['gte', 'lte']}
+
+
+class PayableCheckBulkView(BulkOperationsView):
+    """ویو عملیات گروهی چک‌های پرداختی"""
+    queryset = PayableCheck.objects.all()
+    serializer_class = PayableCheckSerializer
+
+
 # Receivable Check Views
-class ReceivableCheckListCreateView(generics.ListCreateAPIView):
+class ReceivableCheckListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد چک‌های دریافتی"""
     queryset = ReceivableCheck.objects.all()
     serializer_class = ReceivableCheckSerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
 
 
-class ReceivableCheckDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ReceivableCheckDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات چک دریافتی"""
     queryset = ReceivableCheck.objects.all()
     serializer_class = ReceivableCheckSerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class ReceivableCheckExportView(FinancialExportView):
+    """ویو خروجی چک‌های دریافتی"""
+    queryset = ReceivableCheck.objects.all()
+    serializer_class = ReceivableCheckSerializer
+    filterset_fields = {'status': ['exact'], 'bank_name': ['exact'], 'due_date': ['gte', 'lte']}
+
+
+class ReceivableCheckBulkView(BulkOperationsView):
+    """ویو عملیات گروهی چک‌های دریافتی"""
+    queryset = ReceivableCheck.objects.all()
+    serializer_class = ReceivableCheckSerializer
+
+
 # Ongoing Debt Views
-class OngoingDebtListCreateView(generics.ListCreateAPIView):
+class OngoingDebtListCreateView(ConditionalGetMixin, ValuesListMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     """ویو لیست و ایجاد بدهی‌های در جریان"""
     queryset = OngoingDebt.objects.all()
     serializer_class = OngoingDebtSerializer
     permission_classes = [IsAccountingOrManagement]
+    pagination_class = OptInCursorPagination
 
 
-class OngoingDebtDetailView(generics.RetrieveUpdateDestroyAPIView):
+class OngoingDebtDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """ویو جزئیات بدهی در جریان"""
     queryset = OngoingDebt.objects.all()
     serializer_class = OngoingDebtSerializer
     permission_classes = [IsAccountingOrManagement]
 
 
+class OngoingDebtExportView(FinancialExportView):
+    """ویو خروجی بدهی‌های در جریان"""
+    queryset = OngoingDebt.objects.all()
+    serializer_class = OngoingDebtSerializer
+    filterset_fields = {'status': ['exact'], 'due_date': ['gte', 'lte']}
+
+
+class OngoingDebtBulkView(BulkOperationsView):
+    """ویو عملیات گروهی بدهی‌های در جریان"""
+    queryset = OngoingDebt.objects.all()
+    serializer_class = OngoingDebtSerializer
+
+
 @api_view(['GET'])
 @permission_classes([IsAccountingOrManagement])
 def financial_summary(request):
     """ویو خلاصه مالی"""
     try:
-        # محاسبه آمارهای مالی
-        total_accounts = Account.objects.count()
-        total_balance = Account.objects.aggregate(total=Sum('balance'))['total'] or 0
-        
-        overdue_accounts_count = OverdueAccount.objects.count()
-        overdue_amount = OverdueAccount.objects.aggregate(total=Sum('overdue_amount'))['total'] or 0
-        
-        pending_discrepancies = Discrepancy.objects.filter(status='pending').count()
-        
-        payable_checks_count = PayableCheck.objects.filter(status='issued').count()
-        receivable_checks_count = ReceivableCheck.objects.filter(status='received').count()
-        
-        ongoing_debts_count = OngoingDebt.objects.filter(status='pending').count()
-        ongoing_debts_amount = OngoingDebt.objects.filter(status='pending').aggregate(total=Sum('amount'))['total'] or 0
-        
-        data = {
-            'total_accounts': total_accounts,
-            'total_balance': total_balance,
-            'overdue_accounts_count': overdue_accounts_count,
-            'overdue_amount': overdue_amount,
-            'pending_discrepancies': pending_discrepancies,
-            'payable_checks_count': payable_checks_count,
-            'receivable_checks_count': receivable_checks_count,
-            'ongoing_debts_count': ongoing_debts_count,
-            'ongoing_debts_amount': ongoing_debts_amount,
-        }
+        # خلاصه از کش خوانده می‌شود و با تغییر داده‌ها باطل می‌شود
+        data = get_financial_summary()
         
         serializer = FinancialSummarySerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAccountingOrManagement])
+def aging_report(request):
+    """ویو گزارش سن بدهی (۰-۳۰، ۳۱-۶۰، ۶۱-۹۰ و بیش از ۹۰ روز)"""
+    as_of = request.query_params.get('as_of')
+    try:
+        as_of = date.fromisoformat(as_of) if as_of else timezone.localdate()
+    except ValueError:
+        return Response({'error': 'تاریخ مبنا باید به صورت YYYY-MM-DD باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    sources = [source for source in request.query_params.get('sources', '').split(',') if source]
+    try:
+        data = get_aging_report(as_of, request.query_params.get('group_by') or None, sources)
+    except AgingReportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAccountingOrManagement])
+def cash_flow_forecast(request):
+    """ویو پیش‌بینی جریان نقدی روزانه یا هفتگی"""
+    try:
+        horizon = int(request.query_params.get('horizon', 90))
+    except ValueError:
+        return Response({'error': 'افق پیش‌بینی باید عدد باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        data = get_cash_flow_forecast(timezone.localdate(), horizon, request.query_params.get('granularity', 'day'))
+    except ForecastError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAccountingOrManagement])
+def financial_search(request):
+    """ویو جستجوی یکپارچه در حساب‌های معوقه، پیگیری‌ها، چک‌ها، بدهی‌ها و مغایرت‌ها"""
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        return Response({'error': f'limit باید عددی بین 1 و {MAX_LIMIT} باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    sources = [source for source in request.query_params.get('sources', '').split(',') if source]
+    try:
+        results = search(request.query_params.get('q', ''), sources, limit)
+    except SearchError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'count': len(results), 'results': results}, status=status.HTTP_200_OK)
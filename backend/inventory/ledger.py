@@ -0,0 +1,230 @@
+"""دفتر موجودی انبار
+
+موجودی فعلی هر کالا در Product.quantity نگه داشته می‌شود و فقط از طریق این
+ماژول همراه با ثبت تراکنش تغییر می‌کند، بنابراین خواندن موجودی فعلی هیچ‌وقت
+جدول تراکنش‌ها را پیمایش نمی‌کند. تراکنش‌ها فقط اضافه می‌شوند؛ اصلاح موجودی
+با تراکنش تعدیل انجام می‌شود. موجودی در یک زمان گذشته از آخرین تصویر
+موجودی (StockSnapshot) به اضافه تراکنش‌های بعد از آن به دست می‌آید.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from financial.cache import bump_table_version
+from .models import Product, InventoryTransaction, StockSnapshot
+
+
+SNAPSHOT_BATCH_SIZE = 1000
+# تعداد کالا در هر UPDATE گروهی موجودی
+UPDATE_BATCH_SIZE = 500
+
+# اثر علامت‌دار تراکنش روی موجودی؛ تعدیل با علامت خودش ثبت می‌شود
+SIGNED_QUANTITY = Case(
+    When(transaction_type='out', then=-F('quantity')),
+    default=F('quantity'),
+    output_field=IntegerField(),
+)
+
+
+class InsufficientStockError(ValueError):
+    """موجودی کالا برای خروج کافی نیست"""
+
+
+def stock_delta(transaction_type, quantity):
+    """تغییر موجودی ناشی از یک تراکنش"""
+    if transaction_type == 'adjustment':
+        if quantity == 0:
+            raise ValueError('تعداد تعدیل نمی‌تواند صفر باشد.')
+        return quantity
+    if quantity <= 0:
+        raise ValueError('تعداد ورود یا خروج باید مثبت باشد.')
+    return -quantity if transaction_type == 'out' else quantity
+
+
+def _apply_deltas(deltas, allow_negative):
+    """قفل ردیف کالاها به ترتیب شناسه و اعمال همه تغییرات با یک UPDATE
+
+    ترتیب ثابت قفل‌ها از بن‌بست بین نویسنده‌های همزمان جلوگیری می‌کند. شرط
+    کافی بودن موجودی بخشی از WHERE همان UPDATE است، بنابراین حتی بدون قفل
+    ردیف (مثل SQLite) موجودی منفی ثبت نمی‌شود.
+    """
+    locked = dict(
+        Product.objects.select_for_update()
+        .filter(pk__in=deltas)
+        .order_by('pk')
+        .values_list('pk', 'quantity')
+    )
+    missing = set(deltas) - set(locked)
+    if missing:
+        raise Product.DoesNotExist(f'محصول با شناسه {sorted(missing)} یافت نشد.')
+    
+    changed = {product_id: delta for product_id, delta in deltas.items() if delta}
+    product_ids = sorted(changed)
+    for offset in range(0, len(product_ids), UPDATE_BATCH_SIZE):
+        batch = product_ids[offset:offset + UPDATE_BATCH_SIZE]
+        condition = Q()
+        for product_id in batch:
+            if allow_negative or changed[product_id] > 0:
+                condition |= Q(pk=product_id)
+            else:
+                condition |= Q(pk=product_id, quantity__gte=-changed[product_id])
+        updated = Product.objects.filter(condition).update(quantity=F('quantity') + Case(
+            *[When(pk=product_id, then=Value(changed[product_id])) for product_id in batch],
+            output_field=IntegerField(),
+        ))
+        if updated != len(batch):
+            short = [product_id for product_id in batch if locked[product_id] + changed[product_id] < 0]
+            raise InsufficientStockError(
+                'موجودی کافی نیست: ' + '، '.join(
+                    f'محصول {product_id} (موجودی {locked[product_id]}، خروج {-changed[product_id]})' for product_id in short
+                )
+            )
+    if changed:
+        # update() سیگنال ندارد؛ نسخه جدول برای ETag لیست کالاها دستی افزایش می‌یابد
+        transaction.on_commit(lambda: bump_table_version(Product))
+    return {product_id: locked[product_id] + delta for product_id, delta in deltas.items()}
+
+
+def record_transaction(product, transaction_type, quantity, unit_price, created_by,
+                       description='', reference_number='', allow_negative=False):
+    """ثبت یک تراکنش انبار و به‌روزرسانی اتمیک موجودی کالا"""
+    delta = stock_delta(transaction_type, quantity)
+    with transaction.atomic():
+        balances = _apply_deltas({product.pk: delta}, allow_negative)
+        inventory_transaction = InventoryTransaction.objects.create(
+            product=product,
+            transaction_type=transaction_type,
+            quantity=quantity,
+            unit_price=unit_price,
+            description=description,
+            reference_number=reference_number,
+            created_by=created_by,
+        )
+    product.quantity = balances[product.pk]
+    return inventory_transaction
+
+
+def record_transactions(transactions, allow_negative=False):
+    """ثبت گروهی تراکنش‌های ساخته‌نشده (InventoryTransaction) در یک تراکنش پایگاه داده
+
+    برای هر کالا فقط یک UPDATE اجرا می‌شود و تراکنش‌ها با bulk_create ذخیره
+    می‌شوند. موجودی جدید کالاها برگردانده می‌شود.
+    """
+    deltas = {}
+    for inventory_transaction in transactions:
+        delta = stock_delta(inventory_transaction.transaction_type, inventory_transaction.quantity)
+        deltas[inventory_transaction.product_id] = deltas.get(inventory_transaction.product_id, 0) + delta
+    with transaction.atomic():
+        balances = _apply_deltas(deltas, allow_negative)
+        InventoryTransaction.objects.bulk_create(transactions)
+        transaction.on_commit(lambda: bump_table_version(InventoryTransaction))
+    return balances
+
+
+def take_snapshots(batch_size=SNAPSHOT_BATCH_SIZE):
+    """ثبت تصویر موجودی همه کالاها
+
+    هر دسته کالا در تراکنش خودش قفل می‌شود؛ چون ثبت تراکنش هم ابتدا ردیف کالا
+    را قفل می‌کند، موجودی خوانده‌شده دقیقاً با آخرین تراکنش ثبت‌شده آن کالا
+    سازگار است. زمان تصویر هر دسته پس از گرفتن قفل خوانده می‌شود تا تراکنشی
+    که پیش از قفل ثبت شده و در تصویر آمده، زمانی بعد از زمان تصویر نداشته باشد.
+    """
+    created = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            products = list(
+                Product.objects.select_for_update()
+                .filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'quantity')[:batch_size]
+            )
+            if not products:
+                break
+            taken_at = timezone.now()
+            last_pk = products[-1][0]
+            last_transaction_ids = dict(
+                InventoryTransaction.objects.filter(product_id__in=[pk for pk, _ in products])
+                .values('product_id')
+                .annotate(last_id=Max('id'))
+                .values_list('product_id', 'last_id')
+                .order_by()
+            )
+            StockSnapshot.objects.bulk_create([
+                StockSnapshot(
+                    product_id=pk,
+                    quantity=quantity,
+                    last_transaction_id=last_transaction_ids.get(pk, 0),
+                    taken_at=taken_at,
+                )
+                for pk, quantity in products
+            ])
+            created += len(products)
+    return created
+
+
+def signed_sum(transactions):
+    """جمع علامت‌دار تراکنش‌های هر کالا به صورت زیرکوئری همبسته"""
+    return Coalesce(
+        Subquery(
+            transactions.filter(product=OuterRef('pk'))
+            .values('product')
+            .annotate(total=Sum(SIGNED_QUANTITY))
+            .values('total')
+            .order_by(),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def stock_at(moment, products=None):
+    """موجودی کالاها در یک زمان گذشته: {شناسه کالا: موجودی}
+
+    اگر تصویری قبل از آن زمان وجود داشته باشد، موجودی تصویر به اضافه
+    تراکنش‌های بعد از آن و تا آن زمان حساب می‌شود؛ وگرنه تراکنش‌های بعد از آن
+    زمان از موجودی فعلی کم می‌شوند.
+    """
+    products = Product.objects.all() if products is None else products
+    snapshots = StockSnapshot.objects.filter(product=OuterRef('pk'), taken_at__lte=moment).order_by('-taken_at', '-id')
+    rows = (
+        products.annotate(
+            snapshot_quantity=Subquery(snapshots.values('quantity')[:1]),
+            snapshot_last_transaction=Subquery(snapshots.values('last_transaction_id')[:1]),
+        )
+        .annotate(
+            forward=signed_sum(InventoryTransaction.objects.filter(
+                id__gt=OuterRef('snapshot_last_transaction'), created_at__lte=moment,
+            )),
+            backward=signed_sum(InventoryTransaction.objects.filter(created_at__gt=moment)),
+        )
+        .values_list('pk', 'quantity', 'snapshot_quantity', 'forward', 'backward')
+    )
+    return {
+        pk: snapshot_quantity + forward if snapshot_quantity is not None else quantity - backward
+        for pk, quantity, snapshot_quantity, forward, backward in rows
+    }
+
+
+def find_stock_drift(products=None):
+    """کالاهایی که موجودی فعلی‌شان با آخرین تصویر به اضافه تراکنش‌های بعدی برابر نیست
+
+    تغییر مستقیم Product.quantity خارج از دفتر موجودی با این بررسی پیدا می‌شود.
+    """
+    products = Product.objects.all() if products is None else products
+    snapshots = StockSnapshot.objects.filter(product=OuterRef('pk')).order_by('-taken_at', '-id')
+    rows = (
+        products.annotate(
+            snapshot_quantity=Subquery(snapshots.values('quantity')[:1]),
+            snapshot_last_transaction=Subquery(snapshots.values('last_transaction_id')[:1]),
+        )
+        .filter(snapshot_quantity__isnull=False)
+        .annotate(forward=signed_sum(InventoryTransaction.objects.filter(
+            id__gt=OuterRef('snapshot_last_transaction'),
+        )))
+        .annotate(expected=F('snapshot_quantity') + F('forward'))
+        .exclude(quantity=F('expected'))
+        .values_list('pk', 'quantity', 'expected')
+    )
+    return list(rows)
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.stats import backfill_stats, snapshot_stats
+
+
+class Command(BaseCommand):
+    help = "Store today's inventory statistics (schedule daily), or backfill past days from inventory transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill-from', type=date.fromisoformat, help='First day (YYYY-MM-DD) to rebuild from transactions')
+        parser.add_argument('--backfill-to', type=date.fromisoformat, help='Last day to rebuild (defaults to yesterday)')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['backfill_from']:
+            start = options['backfill_from']
+            end = options['backfill_to'] or today - timedelta(days=1)
+            if start > end:
+                raise CommandError('--backfill-from must not be after --backfill-to.')
+            self.stdout.write(f'Backfilling inventory stats from {start} to {end}...')
+            rows = backfill_stats(start, end)
+            self.stdout.write(self.style.SUCCESS(f'{len(rows)} days of inventory stats stored successfully!'))
+            return
+
+        stats = snapshot_stats(today)
+        self.stdout.write(
+            f"{today}: {stats['total_products']} products, total value {stats['total_value']}, "
+            f"{stats['low_stock_products']} low on stock"
+        )
+        self.stdout.write(self.style.SUCCESS('Inventory stats stored successfully!'))
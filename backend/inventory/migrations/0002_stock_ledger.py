@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(verbose_name='موجودی')),
+                ('last_transaction_id', models.BigIntegerField(default=0, verbose_name='شناسه آخرین تراکنش لحاظ\u200cشده')),
+                ('taken_at', models.DateTimeField(verbose_name='زمان ثبت')),
+            ],
+            options={
+                'verbose_name': 'تصویر موجودی',
+                'verbose_name_plural': 'تصاویر موجودی',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['product', 'created_at'], name='inv_txn_product_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.product', verbose_name='محصول'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['product', '-taken_at'], name='stock_snapshot_product_idx'),
+        ),
+    ]
@@ -2,6 +2,16 @@ from django.db import models
 from django.conf import settings
 
 
+class ProductQuerySet(models.QuerySet):
+    """کوئری‌ست محصولات"""
+
+    def low_stock(self):
+        """محصولات فعال کم‌موجودی؛ عبارت فیلتر با ایندکس product_low_stock_idx یکسان است"""
+        return self.filter(is_active=True).alias(
+            stock_margin=models.F('quantity') - models.F('minimum_stock'),
+        ).filter(stock_margin__lte=0)
+
+
 class Product(models.Model):
     """مدل محصولات"""
     name = models.CharField(max_length=200, verbose_name='نام محصول')
@@ -14,9 +24,22 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True, verbose_name='فعال')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'محصول'
         verbose_name_plural = 'محصولات'
+        indexes = [
+            # ایندکس (is_active، quantity - minimum_stock) به صورت جزئی روی محصولات فعال؛
+            # شرط بولی is_active بدون نیاز به آمار ANALYZE با شرط ایندکس تطبیق داده می‌شود
+            models.Index(
+                models.F('quantity') - models.F('minimum_stock'),
+                condition=models.Q(is_active=True),
+                name='product_low_stock_idx',
+            ),
+            models.Index(fields=['category'], name='product_category_idx'),
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.code}"
@@ -52,6 +75,11 @@ class InventoryTransaction(models.Model):
     class Meta:
         verbose_name = 'تراکنش انبار'
         verbose_name_plural = 'تراکنش‌های انبار'
+        indexes = [
+            # محاسبه موجودی در یک زمان: تراکنش‌های هر کالا پس از آخرین تصویر موجودی
+            models.Index(fields=['product', 'created_at'], name='inv_txn_product_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='inv_txn_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product.name} - {self.get_transaction_type_display()} - {self.quantity}"
@@ -62,6 +90,24 @@ class InventoryTransaction(models.Model):
         return self.quantity * self.unit_price
 
 
+class StockSnapshot(models.Model):
+    """مدل تصویر دوره‌ای موجودی کالا"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots', verbose_name='محصول')
+    quantity = models.IntegerField(verbose_name='موجودی')
+    last_transaction_id = models.BigIntegerField(default=0, verbose_name='شناسه آخرین تراکنش لحاظ‌شده')
+    taken_at = models.DateTimeField(verbose_name='زمان ثبت')
+    
+    class Meta:
+        verbose_name = 'تصویر موجودی'
+        verbose_name_plural = 'تصاویر موجودی'
+        indexes = [
+            models.Index(fields=['product', '-taken_at'], name='stock_snapshot_product_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.taken_at} - {self.quantity}"
+
+
 class InventoryStats(models.Model):
     """مدل آمار انبار"""
     date = models.DateField(verbose_name='تاریخ')
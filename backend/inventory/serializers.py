@@ -0,0 +1,66 @@
+from rest_framework import serializers
+
+from financial.serializers import EagerLoadingMixin
+from .models import *
+
+
+class ProductSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """سریالایزر محصولات"""
+    # موجودی فقط از طریق تراکنش‌های انبار تغییر می‌کند
+    initial_quantity = serializers.IntegerField(write_only=True, required=False, min_value=0, label='موجودی اولیه')
+    is_low_stock = serializers.BooleanField(read_only=True)
+    total_value = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = Product
+        fields = '__all__'
+        read_only_fields = ['quantity']
+    
+    def update(self, instance, validated_data):
+        validated_data.pop('initial_quantity', None)
+        return super().update(instance, validated_data)
+
+
+class TransactionQuantityValidationMixin:
+    """بررسی علامت تعداد بر اساس نوع تراکنش"""
+    
+    def validate(self, attrs):
+        quantity = attrs.get('quantity')
+        if attrs.get('transaction_type') == 'adjustment':
+            if quantity == 0:
+                raise serializers.ValidationError({'quantity': 'تعداد تعدیل نمی‌تواند صفر باشد.'})
+        elif quantity is not None and quantity <= 0:
+            raise serializers.ValidationError({'quantity': 'تعداد ورود یا خروج باید مثبت باشد.'})
+        return attrs
+
+
+class InventoryTransactionSerializer(TransactionQuantityValidationMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """سریالایزر تراکنش‌های انبار"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
+    total_amount = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+    
+    select_related_fields = ('product', 'created_by')
+    related_only_fields = ('product__name', 'created_by__full_name')
+    
+    class Meta:
+        model = InventoryTransaction
+        fields = '__all__'
+        read_only_fields = ['created_by']
+
+
+class InventoryMovementSerializer(TransactionQuantityValidationMixin, serializers.ModelSerializer):
+    """سریالایزر ردیف‌های ثبت گروهی؛ وجود محصولات در ویو با یک کوئری بررسی می‌شود"""
+    product = serializers.IntegerField(source='product_id')
+    
+    class Meta:
+        model = InventoryTransaction
+        fields = ['product', 'transaction_type', 'quantity', 'unit_price', 'description', 'reference_number']
+
+
+class InventoryStatsSerializer(serializers.ModelSerializer):
+    """سریالایزر آمار روزانه انبار"""
+    
+    class Meta:
+        model = InventoryStats
+        fields = '__all__'
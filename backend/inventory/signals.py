@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+
+from financial.signals import invalidate_table_version
+from .models import Product, InventoryTransaction, InventoryStats
+
+
+# جدول‌هایی که نسخه‌شان برای ETag لیست‌ها با هر تغییر افزایش می‌یابد
+VERSIONED_MODELS = (Product, InventoryTransaction, InventoryStats)
+
+for model in VERSIONED_MODELS:
+    post_save.connect(invalidate_table_version, sender=model, dispatch_uid=f'inventory-version-save-{model.__name__}')
+    post_delete.connect(invalidate_table_version, sender=model, dispatch_uid=f'inventory-version-delete-{model.__name__}')
@@ -0,0 +1,120 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from financial.cache import bump_table_version
+from .ledger import SIGNED_QUANTITY
+from .models import Product, InventoryTransaction, InventoryStats
+
+
+STATS_FIELDS = ['total_products', 'total_value', 'low_stock_products']
+
+# آمار روی محصولات فعال محاسبه می‌شود؛ کم‌موجودی همان تعریف Product.objects.low_stock() است
+STOCK_VALUE = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=20, decimal_places=2))
+
+
+def compute_current_stats():
+    """آمار فعلی انبار با یک کوئری تجمیعی"""
+    stats = Product.objects.filter(is_active=True).aggregate(
+        total_products=Count('id'),
+        total_value=Sum(STOCK_VALUE),
+        low_stock_products=Count('id', filter=Q(quantity__lte=F('minimum_stock'))),
+    )
+    stats['total_value'] = stats['total_value'] or Decimal(0)
+    return stats
+
+
+def save_stats(rows):
+    """درج یا به‌روزرسانی آمار روزها با یک دستور upsert؛ rows: {تاریخ: آمار}"""
+    InventoryStats.objects.bulk_create(
+        [InventoryStats(date=day, **stats) for day, stats in rows.items()],
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=STATS_FIELDS,
+    )
+    transaction.on_commit(lambda: bump_table_version(InventoryStats))
+
+
+def snapshot_stats(day=None):
+    """ثبت آمار روز (پیش‌فرض امروز) از وضعیت فعلی محصولات"""
+    day = day or timezone.localdate()
+    stats = compute_current_stats()
+    save_stats({day: stats})
+    return stats
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def backfill_stats(start, end):
+    """بازسازی آمار روزهای start تا end از تراکنش‌های انبار
+
+    موجودی پایان هر روز از موجودی فعلی و برگرداندن تراکنش‌های بعد از آن روز به
+    دست می‌آید. تراکنش‌ها با یک کوئری GROUP BY (کالا، روز) خوانده می‌شوند و روزها
+    از امروز به عقب پیمایش می‌شوند؛ در هر روز فقط کالاهایی که تراکنش داشته‌اند
+    در جمع‌ها به‌روز می‌شوند. ارزش با قیمت فعلی کالا حساب می‌شود چون تاریخچه
+    قیمت نگه داشته نمی‌شود.
+    """
+    today = timezone.localdate()
+    end = min(end, today)
+    if start > end:
+        return {}
+
+    products = {}
+    created_on = {}
+    for pk, quantity, unit_price, minimum_stock, created_at in (
+        Product.objects.filter(is_active=True)
+        .values_list('pk', 'quantity', 'unit_price', 'minimum_stock', 'created_at')
+        .iterator(chunk_size=5000)
+    ):
+        products[pk] = [quantity, unit_price, minimum_stock]
+        created_on.setdefault(timezone.localdate(created_at), []).append(pk)
+
+    deltas = {}
+    for product_id, day, delta in (
+        InventoryTransaction.objects.filter(product__is_active=True, created_at__gte=_start_of_day(start + timedelta(days=1)))
+        .annotate(day=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+        .values('product_id', 'day')
+        .annotate(delta=Sum(SIGNED_QUANTITY))
+        .values_list('product_id', 'day', 'delta')
+        .order_by()
+    ):
+        deltas.setdefault(day, []).append((product_id, delta))
+
+    # وضعیت فعلی همه محصولاتی که تا امروز ساخته شده‌اند
+    existing = set(products)
+    total_value = sum((quantity * unit_price for quantity, unit_price, _ in products.values()), Decimal(0))
+    low_stock = sum(1 for quantity, _, minimum_stock in products.values() if quantity <= minimum_stock)
+
+    rows = {}
+    day = today
+    while day >= start:
+        if day <= end:
+            rows[day] = {
+                'total_products': len(existing),
+                'total_value': total_value,
+                'low_stock_products': low_stock,
+            }
+        # برگرداندن تراکنش‌های این روز برای رسیدن به موجودی پایان روز قبل
+        for product_id, delta in deltas.get(day, ()):
+            quantity, unit_price, minimum_stock = products[product_id]
+            previous = quantity - delta
+            products[product_id][0] = previous
+            if product_id in existing:
+                total_value -= delta * unit_price
+                low_stock += int(previous <= minimum_stock) - int(quantity <= minimum_stock)
+        # محصولاتی که در این روز ساخته شده‌اند در روزهای قبل وجود نداشتند
+        for product_id in created_on.get(day, ()):
+            quantity, unit_price, minimum_stock = products[product_id]
+            existing.discard(product_id)
+            total_value -= quantity * unit_price
+            low_stock -= int(quantity <= minimum_stock)
+        day -= timedelta(days=1)
+
+    save_stats(rows)
+    return rows
@@ -1,3 +1,218 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from financial.tests import ConditionalGetAssertionsMixin
+from .ledger import find_stock_drift, record_transaction, stock_at, take_snapshots
+from .models import *
+from .stats import backfill_stats, save_stats, snapshot_stats
+
+
+class StockSnapshotTests(TestCase):
+    """تصویر موجودی در حضور نویسنده‌های همزمان"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='keeper', password='pass', role='management')
+        cls.products = [
+            Product.objects.create(name=f'کالا {index}', code=f'S{index}', unit_price=Decimal('1.00'))
+            for index in range(2)
+        ]
+    
+    def test_snapshot_time_follows_transactions_it_includes(self):
+        for product in self.products:
+            record_transaction(product, 'in', 10, Decimal('1.00'), self.user)
+        
+        bulk_create = StockSnapshot.objects.bulk_create
+        written = []
+        
+        def bulk_create_then_write(objects):
+            created = bulk_create(objects)
+            if not written:
+                # نویسنده‌ای که بین دو دسته، پیش از قفل دسته دوم، تراکنش ثبت می‌کند
+                written.append(record_transaction(self.products[1], 'out', 4, Decimal('1.00'), self.user))
+            return created
+        
+        with mock.patch.object(StockSnapshot.objects, 'bulk_create', side_effect=bulk_create_then_write):
+            self.assertEqual(take_snapshots(batch_size=1), 2)
+        
+        late = written[0]
+        snapshot = StockSnapshot.objects.get(product=self.products[1])
+        self.assertEqual((snapshot.quantity, snapshot.last_transaction_id), (6, late.pk))
+        self.assertGreaterEqual(snapshot.taken_at, late.created_at)
+        
+        # لحظه‌ای بین تصویر دسته اول و تراکنش دیر: خروج هنوز رخ نداده است
+        before_late = late.created_at - timezone.timedelta(microseconds=1)
+        self.assertEqual(stock_at(before_late)[self.products[1].pk], 10)
+        self.assertEqual(stock_at(timezone.now())[self.products[1].pk], 6)
+        self.assertEqual(find_stock_drift(), [])
+
+
+class InventoryApiTests(ConditionalGetAssertionsMixin, TestCase):
+    """ثبت موجودی فقط از طریق دفتر انبار"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='storekeeper', password='pass', role='management')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_product(self, code, quantity=0, **fields):
+        product = Product.objects.create(name=f'کالا {code}', code=code, unit_price=Decimal('2.00'), **fields)
+        if quantity:
+            record_transaction(product, 'adjustment', quantity, product.unit_price, self.user)
+        return product
+    
+    def test_initial_quantity_is_recorded_in_the_ledger(self):
+        response = self.client.post(reverse('product-list'), {
+            'name': 'کالا', 'code': 'C1', 'unit_price': '3.00', 'quantity': 999, 'initial_quantity': 12,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['quantity'], 12)
+        transaction = InventoryTransaction.objects.get(product_id=response.data['id'])
+        self.assertEqual((transaction.transaction_type, transaction.quantity), ('adjustment', 12))
+    
+    def test_failed_initial_transaction_does_not_leave_a_product(self):
+        with mock.patch('inventory.views.record_transaction', side_effect=RuntimeError('ledger unavailable')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('product-list'), {
+                    'name': 'کالا', 'code': 'C2', 'unit_price': '3.00', 'initial_quantity': 5,
+                }, format='json')
+        self.assertFalse(Product.objects.filter(code='C2').exists())
+    
+    def test_outgoing_transaction_cannot_go_negative(self):
+        product = self.create_product('C3', quantity=5)
+        url = reverse('inventory-transaction-list')
+        row = {'product': product.pk, 'transaction_type': 'out', 'quantity': 6, 'unit_price': '2.00'}
+        self.assertEqual(self.client.post(url, row, format='json').status_code, 400)
+        
+        row['quantity'] = 5
+        response = self.client.post(url, row, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 0)
+    
+    def test_stock_update_changes_the_etag(self):
+        product = self.create_product('E1', quantity=5)
+        urls = [reverse('product-list'), reverse('product-detail', args=[product.pk])]
+        etags = [self.get_etag(url) for url in urls]
+        for url, etag in zip(urls, etags):
+            self.assertNotModified(url, etag)
+        # موجودی با UPDATE شرطی و بدون save کالا تغییر می‌کند
+        with self.captureOnCommitCallbacks(execute=True):
+            record_transaction(product, 'out', 2, product.unit_price, self.user)
+        for url, etag in zip(urls, etags):
+            self.assertModified(url, etag)
+        self.assertEqual(self.client.get(urls[1]).data['quantity'], 3)
+    
+    def test_bulk_movements(self):
+        products = [self.create_product(f'B{index}', quantity=50) for index in range(3)]
+        rows = [
+            {'product': product.pk, 'transaction_type': transaction_type, 'quantity': 2, 'unit_price': '1.00'}
+            for product in products for transaction_type in ('in', 'out', 'out')
+        ] * 20
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('inventory-transaction-bulk'), rows, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['created'], 180)
+        self.assertEqual({row['quantity'] for row in response.data['stock']}, {10})
+        self.assertLessEqual(len(context), 12)
+        self.assertEqual(find_stock_drift(), [])
+    
+    def test_bulk_movements_are_all_or_nothing(self):
+        product = self.create_product('B9', quantity=3)
+        url = reverse('inventory-transaction-bulk')
+        rows = [
+            {'product': product.pk, 'transaction_type': 'in', 'quantity': 1, 'unit_price': '1.00'},
+            {'product': product.pk, 'transaction_type': 'out', 'quantity': 10, 'unit_price': '1.00'},
+        ]
+        self.assertEqual(self.client.post(url, rows, format='json').status_code, 400)
+        rows[1] = {'product': 99999, 'transaction_type': 'in', 'quantity': 1, 'unit_price': '1.00'}
+        response = self.client.post(url, rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 3)
+        self.assertEqual(InventoryTransaction.objects.filter(product=product).count(), 1)
+    
+    def test_low_stock_and_stock_at(self):
+        low = self.create_product('L1', quantity=2, minimum_stock=5)
+        self.create_product('L2', quantity=9, minimum_stock=5)
+        self.create_product('L3', quantity=0, minimum_stock=5, is_active=False)
+        response = self.client.get(reverse('product-low-stock'))
+        self.assertEqual([row['id'] for row in response.data['results']], [low.pk])
+        self.assertEqual([row['id'] for row in self.client.get(reverse('product-list'), {'low_stock': 'true'}).data['results']], [low.pk])
+        
+        moment = timezone.now()
+        record_transaction(low, 'in', 4, Decimal('1.00'), self.user)
+        response = self.client.get(reverse('product-stock-at'), {'at': moment.isoformat(), 'product': low.pk})
+        self.assertEqual(response.data['stock'], [{'product': low.pk, 'quantity': 2}])
+        self.assertEqual(self.client.get(reverse('product-stock-at'), {'at': 'yesterday'}).status_code, 400)
+
 
-# Create your tests here.
+class InventoryStatsTests(TestCase):
+    """آمار روزانه انبار از دفتر موجودی"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='stats', password='pass', role='management')
+        cls.today = timezone.localdate()
+        cls.first = cls.create_product('A', '2.00', minimum_stock=2, days_ago=5, movements=[(4, 10), (2, -3), (0, 1)])
+        cls.create_product('B', '5.00', minimum_stock=5, days_ago=2, movements=[(2, 4)])
+        inactive = cls.create_product('C', '1.00', minimum_stock=0, days_ago=5, movements=[(4, 100)])
+        Product.objects.filter(pk=inactive.pk).update(is_active=False)
+    
+    @classmethod
+    def moment(cls, days_ago, hour=12):
+        return timezone.make_aware(datetime.combine(cls.today - timedelta(days=days_ago), time(hour)))
+    
+    @classmethod
+    def create_product(cls, code, unit_price, minimum_stock, days_ago, movements):
+        product = Product.objects.create(name=code, code=code, unit_price=Decimal(unit_price), minimum_stock=minimum_stock)
+        Product.objects.filter(pk=product.pk).update(created_at=cls.moment(days_ago, hour=9))
+        for movement_days_ago, quantity in movements:
+            transaction = record_transaction(product, 'adjustment', quantity, product.unit_price, cls.user)
+            InventoryTransaction.objects.filter(pk=transaction.pk).update(created_at=cls.moment(movement_days_ago))
+        return product
+    
+    def stored(self):
+        return {
+            (self.today - row['date']).days: (row['total_products'], str(row['total_value']), row['low_stock_products'])
+            for row in InventoryStats.objects.values('date', 'total_products', 'total_value', 'low_stock_products')
+        }
+    
+    def test_backfill_rewinds_the_ledger(self):
+        rows = backfill_stats(self.today - timedelta(days=5), self.today + timedelta(days=3))
+        self.assertEqual(max(rows), self.today)
+        self.assertEqual(self.stored(), {
+            5: (1, '0.00', 1),
+            4: (1, '20.00', 0),
+            3: (1, '20.00', 0),
+            2: (2, '34.00', 1),
+            1: (2, '34.00', 1),
+            0: (2, '36.00', 1),
+        })
+        # موجودی پایان روز همان موجودی نقطه‌ای دفتر انبار است
+        self.assertEqual(stock_at(self.moment(2, hour=23))[self.first.pk], 7)
+    
+    def test_backfill_of_a_partial_range(self):
+        backfill_stats(self.today - timedelta(days=3), self.today - timedelta(days=2))
+        self.assertEqual(self.stored(), {3: (1, '20.00', 0), 2: (2, '34.00', 1)})
+        self.assertEqual(backfill_stats(self.today + timedelta(days=1), self.today + timedelta(days=2)), {})
+    
+    def test_snapshot_upserts_the_day(self):
+        save_stats({self.today: {'total_products': 9, 'total_value': Decimal('1.00'), 'low_stock_products': 9}})
+        stats = snapshot_stats()
+        self.assertEqual(InventoryStats.objects.count(), 1)
+        self.assertEqual(stats, {'total_products': 2, 'total_value': Decimal('36.00'), 'low_stock_products': 1})
+        self.assertEqual(self.stored(), {0: (2, '36.00', 1)})
@@ -1,5 +1,18 @@
 from django.urls import path
+from .views import *
 
 urlpatterns = [
-    # Inventory URLs will be added here
+    # Product URLs
+    path('products/', ProductListCreateView.as_view(), name='product-list'),
+    path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
+    path('products/low-stock/', LowStockProductListView.as_view(), name='product-low-stock'),
+    path('products/stock-at/', product_stock_at, name='product-stock-at'),
+    
+    # Inventory Transaction URLs
+    path('transactions/', InventoryTransactionListCreateView.as_view(), name='inventory-transaction-list'),
+    path('transactions/<int:pk>/', InventoryTransactionDetailView.as_view(), name='inventory-transaction-detail'),
+    path('transactions/bulk/', InventoryMovementBulkView.as_view(), name='inventory-transaction-bulk'),
+    
+    # Inventory Stats URLs
+    path('stats/', InventoryStatsListView.as_view(), name='inventory-stats-list'),
 ]
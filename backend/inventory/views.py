@@ -1,3 +1,166 @@
-from django.shortcuts import render
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
 
-# Create your views here.
+from financial.conditional import ConditionalGetMixin
+from financial.pagination import OptInCursorPagination
+from financial.views import OptimizedQuerysetMixin
+from .ledger import InsufficientStockError, record_transaction, record_transactions, stock_at
+from .models import *
+from .serializers import *
+
+
+# Product Views
+class ProductListCreateView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
+    """ویو لیست و ایجاد محصولات
+
+    با ?low_stock=true فقط محصولات فعال کم‌موجودی برگردانده می‌شوند.
+    """
+    queryset = Product.objects.order_by('-created_at', '-id')
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    filterset_fields = ['category', 'is_active']
+    search_fields = ['name', 'code']
+    ordering_fields = ['name', 'code', 'quantity', 'unit_price', 'created_at']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.query_params.get('low_stock', '').lower() in ('1', 'true', 'yes'):
+            queryset = queryset.low_stock()
+        return queryset
+    
+    def perform_create(self, serializer):
+        initial_quantity = serializer.validated_data.pop('initial_quantity', 0)
+        # محصول بدون تراکنش موجودی اولیه‌اش ذخیره نمی‌شود
+        with transaction.atomic():
+            product = serializer.save(quantity=0)
+            if initial_quantity:
+                # موجودی اولیه هم مثل هر تغییر دیگری در دفتر انبار ثبت می‌شود
+                record_transaction(
+                    product, 'adjustment', initial_quantity, product.unit_price, self.request.user,
+                    description='موجودی اولیه',
+                )
+
+
+class ProductDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    """ویو جزئیات محصول"""
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class LowStockProductListView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.ListAPIView):
+    """ویو محصولات کم‌موجودی از ایندکس product_low_stock_idx"""
+    queryset = Product.objects.low_stock().order_by('-created_at', '-id')
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    filterset_fields = ['category']
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def product_stock_at(request):
+    """ویو موجودی محصولات در یک زمان گذشته (?at=...&product=1&product=2)"""
+    moment = parse_datetime(request.query_params.get('at', ''))
+    if moment is None:
+        return Response({'error': 'زمان at باید به صورت ISO 8601 باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    
+    products = Product.objects.all()
+    product_ids = request.query_params.getlist('product')
+    if product_ids:
+        if not all(product_id.isdigit() for product_id in product_ids):
+            return Response({'error': 'شناسه محصول باید عدد صحیح باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+        products = products.filter(pk__in=product_ids)
+    
+    stock = stock_at(moment, products)
+    return Response({
+        'at': moment.isoformat(),
+        'stock': [{'product': product_id, 'quantity': quantity} for product_id, quantity in sorted(stock.items())],
+    }, status=status.HTTP_200_OK)
+
+
+# Inventory Transaction Views
+class InventoryTransactionListCreateView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
+    """ویو لیست و ثبت تراکنش‌های انبار"""
+    queryset = InventoryTransaction.objects.order_by('-created_at', '-id')
+    serializer_class = InventoryTransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    filterset_fields = ['product', 'transaction_type']
+    search_fields = ['reference_number', 'description']
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            instance = record_transaction(created_by=request.user, **serializer.validated_data)
+        except InsufficientStockError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(instance).data, status=status.HTTP_201_CREATED)
+
+
+class InventoryTransactionDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveAPIView):
+    """ویو جزئیات تراکنش انبار؛ تراکنش‌ها فقط اضافه می‌شوند و اصلاح با تعدیل است"""
+    queryset = InventoryTransaction.objects.all()
+    serializer_class = InventoryTransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class InventoryMovementBulkView(generics.GenericAPIView):
+    """ویو ثبت گروهی تراکنش‌های انبار
+
+    همه ردیف‌ها در یک تراکنش ثبت می‌شوند: bulk_create برای تراکنش‌ها و یک UPDATE
+    گروهی برای موجودی کالاها. اگر ردیفی نامعتبر باشد یا موجودی کالایی کافی
+    نباشد هیچ تغییری ذخیره نمی‌شود.
+    """
+    queryset = InventoryTransaction.objects.all()
+    serializer_class = InventoryMovementSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 1000
+    
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'یک آرایه غیرخالی از ردیف‌ها ارسال کنید.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_batch_size:
+            return Response({'error': f'حداکثر {self.max_batch_size} ردیف در هر درخواست مجاز است.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = self.get_serializer(data=rows, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        product_ids = {attrs['product_id'] for attrs in serializer.validated_data}
+        existing = set(Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
+        errors = [
+            {} if attrs['product_id'] in existing else {'product': ['محصولی با این شناسه یافت نشد.']}
+            for attrs in serializer.validated_data
+        ]
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        transactions = [InventoryTransaction(created_by=request.user, **attrs) for attrs in serializer.validated_data]
+        try:
+            balances = record_transactions(transactions)
+        except InsufficientStockError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'created': len(transactions),
+            'stock': [{'product': product_id, 'quantity': quantity} for product_id, quantity in sorted(balances.items())],
+        }, status=status.HTTP_201_CREATED)
+
+
+# Inventory Stats Views
+class InventoryStatsListView(ConditionalGetMixin, generics.ListAPIView):
+    """ویو آمار روزانه انبار ثبت‌شده توسط دستور snapshot_inventory_stats"""
+    queryset = InventoryStats.objects.order_by('-date')
+    serializer_class = InventoryStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = {'date': ['gte', 'lte']}
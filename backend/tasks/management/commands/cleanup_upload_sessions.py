@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tasks.uploads import STALE_SESSION_AGE, discard_stale_sessions, discard_unreferenced_files
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete abandoned chunked-upload sessions and their temporary files, releasing the reserved quota, '
+        'and stored attachment files that no attachment references any more'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours',
+            type=float,
+            default=STALE_SESSION_AGE.total_seconds() / 3600,
+            help='Sessions without a chunk for this long are discarded',
+        )
+
+    def handle(self, *args, **options):
+        count = discard_stale_sessions(timedelta(hours=options['older_than_hours']))
+        self.stdout.write(self.style.SUCCESS(f'{count} stale upload sessions removed.'))
+        count = discard_unreferenced_files()
+        self.stdout.write(self.style.SUCCESS(f'{count} unreferenced attachment files removed.'))
@@ -0,0 +1,26 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from tasks.reminders import ReminderWorker, run_reminders
+
+
+class Command(BaseCommand):
+    help = 'Run the due-date reminder scheduler as a long-lived worker (or a single pass with --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single scan and exit')
+        parser.add_argument('--interval', type=float, help='Seconds between scans (default: REMINDER_INTERVAL_SECONDS)')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = run_reminders()
+            self.stdout.write(self.style.SUCCESS(f'{count} reminder notifications created.'))
+            return
+
+        worker = ReminderWorker(interval=options['interval'])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+        self.stdout.write(f'Reminder worker started (interval {worker.interval:g}s).')
+        worker.run()
+        self.stdout.write(self.style.SUCCESS(f'Reminder worker stopped; {worker.created} notifications created.'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:07
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskattachment',
+            name='file_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='نام فایل'),
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='هش SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='size',
+            field=models.BigIntegerField(default=0, verbose_name='حجم (بایت)'),
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255, verbose_name='نام فایل')),
+                ('description', models.CharField(blank=True, max_length=200, verbose_name='توضیحات')),
+                ('total_size', models.BigIntegerField(verbose_name='حجم کل (بایت)')),
+                ('received_size', models.BigIntegerField(default=0, verbose_name='حجم دریافت\u200cشده (بایت)')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='هش SHA-256 اعلام\u200cشده')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ به\u200cروزرسانی')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='tasks.task', verbose_name='کار')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'جلسه آپلود',
+                'verbose_name_plural': 'جلسه\u200cهای آپلود',
+            },
+        ),
+    ]
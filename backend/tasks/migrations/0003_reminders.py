@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_chunked_uploads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task_due', 'سررسید کار'), ('follow_up_due', 'سررسید پیگیری'), ('payable_check_due', 'سررسید چک پرداختنی'), ('receivable_check_due', 'سررسید چک دریافتنی')], max_length=30, verbose_name='نوع')),
+                ('title', models.CharField(max_length=200, verbose_name='عنوان')),
+                ('message', models.TextField(verbose_name='متن')),
+                ('item_count', models.PositiveIntegerField(default=0, verbose_name='تعداد اقلام')),
+                ('item_ids', models.JSONField(blank=True, default=list, verbose_name='شناسه اقلام')),
+                ('window_start', models.DateTimeField(verbose_name='شروع بازه')),
+                ('window_end', models.DateTimeField(verbose_name='پایان بازه')),
+                ('is_read', models.BooleanField(default=False, verbose_name='خوانده شده')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+            ],
+            options={
+                'verbose_name': 'اعلان',
+                'verbose_name_plural': 'اعلان\u200cها',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReminderCursor',
+            fields=[
+                ('source', models.CharField(max_length=30, primary_key=True, serialize=False, verbose_name='منبع')),
+                ('high_water', models.DateTimeField(verbose_name='انتهای آخرین بازه')),
+                ('last_run_at', models.DateTimeField(verbose_name='زمان آخرین اجرا')),
+            ],
+            options={
+                'verbose_name': 'نقطه پیشرفت یادآوری',
+                'verbose_name_plural': 'نقاط پیشرفت یادآوری',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='کاربر'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='notification_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remindercursor',
+            name='recipient_after',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='آخرین گیرنده ثبت\u200cشده'),
+        ),
+        migrations.AddField(
+            model_name='remindercursor',
+            name='window_end',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='انتهای بازه در حال ثبت'),
+        ),
+    ]
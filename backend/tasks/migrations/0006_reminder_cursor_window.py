@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 20:55
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_open_windows(apps, schema_editor):
+    # بازه نیمه‌تمام قبلی: زمان پیمایش آن ذخیره نشده بود؛ نزدیک‌ترین مقدار معلوم جایگزین می‌شود
+    ReminderCursor = apps.get_model('tasks', 'ReminderCursor')
+    ReminderCursor.objects.filter(window_end__isnull=False).update(window_start=F('high_water'), window_run_at=F('last_run_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_reminder_cursor_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remindercursor',
+            name='window_run_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='زمان پیمایش بازه در حال ثبت'),
+        ),
+        migrations.AddField(
+            model_name='remindercursor',
+            name='window_start',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='ابتدای بازه در حال ثبت'),
+        ),
+        migrations.RunPython(fill_open_windows, migrations.RunPython.noop),
+    ]
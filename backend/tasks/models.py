@@ -1,5 +1,41 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+
+from financial.cache import bump_table_version
+
+
+def completion_values(status, now):
+    """فیلدهای مشتق از وضعیت کار برای UPDATE؛ همان قاعده Task.save
+
+    تاریخ تکمیل فقط در اولین تکمیل ثبت می‌شود و با بازگشایی کار پاک نمی‌شود.
+    """
+    if status == 'completed':
+        return {
+            'is_completed': True,
+            'completed_at': Coalesce('completed_at', models.Value(now, output_field=models.DateTimeField())),
+        }
+    return {'is_completed': False}
+
+
+class TaskQuerySet(models.QuerySet):
+    """کوئری‌ست کارها"""
+    
+    def update(self, **kwargs):
+        updated = super().update(**kwargs)
+        # update() سیگنال ندارد؛ نسخه جدول برای ETag لیست کارها دستی افزایش می‌یابد
+        transaction.on_commit(lambda: bump_table_version(Task))
+        return updated
+    
+    def transition(self, status):
+        """تغییر وضعیت همه کارهای کوئری‌ست و فیلدهای مشتق آن با یک UPDATE؛ تعداد کارهای تغییرکرده برگردانده می‌شود"""
+        if status not in dict(Task.STATUS_CHOICES):
+            raise ValueError(f'وضعیت نامعتبر: {status}')
+        now = timezone.now()
+        return self.exclude(status=status).update(status=status, updated_at=now, **completion_values(status, now))
 
 
 class Task(models.Model):
@@ -30,20 +66,28 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='تاریخ به‌روزرسانی')
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'کار'
         verbose_name_plural = 'کارها'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['-created_at', '-id'], name='task_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
-
+    
     def save(self, *args, **kwargs):
-        # اگر وضعیت به تکمیل شده تغییر کرد، تاریخ تکمیل را ثبت کن
-        if self.status == 'completed' and not self.completed_at:
-            from django.utils import timezone
+        # فیلدهای تکمیل از وضعیت به دست می‌آیند؛ همان قاعده completion_values در TaskQuerySet.transition
+        self.is_completed = self.status == 'completed'
+        if self.is_completed and not self.completed_at:
             self.completed_at = timezone.now()
-            self.is_completed = True
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_at', 'is_completed'}
         super().save(*args, **kwargs)
 
 
@@ -67,6 +111,10 @@ class TaskAttachment(models.Model):
     """مدل پیوست‌های کار"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments', verbose_name='کار')
     file = models.FileField(upload_to='task_attachments/', verbose_name='فایل')
+    file_name = models.CharField(max_length=255, blank=True, verbose_name='نام فایل')
+    size = models.BigIntegerField(default=0, verbose_name='حجم (بایت)')
+    # فایل‌های با محتوای یکسان فقط یک بار ذخیره می‌شوند و همه پیوست‌ها به همان فایل اشاره می‌کنند
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='هش SHA-256')
     description = models.CharField(max_length=200, blank=True, verbose_name='توضیحات')
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name='آپلود شده توسط')
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ آپلود')
@@ -77,3 +125,81 @@ class TaskAttachment(models.Model):
     
     def __str__(self):
         return f"پیوست برای {self.task.title}"
+
+
+class UploadSession(models.Model):
+    """مدل جلسه آپلود تکه‌ای و قابل ادامه پیوست"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name='کار')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name='کاربر')
+    file_name = models.CharField(max_length=255, verbose_name='نام فایل')
+    description = models.CharField(max_length=200, blank=True, verbose_name='توضیحات')
+    total_size = models.BigIntegerField(verbose_name='حجم کل (بایت)')
+    received_size = models.BigIntegerField(default=0, verbose_name='حجم دریافت‌شده (بایت)')
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name='هش SHA-256 اعلام‌شده')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='تاریخ به‌روزرسانی')
+    
+    class Meta:
+        verbose_name = 'جلسه آپلود'
+        verbose_name_plural = 'جلسه‌های آپلود'
+    
+    def __str__(self):
+        return f"{self.file_name} - {self.received_size}/{self.total_size}"
+
+
+class Notification(models.Model):
+    """مدل اعلان‌های کاربر؛ هر اعلان خلاصه همه اقلام یک نوع است که در یک بازه زمانی سررسید می‌شوند"""
+    KIND_CHOICES = [
+        ('task_due', 'سررسید کار'),
+        ('follow_up_due', 'سررسید پیگیری'),
+        ('payable_check_due', 'سررسید چک پرداختنی'),
+        ('receivable_check_due', 'سررسید چک دریافتنی'),
+    ]
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications', verbose_name='کاربر')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name='نوع')
+    title = models.CharField(max_length=200, verbose_name='عنوان')
+    message = models.TextField(verbose_name='متن')
+    item_count = models.PositiveIntegerField(default=0, verbose_name='تعداد اقلام')
+    # شناسه اقلام اعلان؛ برای اعلان‌های بزرگ فقط تعداد محدودی نگه داشته می‌شود
+    item_ids = models.JSONField(default=list, blank=True, verbose_name='شناسه اقلام')
+    window_start = models.DateTimeField(verbose_name='شروع بازه')
+    window_end = models.DateTimeField(verbose_name='پایان بازه')
+    is_read = models.BooleanField(default=False, verbose_name='خوانده شده')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
+    
+    class Meta:
+        verbose_name = 'اعلان'
+        verbose_name_plural = 'اعلان‌ها'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} - {self.title}"
+
+
+class ReminderCursor(models.Model):
+    """مدل نقطه پیشرفت زمان‌بند یادآوری برای هر منبع
+    
+    high_water انتهای آخرین بازه سررسیدی است که اعلان‌هایش ثبت شده؛ اجرای بعدی
+    فقط اقلام بعد از آن را می‌خواند.
+    """
+    source = models.CharField(max_length=30, primary_key=True, verbose_name='منبع')
+    high_water = models.DateTimeField(verbose_name='انتهای آخرین بازه')
+    last_run_at = models.DateTimeField(verbose_name='زمان آخرین اجرا')
+    # بازه‌ای که اعلان‌هایش در چند دسته ثبت می‌شود: ابتدا و انتها، زمان پیمایش آن و آخرین گیرنده‌ای که اعلانش ثبت شده
+    window_start = models.DateTimeField(null=True, blank=True, verbose_name='ابتدای بازه در حال ثبت')
+    window_end = models.DateTimeField(null=True, blank=True, verbose_name='انتهای بازه در حال ثبت')
+    window_run_at = models.DateTimeField(null=True, blank=True, verbose_name='زمان پیمایش بازه در حال ثبت')
+    recipient_after = models.BigIntegerField(null=True, blank=True, verbose_name='آخرین گیرنده ثبت‌شده')
+    
+    class Meta:
+        verbose_name = 'نقطه پیشرفت یادآوری'
+        verbose_name_plural = 'نقاط پیشرفت یادآوری'
+    
+    def __str__(self):
+        return f"{self.source} - {self.high_water}"
@@ -0,0 +1,283 @@
+"""زمان‌بند یادآوری سررسید کارها، پیگیری‌ها و چک‌ها
+
+هر اجرا برای هر منبع فقط اقلامی را می‌خواند که زمان سررسیدشان در بازه
+(انتهای بازه قبلی، اکنون + فاصله یادآوری] است؛ این خواندن یک کوئری بازه‌ای روی
+ایندکس سررسید اقلام باز است و جدول‌ها هیچ‌وقت کامل پیمایش نمی‌شوند. اقلام هر
+کاربر در یک اعلان خلاصه جمع می‌شوند. اعلان‌ها به ترتیب گیرنده در دسته‌های
+NOTIFICATION_BATCH_SIZE تایی ثبت می‌شوند و هر دسته همراه با جابه‌جا شدن نقطه
+پیشرفت (ReminderCursor، شامل آخرین گیرنده ثبت‌شده) در یک تراکنش، بنابراین هر
+بازه برای هر گیرنده دقیقاً یک بار اعلان می‌شود.
+
+سررسید فیلدهای تاریخ (پیگیری و چک) ابتدای همان روز به وقت محلی حساب می‌شود.
+اقلامی که بعد از عبور بازه ساخته شوند ولی هنوز سررسیدشان نرسیده باشد در
+اجرای بعدی با شرط created_at پیدا می‌شوند؛ تغییر تاریخ سررسید اقلام قبلی
+دوباره اعلان نمی‌شود.
+"""
+import itertools
+import logging
+import operator
+import queue
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from financial.cache import bump_table_version
+from financial.models import FollowUp, PayableCheck, ReceivableCheck
+from .models import Task, Notification, ReminderCursor
+
+
+logger = logging.getLogger(__name__)
+
+# منبع یادآوری: (مدل، فیلد سررسید، فیلتر اقلام باز، فیلد گیرنده، فیلد عنوان)
+# گیرنده None یعنی همه کاربران فعال حسابداری و مدیریت
+REMINDER_SOURCES = {
+    'task_due': (Task, 'due_date', Q(status__in=['pending', 'in_progress']), 'assigned_to_id', 'title'),
+    'follow_up_due': (FollowUp, 'follow_up_date', Q(status__in=['pending', 'in_progress']), 'created_by_id', 'title'),
+    'payable_check_due': (PayableCheck, 'due_date', Q(status='issued'), None, 'check_number'),
+    'receivable_check_due': (ReceivableCheck, 'due_date', Q(status='received'), None, 'check_number'),
+}
+REMINDER_TITLES = {
+    'task_due': 'کارهای نزدیک به موعد',
+    'follow_up_due': 'پیگیری‌های نزدیک به موعد',
+    'payable_check_due': 'چک‌های پرداختنی نزدیک به سررسید',
+    'receivable_check_due': 'چک‌های دریافتنی نزدیک به سررسید',
+}
+
+SCAN_CHUNK_SIZE = 2000
+NOTIFICATION_BATCH_SIZE = 1000
+# حداکثر شناسه ذخیره‌شده در هر اعلان و عنوان نمایش‌داده‌شده در متن آن
+NOTIFICATION_ITEM_LIMIT = 100
+MESSAGE_ITEM_LIMIT = 5
+
+# نقطه پیشرفت یک منبع؛ فیلدهای window_* و recipient_after فقط وسط ثبت بازه‌ای که در چند دسته نوشته می‌شود مقدار دارند
+ReminderMark = namedtuple('ReminderMark', [
+    'high_water', 'last_run_at', 'window_start', 'window_end', 'window_run_at', 'recipient_after',
+])
+# یک دسته اعلان پیمایش؛ فقط وقتی ثبت می‌شود که نقطه پیشرفت هنوز previous_mark باشد و پس از ثبت next_mark می‌شود
+ReminderBatch = namedtuple('ReminderBatch', ['source', 'previous_mark', 'next_mark', 'notifications'])
+
+
+def lead_time():
+    return timedelta(hours=settings.REMINDER_LEAD_TIME_HOURS)
+
+
+def load_marks():
+    """نقطه پیشرفت همه منابع: {منبع: ReminderMark}"""
+    return {
+        source: ReminderMark(*mark)
+        for source, *mark in ReminderCursor.objects.values_list('source', *ReminderMark._fields)
+    }
+
+
+def _due_filter(model, field, start, end):
+    """شرط بازه (start, end] روی فیلد سررسید؛ برای فیلد تاریخ، روزهایی که ابتدایشان در بازه است"""
+    if model._meta.get_field(field).get_internal_type() == 'DateField':
+        first = timezone.localdate(start) + timedelta(days=1)
+        return Q(**{f'{field}__range': (first, timezone.localdate(end))})
+    return Q(**{f'{field}__gt': start, f'{field}__lte': end})
+
+
+def _staff_ids():
+    return list(
+        get_user_model().objects.filter(is_active=True, role__in=['management', 'accounting'])
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def _due_rows(source, start, end, now, created_after, recipient_after):
+    """(گیرنده، شناسه، عنوان) اقلام سررسید بازه و اقلام تازه‌ساخته بازه‌های گذشته به ترتیب گیرنده"""
+    model, field, open_filter, recipient_field, label_field = REMINDER_SOURCES[source]
+    condition = _due_filter(model, field, start, end)
+    if created_after is not None and start > now:
+        condition |= _due_filter(model, field, now, start) & Q(created_at__gt=created_after)
+    queryset = model.objects.filter(open_filter, condition)
+    if recipient_field is None:
+        return queryset.order_by(field, 'pk').values_list('pk', 'pk', label_field).iterator(chunk_size=SCAN_CHUNK_SIZE)
+    if recipient_after is not None:
+        queryset = queryset.filter(**{f'{recipient_field}__gt': recipient_after})
+    return (
+        queryset.order_by(recipient_field, field, 'pk')
+        .values_list(recipient_field, 'pk', label_field)
+        .iterator(chunk_size=SCAN_CHUNK_SIZE)
+    )
+
+
+def _add_item(group, pk, label):
+    _, item_ids, labels = group
+    group[0] += 1
+    if len(item_ids) < NOTIFICATION_ITEM_LIMIT:
+        item_ids.append(pk)
+    if len(labels) < MESSAGE_ITEM_LIMIT:
+        labels.append(str(label))
+
+
+def _recipient_groups(source, rows, staff_ids, recipient_after):
+    """(گیرنده، [تعداد، شناسه‌ها، عنوان‌ها]) به ترتیب گیرنده
+
+    اقلام بدون گیرنده مشخص در یک اعلان برای هر کاربر حسابداری و مدیریت جمع می‌شوند.
+    """
+    if REMINDER_SOURCES[source][3] is None:
+        group = [0, [], []]
+        for _, pk, label in rows:
+            _add_item(group, pk, label)
+        if group[0]:
+            yield from ((user_id, group) for user_id in staff_ids if recipient_after is None or user_id > recipient_after)
+        return
+    for user_id, items in itertools.groupby(rows, key=operator.itemgetter(0)):
+        group = [0, [], []]
+        for _, pk, label in items:
+            _add_item(group, pk, label)
+        yield user_id, group
+
+
+def _notification(source, user_id, group, start, end):
+    count, item_ids, labels = group
+    message = f'{count} مورد تا {timezone.localtime(end):%Y-%m-%d %H:%M} سررسید می‌شود: ' + '، '.join(labels)
+    if count > len(labels):
+        message += ' و ...'
+    return Notification(
+        user_id=user_id,
+        kind=source,
+        title=REMINDER_TITLES[source],
+        message=message,
+        item_count=count,
+        item_ids=item_ids,
+        window_start=start,
+        window_end=end,
+    )
+
+
+def scan_source(source, mark, now, staff_ids):
+    """پیمایش یک منبع از نقطه پیشرفت mark و ساخت دسته‌های اعلان (بدون ذخیره)
+
+    اعلان هر گیرنده با رسیدن به گیرنده بعدی کامل می‌شود و هر
+    NOTIFICATION_BATCH_SIZE اعلان یک دسته جدا است؛ دسته آخر، حتی اگر خالی
+    باشد، بازه را می‌بندد. اگر ثبت بازه قبلی نیمه‌تمام مانده باشد همان بازه
+    ذخیره‌شده (ابتدا، انتها و زمان پیمایش آن) از گیرنده بعد از آخرین گیرنده
+    ثبت‌شده ادامه می‌یابد تا گیرندگان باقی‌مانده همان اقلام گیرندگان قبلی را بگیرند.
+
+    اگر worker مدتی متوقف بوده باشد، اقلامی که در این مدت سررسیدشان گذشته
+    اعلان نمی‌شوند و بازه از اکنون شروع می‌شود.
+    """
+    high_water, last_run_at, start, end, run_at, recipient_after = mark or (now, now, None, None, None, None)
+    if end is None:
+        start, end, run_at = max(high_water, now), max(high_water, now + lead_time()), now
+    rows = _due_rows(source, start, end, run_at, last_run_at, recipient_after)
+
+    previous_mark, notifications = mark, []
+    for user_id, group in _recipient_groups(source, rows, staff_ids, recipient_after):
+        notifications.append(_notification(source, user_id, group, start, end))
+        if len(notifications) == NOTIFICATION_BATCH_SIZE:
+            next_mark = ReminderMark(high_water, last_run_at, start, end, run_at, user_id)
+            yield ReminderBatch(source, previous_mark, next_mark, notifications)
+            previous_mark, notifications = next_mark, []
+    yield ReminderBatch(source, previous_mark, ReminderMark(end, run_at, None, None, None, None), notifications)
+
+
+def scan(marks, now=None):
+    """پیمایش همه منابع از نقاط پیشرفت marks؛ دسته‌ها به محض آماده شدن برگردانده می‌شوند"""
+    now = now or timezone.now()
+    staff_ids = _staff_ids()
+    for source in REMINDER_SOURCES:
+        yield from scan_source(source, marks.get(source), now, staff_ids)
+
+
+def commit_batch(batch):
+    """ثبت اعلان‌های یک دسته و جابه‌جا کردن نقطه پیشرفت در یک تراکنش
+
+    اگر نقطه پیشرفت از زمان پیمایش تغییر کرده باشد (مثلاً worker دیگری همین
+    دسته را ثبت کرده است) چیزی ثبت نمی‌شود و None برگردانده می‌شود.
+    """
+    with transaction.atomic():
+        current = (
+            ReminderCursor.objects.select_for_update()
+            .filter(source=batch.source)
+            .values_list(*ReminderMark._fields)
+            .first()
+        )
+        if current != batch.previous_mark:
+            return None
+        if batch.notifications:
+            Notification.objects.bulk_create(batch.notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+            transaction.on_commit(lambda: bump_table_version(Notification))
+        ReminderCursor.objects.update_or_create(source=batch.source, defaults=batch.next_mark._asdict())
+    return len(batch.notifications)
+
+
+def run_reminders(now=None):
+    """یک اجرای کامل زمان‌بند؛ تعداد اعلان‌های ثبت‌شده برگردانده می‌شود"""
+    return sum(commit_batch(batch) or 0 for batch in scan(load_marks(), now))
+
+
+class ReminderWorker:
+    """worker ماندگار با صف داخلی پردازش
+    
+    رشته تولیدکننده در هر دوره منابع را پیمایش می‌کند و نتیجه را در صف می‌گذارد
+    و رشته مصرف‌کننده اعلان‌ها را ذخیره می‌کند، بنابراین پیمایش دوره بعد منتظر
+    نوشتن اعلان‌های دوره قبل نمی‌ماند. صف محدود است تا اگر نوشتن عقب بماند
+    پیمایش هم متوقف شود. نقاط پیشرفت در حافظه تولیدکننده جلو می‌روند و اگر
+    ثبت یک پیمایش شکست بخورد از پایگاه داده دوباره خوانده می‌شوند.
+    """
+    
+    def __init__(self, interval=None, queue_size=8):
+        self.interval = settings.REMINDER_INTERVAL_SECONDS if interval is None else interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.resync = threading.Event()
+        self.created = 0
+    
+    def produce(self):
+        marks = None
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    if marks is None or self.resync.is_set():
+                        self.resync.clear()
+                        marks = load_marks()
+                    for batch in scan(marks):
+                        self.queue.put(batch)
+                        marks[batch.source] = batch.next_mark
+                except Exception:
+                    logger.exception('Reminder scan failed')
+                    marks = None
+                self.stop_event.wait(self.interval)
+        finally:
+            self.queue.put(None)
+            connection.close()
+    
+    def consume(self):
+        try:
+            while (batch := self.queue.get()) is not None:
+                close_old_connections()
+                try:
+                    count = commit_batch(batch)
+                except Exception:
+                    logger.exception('Saving reminders for %s failed', batch.source)
+                    count = None
+                if count is None:
+                    self.resync.set()
+                else:
+                    self.created += count
+        finally:
+            connection.close()
+    
+    def run(self):
+        """اجرای worker تا فراخوانی stop()"""
+        threads = [
+            threading.Thread(target=self.produce, name='reminder-producer'),
+            threading.Thread(target=self.consume, name='reminder-consumer'),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    def stop(self):
+        self.stop_event.set()
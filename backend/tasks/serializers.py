@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from rest_framework import serializers
+
+from financial.serializers import EagerLoadingMixin
+from .models import *
+
+
+# تعداد نظرهای اخیر که همراه هر کار در لیست برگردانده می‌شود
+LATEST_COMMENTS_COUNT = 3
+
+
+def _count_subquery(model):
+    """شمارش ردیف‌های وابسته هر کار با زیرکوئری همبسته (بدون ضرب join ها در هم)"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class TaskCommentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """سریالایزر نظرات کار"""
+    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
+    
+    select_related_fields = ('created_by',)
+    related_only_fields = ('created_by__full_name',)
+    
+    class Meta:
+        model = TaskComment
+        fields = '__all__'
+        read_only_fields = ['task', 'created_by']
+
+
+class TaskAttachmentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """سریالایزر پیوست‌های کار"""
+    uploaded_by_name = serializers.CharField(source='uploaded_by.full_name', read_only=True)
+    
+    select_related_fields = ('uploaded_by',)
+    related_only_fields = ('uploaded_by__full_name',)
+    
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = TaskAttachment
+        fields = '__all__'
+        read_only_fields = ['task', 'uploaded_by', 'file_name', 'size', 'sha256']
+    
+    def get_download_url(self, obj):
+        url = reverse('task-attachment-download', kwargs={'task_pk': obj.task_id, 'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """سریالایزر جلسه آپلود تکه‌ای"""
+    offset = serializers.IntegerField(source='received_size', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'task', 'file_name', 'description', 'total_size', 'sha256', 'offset', 'chunk_size', 'created_at', 'updated_at']
+        read_only_fields = ['task']
+        extra_kwargs = {'total_size': {'min_value': 1}}
+    
+    def get_chunk_size(self, obj):
+        return settings.TASK_UPLOAD_CHUNK_SIZE
+
+
+class TaskSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """سریالایزر کارها"""
+    assigned_to_name = serializers.CharField(source='assigned_to.full_name', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
+    comment_count = serializers.SerializerMethodField()
+    attachment_count = serializers.SerializerMethodField()
+    latest_comments = serializers.SerializerMethodField()
+    
+    select_related_fields = ('assigned_to', 'created_by')
+    related_only_fields = ('assigned_to__full_name', 'created_by__full_name')
+    
+    class Meta:
+        model = Task
+        fields = '__all__'
+        read_only_fields = ['created_by', 'completed_at', 'is_completed']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """شمارش‌ها با زیرکوئری و آخرین نظرها با یک Prefetch برش‌خورده برای همه کارها"""
+        queryset = super().setup_eager_loading(queryset)
+        latest_comments = TaskComment.objects.select_related('created_by').order_by('-created_at', '-id')
+        return queryset.annotate(
+            comment_count=_count_subquery(TaskComment),
+            attachment_count=_count_subquery(TaskAttachment),
+        ).prefetch_related(
+            Prefetch('comments', queryset=latest_comments[:LATEST_COMMENTS_COUNT], to_attr='latest_comments'),
+        )
+    
+    # کاری که تازه ایجاد یا ویرایش شده حاشیه‌نویسی ندارد؛ مقدار از پایگاه داده خوانده می‌شود
+    def get_comment_count(self, obj):
+        count = getattr(obj, 'comment_count', None)
+        return obj.comments.count() if count is None else count
+    
+    def get_attachment_count(self, obj):
+        count = getattr(obj, 'attachment_count', None)
+        return obj.attachments.count() if count is None else count
+    
+    def get_latest_comments(self, obj):
+        comments = getattr(obj, 'latest_comments', None)
+        if comments is None:
+            comments = obj.comments.select_related('created_by').order_by('-created_at', '-id')[:LATEST_COMMENTS_COUNT]
+        return TaskCommentSerializer(comments, many=True, context=self.context).data
+
+
+class TaskBulkTransitionSerializer(serializers.Serializer):
+    """سریالایزر تغییر وضعیت گروهی کارها"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """سریالایزر اعلان‌ها"""
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    
+    class Meta:
+        model = Notification
+        exclude = ['user']
+        read_only_fields = [field.name for field in Notification._meta.fields if field.name != 'is_read']
@@ -1,3 +1,609 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from financial.models import PayableCheck
+from financial.tests import ConditionalGetAssertionsMixin, QueryCountAssertionsMixin
+from .models import *
+from .reminders import ReminderWorker, commit_batch, load_marks, run_reminders, scan, scan_source
+from .uploads import (
+    OffsetMismatchError, QuotaExceededError, UploadError, append_chunk, create_attachment, discard_unreferenced_files,
+    finish_session, start_session, store_content, user_usage,
+)
+
+
+class TaskTestMixin:
+    """ساخت کار و نظر برای تست‌های کارها"""
+    
+    @classmethod
+    def create_task(cls, assigned_to, created_by=None, days=1, **fields):
+        return Task.objects.create(
+            title=fields.pop('title', 'کار'), description='توضیحات', assigned_to=assigned_to,
+            created_by=created_by or assigned_to, due_date=timezone.now() + timedelta(days=days), **fields
+        )
+
+
+class TaskBoardTests(TaskTestMixin, QueryCountAssertionsMixin, TestCase):
+    """بورد کارها با تعداد ثابت کوئری"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='management')
+        cls.user = User.objects.create_user(username='worker', password='pass', role='accounting')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_rows(self, count):
+        for index in range(count):
+            task = self.create_task(self.user, self.manager, days=index, status=Task.STATUS_CHOICES[index % 4][0])
+            for _ in range(2):
+                TaskComment.objects.create(task=task, comment='نظر', created_by=self.manager)
+    
+    def test_board_loads_in_two_queries(self):
+        self.assertQueryCountIndependentOfRows(reverse('task-board'), self.create_rows)
+        # یک کوئری برای کارها با کاربران و شمارش‌ها و یک کوئری برای آخرین نظرها
+        self.assertEqual(self.count_queries(reverse('task-board')), 2)
+    
+    def test_board_columns(self):
+        self.create_rows(5)
+        self.create_task(self.manager)
+        response = self.client.get(reverse('task-board'))
+        columns = {column['status']: column['tasks'] for column in response.data['columns']}
+        self.assertEqual([status for status, _ in Task.STATUS_CHOICES], list(columns))
+        self.assertEqual([len(columns[status]) for status, _ in Task.STATUS_CHOICES], [2, 1, 1, 1])
+        self.assertEqual(columns['pending'][0]['comment_count'], 2)
+        self.assertFalse(response.data['truncated'])
+    
+    def test_management_can_view_another_users_board(self):
+        self.create_rows(2)
+        url = reverse('task-board')
+        self.assertEqual(sum(len(column['tasks']) for column in self.client.get(url, {'user': self.manager.pk}).data['columns']), 2)
+        
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(sum(len(column['tasks']) for column in self.client.get(url, {'user': self.user.pk}).data['columns']), 2)
+        self.assertEqual(sum(len(column['tasks']) for column in self.client.get(url, {'user': 'x'}).data['columns']), 0)
+
+
+class TaskVisibilityTests(TaskTestMixin, TestCase):
+    """کاربر غیرمدیر فقط کارهای محول‌شده یا ایجادشده توسط خودش را می‌بیند"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='management')
+        cls.user = User.objects.create_user(username='worker', password='pass', role='accounting')
+        cls.other = User.objects.create_user(username='other', password='pass', role='accounting')
+        cls.assigned = cls.create_task(cls.user, cls.manager)
+        cls.created = cls.create_task(cls.other, cls.user)
+        cls.hidden = cls.create_task(cls.other, cls.manager)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def test_list_and_detail(self):
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual({row['id'] for row in response.data['results']}, {self.assigned.pk, self.created.pk})
+        self.assertEqual(self.client.get(reverse('task-detail', args=[self.hidden.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('task-comment-list', args=[self.hidden.pk])).status_code, 404)
+        
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(len(self.client.get(reverse('task-list')).data['results']), 3)
+        self.assertEqual(self.client.get(reverse('task-detail', args=[self.hidden.pk])).status_code, 200)
+    
+    def test_comments_of_a_visible_task(self):
+        TaskComment.objects.create(task=self.assigned, comment='نظر', created_by=self.manager)
+        TaskComment.objects.create(task=self.hidden, comment='نظر دیگر', created_by=self.manager)
+        response = self.client.get(reverse('task-comment-list', args=[self.assigned.pk]))
+        self.assertEqual([row['comment'] for row in response.data['results']], ['نظر'])
+
+
+class TaskConditionalGetTests(TaskTestMixin, ConditionalGetAssertionsMixin, TestCase):
+    """نوشتن‌های بدون سیگنال هم ETag کارها و اعلان‌ها را باطل می‌کنند"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='management')
+        cls.user = User.objects.create_user(username='worker', password='pass', role='accounting')
+        cls.task = cls.create_task(cls.user, cls.manager)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def test_queryset_update_changes_the_etag(self):
+        for url, priority in ((reverse('task-list'), 'high'), (reverse('task-detail', args=[self.task.pk]), 'low')):
+            etag = self.get_etag(url)
+            self.assertNotModified(url, etag)
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.filter(pk=self.task.pk).update(priority=priority)
+            self.assertModified(url, etag)
+    
+    def test_reassigned_task_is_not_served_as_not_modified(self):
+        url = reverse('task-detail', args=[self.task.pk])
+        etag = self.get_etag(url)
+        # نوشتنی که نسخه جدول را تغییر نمی‌دهد؛ دسترسی پیش از مقایسه ETag بررسی می‌شود
+        models.QuerySet.update(Task.objects.filter(pk=self.task.pk), assigned_to=self.manager)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+    
+    def test_mark_read_changes_the_etag(self):
+        now = timezone.now()
+        Notification.objects.create(
+            user=self.user, kind='task_due', title='سررسید', message='-', window_start=now, window_end=now,
+        )
+        url = reverse('notification-list')
+        etag = self.get_etag(url)
+        self.assertNotModified(url, etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(reverse('notification-mark-read'), {}, format='json').data, {'updated': 1})
+        self.assertTrue(self.assertModified(url, etag).data['results'][0]['is_read'])
+
+
+class TaskTransitionTests(TaskTestMixin, TestCase):
+    """تغییر وضعیت گروهی همان نتیجه ذخیره تک‌تک کارها را دارد"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='management')
+        cls.completed_at = timezone.now() - timedelta(days=3)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+    
+    def create_tasks(self):
+        tasks = [self.create_task(self.manager, status=status) for status in ('pending', 'in_progress', 'completed')]
+        Task.objects.filter(pk=tasks[2].pk).update(completed_at=self.completed_at)
+        # کاری که قبلاً تکمیل و دوباره باز شده است
+        tasks.append(self.create_task(self.manager, status='pending'))
+        Task.objects.filter(pk=tasks[3].pk).update(completed_at=self.completed_at)
+        return [task.pk for task in tasks]
+    
+    def state(self, ids, since):
+        rows = Task.objects.in_bulk(ids)
+        return [
+            (
+                rows[pk].status, rows[pk].is_completed,
+                'old' if rows[pk].completed_at == self.completed_at else 'new' if rows[pk].completed_at and rows[pk].completed_at >= since else rows[pk].completed_at,
+            )
+            for pk in ids
+        ]
+    
+    def test_bulk_and_single_row_transitions_agree(self):
+        bulk_ids, single_ids = self.create_tasks(), self.create_tasks()
+        since = timezone.now()
+        for status in ('completed', 'pending', 'in_progress', 'completed', 'cancelled'):
+            with self.subTest(status):
+                response = self.client.post(reverse('task-bulk-transition'), {'ids': bulk_ids, 'status': status}, format='json')
+                self.assertEqual(response.status_code, 200, response.content)
+                for pk in single_ids:
+                    response = self.client.patch(reverse('task-detail', args=[pk]), {'status': status}, format='json')
+                    self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(self.state(bulk_ids, since), self.state(single_ids, since))
+        self.assertEqual(self.state(bulk_ids, since), [
+            ('cancelled', False, 'new'), ('cancelled', False, 'new'), ('cancelled', False, 'old'), ('cancelled', False, 'old'),
+        ])
+    
+    def test_update_does_not_derive_completion_fields(self):
+        pk = self.create_tasks()[0]
+        Task.objects.filter(pk=pk).update(status='completed')
+        self.assertEqual(Task.objects.values_list('is_completed', 'completed_at').get(pk=pk), (False, None))
+    
+    def test_bulk_transition_is_all_or_nothing(self):
+        ids = self.create_tasks()
+        other = User.objects.create_user(username='other', password='pass')
+        self.client.force_authenticate(other)
+        visible = self.create_task(other)
+        response = self.client.post(reverse('task-bulk-transition'), {'ids': [visible.pk, ids[0]], 'status': 'completed'}, format='json')
+        self.assertEqual((response.status_code, response.data['not_found']), (404, [ids[0]]))
+        self.assertEqual(Task.objects.get(pk=visible.pk).status, 'pending')
+
+
+class UploadTestMixin(TaskTestMixin):
+    """پوشه رسانه موقت و کار نمونه برای تست‌های آپلود"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='uploader', password='pass', role='accounting')
+        cls.task = cls.create_task(cls.user)
+    
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, TASK_ATTACHMENT_ACCEL_PREFIX='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = Path(media_root)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def start(self, content, **fields):
+        response = self.client.post(reverse('task-upload-create', args=[self.task.pk]), {
+            'file_name': 'report.bin', 'total_size': len(content), **fields,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return reverse('task-upload-detail', args=[response.data['id']])
+    
+    def put(self, url, chunk, offset):
+        return self.client.generic('PUT', url, chunk, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+    
+    def stored_files(self):
+        return sorted(path.name for path in (self.media_root / 'task_attachments').rglob('*') if path.is_file())
+
+
+class ChunkedUploadTests(UploadTestMixin, TestCase):
+    """پروتکل آپلود تکه‌ای و قابل ادامه"""
+    
+    content = bytes(range(256)) * 40
+    
+    def test_upload_in_chunks(self):
+        url = self.start(self.content, sha256=hashlib.sha256(self.content).hexdigest())
+        response = self.put(url, self.content[:4000], 0)
+        self.assertEqual((response.status_code, response.data['offset']), (200, 4000))
+        self.assertEqual(self.client.get(url).data['offset'], 4000)
+        
+        response = self.put(url, self.content[:10], 0)
+        self.assertEqual((response.status_code, response.data['offset']), (409, 4000))
+        self.assertEqual(self.put(url, self.content[4000:] + b'extra', 4000).status_code, 400)
+        
+        response = self.put(url, self.content[4000:], 4000)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.data['size'], response.data['sha256']), (len(self.content), hashlib.sha256(self.content).hexdigest()))
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(list((self.media_root / 'upload_sessions').iterdir()), [])
+        attachment = TaskAttachment.objects.get()
+        with attachment.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+    
+    def test_declared_hash_mismatch_discards_session(self):
+        url = self.start(self.content, sha256='0' * 64)
+        self.assertEqual(self.put(url, self.content, 0).status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(TaskAttachment.objects.exists())
+    
+    def test_no_transaction_is_open_while_reading_the_body(self):
+        session = start_session(self.task, self.user, 'report.bin', len(self.content))
+        baseline = list(connection.savepoint_ids)
+        
+        class CompetingStream(io.BytesIO):
+            """جریانی که وسط دریافت، درخواست دیگری همان offset را ثبت می‌کند"""
+            
+            def read(inner, size=-1):
+                self.assertEqual(connection.savepoint_ids, baseline)
+                if not inner.tell():
+                    append_chunk(UploadSession.objects.get(pk=session.pk), io.BytesIO(b'B' * 100), 0, 100)
+                return super().read(size)
+        
+        with self.assertRaises(OffsetMismatchError) as raised:
+            append_chunk(session, CompetingStream(b'A' * 100), 0, 100)
+        self.assertEqual(raised.exception.expected, 100)
+        session.refresh_from_db()
+        self.assertEqual(session.received_size, 100)
+        self.assertEqual(
+            [path.name for path in (self.media_root / 'upload_sessions').iterdir()],
+            [f'{session.pk}.000000000000000.chunk'],
+        )
+        self.assertEqual((self.media_root / 'upload_sessions' / f'{session.pk}.000000000000000.chunk').read_bytes(), b'B' * 100)
+    
+    def test_chunks_are_copied_outside_the_transaction(self):
+        session = start_session(self.task, self.user, 'report.bin', len(self.content))
+        baseline = list(connection.savepoint_ids)
+        copyfileobj = shutil.copyfileobj
+        
+        def copy(*args, **kwargs):
+            self.assertEqual(connection.savepoint_ids, baseline)
+            return copyfileobj(*args, **kwargs)
+        
+        with mock.patch('tasks.uploads.shutil.copyfileobj', side_effect=copy) as copied:
+            append_chunk(session, io.BytesIO(self.content[:4000]), 0, 4000)
+            append_chunk(session, io.BytesIO(self.content[4000:]), 4000, len(self.content) - 4000)
+            attachment = finish_session(session)
+        self.assertTrue(copied.called)
+        with attachment.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+    
+    def test_missing_chunk_discards_session(self):
+        session = start_session(self.task, self.user, 'report.bin', len(self.content))
+        append_chunk(session, io.BytesIO(self.content[:4000]), 0, 4000)
+        append_chunk(session, io.BytesIO(self.content[4000:]), 4000, len(self.content) - 4000)
+        (self.media_root / 'upload_sessions' / f'{session.pk}.000000000004000.chunk').unlink()
+        with self.assertRaises(UploadError):
+            finish_session(session)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(list((self.media_root / 'upload_sessions').iterdir()), [])
+    
+    def test_interrupted_chunk_keeps_received_bytes(self):
+        session = start_session(self.task, self.user, 'report.bin', len(self.content))
+        
+        class BrokenStream(io.BytesIO):
+            def read(inner, size=-1):
+                if inner.tell():
+                    raise OSError('connection reset')
+                return super().read(size)
+        
+        with mock.patch('tasks.uploads.COPY_BUFFER_SIZE', 1000), self.assertRaises(OSError):
+            append_chunk(session, BrokenStream(self.content), 0, len(self.content))
+        session.refresh_from_db()
+        self.assertEqual(session.received_size, 1000)
+    
+    def test_identical_content_is_stored_once(self):
+        for name in ('a.bin', 'b.bin'):
+            response = self.client.post(reverse('task-attachment-list', args=[self.task.pk]), {
+                'file': SimpleUploadedFile(name, self.content),
+            }, format='multipart')
+            self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.stored_files(), [hashlib.sha256(self.content).hexdigest()])
+        self.assertEqual(len(set(TaskAttachment.objects.values_list('file', flat=True))), 1)
+    
+    def test_concurrent_store_of_the_same_content_keeps_one_file(self):
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        first = store_content(io.BytesIO(self.content), sha256)
+        exists = default_storage.exists
+        checks = []
+        
+        def exists_before_first_save(name):
+            # آپلود همزمان: بررسی وجود فایل پیش از ذخیره آپلود اول انجام شده است
+            checks.append(name)
+            return len(checks) > 1 and exists(name)
+        
+        with mock.patch.object(default_storage, 'exists', side_effect=exists_before_first_save):
+            second = store_content(io.BytesIO(self.content), sha256)
+        self.assertEqual(first, second)
+        self.assertEqual(self.stored_files(), [sha256])
+
+
+@override_settings(TASK_ATTACHMENT_QUOTA=1000)
+class UploadQuotaTests(UploadTestMixin, TestCase):
+    """سهمیه آپلود شامل پیوست‌ها و حجم رزروشده جلسه‌های باز"""
+    
+    def upload(self, size):
+        return self.client.post(reverse('task-attachment-list', args=[self.task.pk]), {
+            'file': SimpleUploadedFile('file.bin', b'x' * size),
+        }, format='multipart')
+    
+    def test_sessions_reserve_quota(self):
+        self.start(b'x' * 600)
+        response = self.client.post(reverse('task-upload-create', args=[self.task.pk]), {
+            'file_name': 'big.bin', 'total_size': 500,
+        }, format='json')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.upload(500).status_code, 413)
+        self.assertEqual(self.upload(400).status_code, 201)
+        self.assertEqual(self.upload(1).status_code, 413)
+    
+    def test_quota_is_checked_again_when_the_attachment_is_created(self):
+        def store_while_another_upload_starts(fileobj, sha256):
+            # آپلود همزمانی که پس از بررسی زودهنگام سهمیه را پر می‌کند
+            start_session(self.task, self.user, 'other.bin', 700)
+            return 'task_attachments/other'
+        
+        with mock.patch('tasks.uploads.store_content', side_effect=store_while_another_upload_starts):
+            self.assertEqual(self.upload(400).status_code, 413)
+        self.assertFalse(TaskAttachment.objects.exists())
+        with self.assertRaises(QuotaExceededError):
+            create_attachment(self.task, self.user, io.BytesIO(b'x' * 301), 'late.bin', 301)
+    
+    def test_finishing_a_session_does_not_count_it_twice(self):
+        url = self.start(b'x' * 1000)
+        self.assertEqual(self.put(url, b'x' * 1000, 0).status_code, 201)
+        self.assertEqual(self.upload(1).status_code, 413)
+    
+    def test_shared_file_is_counted_once(self):
+        self.assertEqual(self.upload(600).status_code, 201)
+        create_attachment(self.task, self.user, io.BytesIO(b'x' * 600), 'copy.bin', 600)
+        self.assertEqual(TaskAttachment.objects.count(), 2)
+        self.assertEqual(user_usage(self.user), 600)
+        self.assertEqual(self.upload(401).status_code, 413)
+        self.assertEqual(self.upload(400).status_code, 201)
+
+
+class UnreferencedFileCleanupTests(UploadTestMixin, TestCase):
+    """حذف فایل‌های محتوایی که آخرین پیوستشان حذف شده است"""
+    
+    def attach(self, content):
+        return create_attachment(self.task, self.user, io.BytesIO(content), 'file.bin', len(content))
+    
+    def test_file_is_removed_with_its_last_attachment(self):
+        first, second = self.attach(b'shared'), self.attach(b'shared')
+        kept = self.attach(b'kept')
+        later = timezone.now() + timedelta(hours=2)
+        first.delete()
+        with mock.patch('tasks.uploads.timezone.now', return_value=later):
+            self.assertEqual(discard_unreferenced_files(), 0)
+        second.delete()
+        self.assertEqual(discard_unreferenced_files(), 0)
+        with mock.patch('tasks.uploads.timezone.now', return_value=later):
+            self.assertEqual(discard_unreferenced_files(), 1)
+        self.assertEqual(self.stored_files(), [kept.sha256])
+        with kept.file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'kept')
+    
+    def test_reused_file_is_not_removed(self):
+        attachment = self.attach(b'shared')
+        path = self.media_root / attachment.file.name
+        old = (timezone.now() - timedelta(hours=2)).timestamp()
+        os.utime(path, (old, old))
+        attachment.delete()
+        # همان محتوا دوباره ذخیره می‌شود ولی ردیف پیوست هنوز ساخته نشده است
+        self.assertEqual(store_content(io.BytesIO(b'shared'), attachment.sha256), attachment.file.name)
+        self.assertEqual(discard_unreferenced_files(), 0)
+        self.assertTrue(path.exists())
+
+
+class AttachmentDownloadTests(UploadTestMixin, TestCase):
+    """دریافت پیوست با پشتیبانی از Range"""
+    
+    content = b'0123456789' * 10
+    
+    def setUp(self):
+        super().setUp()
+        self.attachment = create_attachment(self.task, self.user, io.BytesIO(self.content), 'notes.txt', len(self.content))
+        self.url = reverse('task-attachment-download', args=[self.task.pk, self.attachment.pk])
+    
+    def download(self, **headers):
+        response = self.client.get(self.url, **headers)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+    
+    def test_full_download(self):
+        response, body = self.download()
+        self.assertEqual((response.status_code, body), (200, self.content))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.attachment.sha256}"')
+    
+    def test_ranges(self):
+        for header, content_range, expected in [
+            ('bytes=10-19', 'bytes 10-19/100', self.content[10:20]),
+            ('bytes=95-', 'bytes 95-99/100', self.content[95:]),
+            ('bytes=-5', 'bytes 95-99/100', self.content[95:]),
+            ('bytes=90-500', 'bytes 90-99/100', self.content[90:]),
+        ]:
+            with self.subTest(header):
+                response, body = self.download(HTTP_RANGE=header)
+                self.assertEqual((response.status_code, response['Content-Range'], body), (206, content_range, expected))
+                self.assertEqual(response['Content-Length'], str(len(expected)))
+    
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=100-', 'bytes=-0', 'bytes=-'):
+            with self.subTest(header):
+                response, _ = self.download(HTTP_RANGE=header)
+                self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */100'))
+    
+    def test_accel_redirect(self):
+        with self.settings(TASK_ATTACHMENT_ACCEL_PREFIX='/protected/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.attachment.file.name}')
+        self.assertEqual(response.content, b'')
+
+
+class ReminderTests(TaskTestMixin, TestCase):
+    """زمان‌بند یادآوری سررسیدها"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'user{index}', password='pass') for index in range(3)]
+        User.objects.create_user(username='inactive', password='pass', is_active=False)
+    
+    def setUp(self):
+        self.now = timezone.now()
+    
+    def create_task(self, assigned_to, hours, **fields):
+        return Task.objects.create(
+            title=fields.pop('title', 'کار'), description='توضیحات', assigned_to=assigned_to, created_by=assigned_to,
+            due_date=self.now + timedelta(hours=hours), **fields
+        )
+    
+    def run(self, result=None):
+        # اعلان‌ها پس از ثبت تراکنش نسخه جدول را افزایش می‌دهند
+        with mock.patch('tasks.reminders.bump_table_version'):
+            return super().run(result)
+    
+    def task_notifications(self):
+        return sorted((user_id, item_ids) for user_id, item_ids in Notification.objects.filter(kind='task_due').values_list('user_id', 'item_ids'))
+    
+    def test_each_window_is_notified_once(self):
+        soon = self.create_task(self.users[0], hours=2)
+        later = self.create_task(self.users[0], hours=30)
+        self.create_task(self.users[1], hours=3, status='completed')
+        self.create_task(self.users[1], hours=-1)
+        
+        first_run = timezone.now()
+        self.assertEqual(run_reminders(first_run), 1)
+        self.assertEqual(self.task_notifications(), [(self.users[0].pk, [soon.pk])])
+        cursor = ReminderCursor.objects.get(source='task_due')
+        self.assertEqual((cursor.high_water, cursor.last_run_at), (first_run + timedelta(hours=24), first_run))
+        
+        self.assertEqual(run_reminders(first_run + timedelta(minutes=1)), 0)
+        self.assertEqual(run_reminders(first_run + timedelta(hours=7)), 1)
+        self.assertEqual(self.task_notifications(), [(self.users[0].pk, [soon.pk]), (self.users[0].pk, [later.pk])])
+    
+    def test_items_created_inside_a_past_window_are_caught_up(self):
+        run_reminders(self.now)
+        late = self.create_task(self.users[1], hours=5)
+        self.create_task(self.users[1], hours=-1)
+        self.assertEqual(run_reminders(timezone.now()), 1)
+        self.assertEqual(self.task_notifications(), [(self.users[1].pk, [late.pk])])
+        self.assertEqual(run_reminders(timezone.now()), 0)
+    
+    def test_staff_fan_out(self):
+        PayableCheck.objects.create(check_number='P-1', amount=1, payee='تامین‌کننده', due_date=timezone.localdate(self.now) + timedelta(days=1), bank_name='بانک')
+        PayableCheck.objects.create(check_number='P-2', amount=1, payee='تامین‌کننده', due_date=timezone.localdate(self.now) + timedelta(days=1), bank_name='بانک', status='paid')
+        self.assertEqual(run_reminders(self.now), 3)
+        notifications = Notification.objects.filter(kind='payable_check_due')
+        self.assertEqual(sorted(notifications.values_list('user_id', flat=True)), [user.pk for user in self.users])
+        self.assertEqual({(notification.item_count, notification.message.endswith('P-1')) for notification in notifications}, {(1, True)})
+    
+    def test_batches_resume_after_the_last_committed_recipient(self):
+        tasks = [self.create_task(user, hours=2) for user in self.users for _ in range(2)]
+        # سررسید بین ابتدای بازه قطع‌شده و زمان ادامه آن
+        tasks.append(self.create_task(self.users[2], hours=0.5))
+        with mock.patch('tasks.reminders.NOTIFICATION_BATCH_SIZE', 2):
+            batches = list(scan_source('task_due', None, self.now, []))
+            self.assertEqual([len(batch.notifications) for batch in batches], [2, 1])
+            self.assertEqual(batches[0].next_mark.recipient_after, self.users[1].pk)
+            self.assertEqual(batches[-1].next_mark.recipient_after, None)
+            
+            # فقط دسته اول ثبت شده و worker متوقف شده است
+            self.assertEqual(commit_batch(batches[0]), 2)
+            resumed = list(scan(load_marks(), self.now + timedelta(hours=1)))
+        task_batches = [batch for batch in resumed if batch.source == 'task_due']
+        self.assertEqual(task_batches[0].next_mark.high_water, self.now + timedelta(hours=24))
+        self.assertEqual(task_batches[0].next_mark.last_run_at, self.now)
+        self.assertEqual([commit_batch(batch) for batch in resumed], [1, 0, 0, 0])
+        self.assertEqual(self.task_notifications(), [
+            (user.pk, [task.pk for task in sorted(tasks, key=lambda task: task.due_date) if task.assigned_to_id == user.pk])
+            for user in self.users
+        ])
+    
+    def test_staff_fan_out_in_batches(self):
+        PayableCheck.objects.create(check_number='P-3', amount=1, payee='تامین‌کننده', due_date=timezone.localdate(self.now) + timedelta(days=1), bank_name='بانک')
+        with mock.patch('tasks.reminders.NOTIFICATION_BATCH_SIZE', 2):
+            self.assertEqual(commit_batch(next(scan_source('payable_check_due', None, self.now, [user.pk for user in self.users]))), 2)
+            self.assertEqual(run_reminders(self.now), 1)
+        self.assertEqual(sorted(Notification.objects.values_list('user_id', flat=True)), [user.pk for user in self.users])
+    
+    def test_conflicting_batch_is_dropped(self):
+        self.create_task(self.users[0], hours=2)
+        batches = list(scan(load_marks(), self.now))
+        stale = list(scan(load_marks(), self.now + timedelta(seconds=1)))
+        self.assertEqual(sum(commit_batch(batch) for batch in batches), 1)
+        self.assertEqual([commit_batch(batch) for batch in stale], [None] * len(stale))
+        self.assertEqual(Notification.objects.count(), 1)
+    
+    @mock.patch('tasks.reminders.connection')
+    @mock.patch('tasks.reminders.close_old_connections')
+    def test_worker_resyncs_after_a_conflict(self, *mocks):
+        worker = ReminderWorker(interval=0, queue_size=0)
+        waits = []
+        
+        def wait(timeout):
+            waits.append(timeout)
+            if len(waits) == 1:
+                # worker دیگری همین بازه را زودتر ثبت می‌کند و مصرف‌کننده ناسازگاری را گزارش می‌دهد
+                run_reminders(timezone.now())
+                self.create_task(self.users[2], hours=3)
+                worker.resync.set()
+            else:
+                worker.stop_event.set()
+        
+        self.create_task(self.users[0], hours=2)
+        with mock.patch.object(worker.stop_event, 'wait', side_effect=wait):
+            worker.produce()
+        worker.consume()
+        self.assertEqual(worker.created, 1)
+        self.assertTrue(worker.resync.is_set())
+        self.assertEqual(sorted(Notification.objects.values_list('user_id', flat=True)), [self.users[0].pk, self.users[2].pk])
@@ -0,0 +1,359 @@
+"""آپلود تکه‌ای، ذخیره بدون تکرار و ارسال جریانی پیوست‌های کار
+
+داده‌ها همیشه تکه‌تکه بین درخواست، فایل موقت و محل ذخیره جابه‌جا می‌شوند تا
+فایل‌های حجیم در حافظه پردازش نگه داشته نشوند.
+
+پیوست‌های با محتوای یکسان به یک فایل اشاره می‌کنند؛ سهمیه هر فایل را یک بار
+حساب می‌کند و فایلی که دیگر پیوستی به آن اشاره نمی‌کند با
+discard_unreferenced_files (فرمان cleanup_upload_sessions) حذف می‌شود.
+"""
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import TaskAttachment, UploadSession
+
+
+COPY_BUFFER_SIZE = 64 * 1024
+ATTACHMENT_DIRECTORY = 'task_attachments'
+# جلسه‌هایی که این مدت تکه‌ای دریافت نکرده‌اند رهاشده حساب می‌شوند
+STALE_SESSION_AGE = timedelta(days=1)
+# فایل بدون پیوست تا این مدت پس از آخرین استفاده نگه داشته می‌شود؛ پیوستی که محتوایش
+# ذخیره شده ولی ردیفش هنوز ساخته نشده در این فاصله ثبت می‌شود
+UNREFERENCED_FILE_AGE = timedelta(hours=1)
+
+_RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(ValueError):
+    """درخواست آپلود نامعتبر"""
+
+
+class QuotaExceededError(UploadError):
+    """سهمیه آپلود کاربر تمام شده است"""
+
+
+class OffsetMismatchError(UploadError):
+    """تکه ارسالی از محل فعلی جلسه آپلود شروع نمی‌شود"""
+    
+    def __init__(self, expected):
+        super().__init__(f'تکه باید از بایت {expected} شروع شود.')
+        self.expected = expected
+
+
+def user_usage(user):
+    """حجم فایل‌های پیوست‌های کاربر (هر فایل مشترک یک بار) به اضافه حجم رزروشده جلسه‌های آپلود باز"""
+    files = TaskAttachment.objects.filter(uploaded_by=user).values('file', 'size').distinct()
+    attachments = files.aggregate(total=Sum('size'))['total'] or 0
+    sessions = UploadSession.objects.filter(user=user).aggregate(total=Sum('total_size'))['total'] or 0
+    return attachments + sessions
+
+
+def check_quota(user, size):
+    """بررسی سهمیه بدون قفل؛ فقط برای رد زودهنگام، ثبت نهایی با reserve_quota است"""
+    usage = user_usage(user)
+    if usage + size > settings.TASK_ATTACHMENT_QUOTA:
+        raise QuotaExceededError(
+            f'سهمیه آپلود کافی نیست: {usage} از {settings.TASK_ATTACHMENT_QUOTA} بایت استفاده شده است.'
+        )
+
+
+def reserve_quota(user, size, name=None):
+    """بررسی سهمیه زیر قفل ردیف کاربر؛ داخل transaction.atomic و پیش از ساخت پیوست یا جلسه
+
+    آپلودهای همزمان یک کاربر پشت این قفل صف می‌کشند تا هر دو از یک سهمیه
+    باقیمانده عبور نکنند. اگر کاربر پیوستی به همان فایل ذخیره‌شده name داشته
+    باشد، پیوست تازه حجمی به مصرف او اضافه نمی‌کند.
+    """
+    list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk'))
+    if name is not None and TaskAttachment.objects.filter(uploaded_by=user, file=name).exists():
+        return
+    check_quota(user, size)
+
+
+def _chunks(fileobj):
+    if hasattr(fileobj, 'chunks'):
+        yield from fileobj.chunks(COPY_BUFFER_SIZE)
+        return
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(COPY_BUFFER_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def file_sha256(fileobj):
+    digest = hashlib.sha256()
+    for chunk in _chunks(fileobj):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _touch(name):
+    """به‌روز کردن زمان تغییر فایلی که دوباره استفاده می‌شود تا پاک‌سازی فایل‌های بدون پیوست آن را حذف نکند"""
+    try:
+        os.utime(default_storage.path(name))
+    except NotImplementedError:
+        pass
+
+
+def store_content(fileobj, sha256):
+    """ذخیره محتوا با نام مبتنی بر هش؛ اگر همین محتوا قبلاً ذخیره شده باشد دوباره نوشته نمی‌شود"""
+    existing = TaskAttachment.objects.filter(sha256=sha256).values_list('file', flat=True).first()
+    if existing and default_storage.exists(existing):
+        _touch(existing)
+        return existing
+    name = f'{ATTACHMENT_DIRECTORY}/{sha256[:2]}/{sha256}'
+    if default_storage.exists(name):
+        _touch(name)
+        return name
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    saved = default_storage.save(name, fileobj if isinstance(fileobj, File) else File(fileobj))
+    if saved != name:
+        # آپلود همزمان همین محتوا بین بررسی و ذخیره نام هش را گرفته است؛ نسخه تکراری حذف می‌شود
+        default_storage.delete(saved)
+    return name
+
+
+def create_attachment(task, user, fileobj, file_name, size, description='', sha256=None, session=None):
+    """ساخت پیوست از یک فایل (آپلود معمولی یا فایل موقت جلسه آپلود تکه‌ای)
+
+    محتوا بیرون از تراکنش ذخیره می‌شود. سهمیه آپلود معمولی زیر قفل کاربر
+    بررسی می‌شود؛ حجم جلسه آپلود از قبل رزرو شده و جلسه همراه ساخت پیوست حذف
+    می‌شود. اگر سهمیه رد شود فایل ذخیره‌شده می‌ماند تا پیوست‌های همزمانی که به
+    همان محتوا اشاره می‌کنند خراب نشوند.
+    """
+    sha256 = sha256 or file_sha256(fileobj)
+    name = store_content(fileobj, sha256)
+    with transaction.atomic():
+        if session is None:
+            reserve_quota(user, size, name)
+        else:
+            session.delete()
+        return TaskAttachment.objects.create(
+            task=task,
+            file=name,
+            file_name=os.path.basename(file_name)[:255],
+            size=size,
+            sha256=sha256,
+            description=description,
+            uploaded_by=user,
+        )
+
+
+# Upload sessions
+def session_directory():
+    """پوشه فایل‌های موقت جلسه‌های آپلود روی دیسک محلی"""
+    directory = Path(settings.MEDIA_ROOT) / 'upload_sessions'
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def session_path(session):
+    """مسیر فایل کامل جلسه که هنگام پایان آپلود از تکه‌ها ساخته می‌شود"""
+    return session_directory() / f'{session.pk}.part'
+
+
+def chunk_path(session, offset):
+    """مسیر تکه ثبت‌شده جلسه از بایت offset؛ نام‌ها به ترتیب offset مرتب می‌شوند"""
+    return session_directory() / f'{session.pk}.{offset:015d}.chunk'
+
+
+def start_session(task, user, file_name, total_size, sha256='', description=''):
+    if total_size <= 0:
+        raise UploadError('حجم فایل باید بیشتر از صفر باشد.')
+    if sha256 and not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        raise UploadError('هش SHA-256 باید ۶۴ نویسه هگز کوچک باشد.')
+    with transaction.atomic():
+        reserve_quota(user, total_size)
+        return UploadSession.objects.create(
+            task=task,
+            user=user,
+            file_name=os.path.basename(file_name)[:255],
+            description=description,
+            total_size=total_size,
+            sha256=sha256,
+        )
+
+
+def append_chunk(session, stream, offset, length):
+    """دریافت یک تکه از جریان درخواست و ثبت آن از بایت offset
+
+    در طول دریافت بدنه درخواست هیچ تراکنشی باز نیست: تکه در فایل موقت جداگانه
+    نوشته می‌شود و سپس فقط با UPDATE شرطی روی received_size ثبت می‌شود. از دو
+    درخواست همزمان با یک offset فقط یکی جلسه را جلو می‌برد و تکه‌اش را نگه
+    می‌دارد؛ دیگری OffsetMismatchError می‌گیرد. اگر اتصال وسط تکه قطع شود،
+    بایت‌های دریافت‌شده ثبت می‌شوند و کلاینت از محل جدید ادامه می‌دهد.
+    """
+    session.refresh_from_db(fields=['received_size', 'total_size'])
+    if offset != session.received_size:
+        raise OffsetMismatchError(session.received_size)
+    if length is None or offset + length > session.total_size:
+        raise UploadError('طول تکه نامعتبر است یا از حجم اعلام‌شده فایل بیشتر است.')
+
+    spool_path = session_directory() / f'{session.pk}.{uuid.uuid4().hex}.tmp'
+    written = 0
+    try:
+        try:
+            with open(spool_path, 'wb') as spool:
+                while written < length:
+                    chunk = stream.read(min(COPY_BUFFER_SIZE, length - written))
+                    if not chunk:
+                        break
+                    spool.write(chunk)
+                    written += len(chunk)
+        finally:
+            if written:
+                commit_chunk(session, spool_path, offset, written)
+    finally:
+        spool_path.unlink(missing_ok=True)
+    return session
+
+
+def commit_chunk(session, spool_path, offset, written):
+    """ثبت تکه نوشته‌شده: فقط جلو بردن received_size در تراکنش و سپس تغییر نام فایل تکه
+
+    جلسه از offset فقط یک بار جلو می‌رود، پس پس از ثبت هیچ درخواست دیگری نام
+    تکه همین offset را نمی‌گیرد. اگر پردازش بین ثبت و تغییر نام متوقف شود،
+    finish_session جای خالی را تشخیص می‌دهد و جلسه باید از نو شروع شود.
+    """
+    with transaction.atomic():
+        advanced = UploadSession.objects.filter(pk=session.pk, received_size=offset).update(
+            received_size=offset + written, updated_at=timezone.now(),
+        )
+        if not advanced:
+            received_size = UploadSession.objects.filter(pk=session.pk).values_list('received_size', flat=True).first()
+            if received_size is None:
+                raise UploadError('جلسه آپلود حذف شده است.')
+            raise OffsetMismatchError(received_size)
+    os.replace(spool_path, chunk_path(session, offset))
+    session.received_size = offset + written
+
+
+def assemble_session(session):
+    """ساخت فایل کامل جلسه از تکه‌های ثبت‌شده؛ تکه گم‌شده UploadError می‌دهد"""
+    path = session_path(session)
+    chunks = sorted(session_directory().glob(f'{session.pk}.*.chunk'))
+    with open(path, 'wb') as part:
+        for committed in chunks:
+            if int(committed.name.split('.')[1]) != part.tell():
+                raise UploadError('بخشی از فایل دریافت نشده است؛ آپلود را دوباره شروع کنید.')
+            with open(committed, 'rb') as chunk_file:
+                shutil.copyfileobj(chunk_file, part, COPY_BUFFER_SIZE)
+        if part.tell() != session.total_size:
+            raise UploadError('بخشی از فایل دریافت نشده است؛ آپلود را دوباره شروع کنید.')
+    return path
+
+
+def finish_session(session):
+    """ساخت پیوست از جلسه کامل‌شده و حذف فایل‌های موقت"""
+    session_id = session.pk
+    try:
+        path = assemble_session(session)
+    except UploadError:
+        discard_session(session)
+        raise
+    with open(path, 'rb') as part:
+        sha256 = file_sha256(part)
+        if session.sha256 and session.sha256 != sha256:
+            discard_session(session)
+            raise UploadError('هش فایل دریافت‌شده با هش اعلام‌شده برابر نیست؛ آپلود را دوباره شروع کنید.')
+        attachment = create_attachment(
+            session.task, session.user, part, session.file_name, session.total_size,
+            description=session.description, sha256=sha256, session=session,
+        )
+    # create_attachment جلسه را حذف کرده و pk آن دیگر در دسترس نیست
+    remove_session_files(session_id)
+    return attachment
+
+
+def remove_session_files(session_id):
+    """فایل کامل، تکه‌های ثبت‌شده و تکه‌های موقتی که پردازششان وسط کار متوقف شده است"""
+    for path in session_directory().glob(f'{session_id}.*'):
+        path.unlink(missing_ok=True)
+
+
+def discard_session(session):
+    remove_session_files(session.pk)
+    session.delete()
+
+
+def discard_stale_sessions(older_than):
+    """حذف جلسه‌های رهاشده‌ای که از older_than به بعد تکه‌ای دریافت نکرده‌اند"""
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - older_than)
+    count = 0
+    for session in stale.iterator():
+        discard_session(session)
+        count += 1
+    return count
+
+
+def discard_unreferenced_files(older_than=UNREFERENCED_FILE_AGE):
+    """حذف فایل‌های محتوایی که هیچ پیوستی به آن‌ها اشاره نمی‌کند و از older_than به بعد استفاده نشده‌اند"""
+    cutoff = timezone.now() - older_than
+    try:
+        directories, _ = default_storage.listdir(ATTACHMENT_DIRECTORY)
+    except FileNotFoundError:
+        return 0
+    count = 0
+    for directory in [ATTACHMENT_DIRECTORY] + [f'{ATTACHMENT_DIRECTORY}/{name}' for name in directories]:
+        names = [f'{directory}/{name}' for name in default_storage.listdir(directory)[1]]
+        referenced = set(TaskAttachment.objects.filter(file__in=names).values_list('file', flat=True))
+        for name in names:
+            if name not in referenced and default_storage.get_modified_time(name) < cutoff:
+                default_storage.delete(name)
+                count += 1
+    return count
+
+
+# Downloads
+def parse_range(header, size):
+    """تبدیل هدر Range یک‌بازه‌ای به (شروع، طول)؛ None یعنی کل فایل
+
+    بازه نامعتبر یا خارج از فایل UploadError می‌دهد (پاسخ ۴۱۶).
+    """
+    match = _RANGE_HEADER.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        raise UploadError('بازه نامعتبر است.')
+    if not first:
+        length = min(int(last), size)
+        start = size - length
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        length = end - start + 1
+    if start >= size or length <= 0:
+        raise UploadError('بازه درخواستی خارج از فایل است.')
+    return start, length
+
+
+def iter_file_range(fileobj, start, length):
+    fileobj.seek(start)
+    remaining = length
+    try:
+        while remaining > 0:
+            chunk = fileobj.read(min(COPY_BUFFER_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
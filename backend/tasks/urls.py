@@ -1,5 +1,25 @@
 from django.urls import path
+from .views import *
 
 urlpatterns = [
-    # Tasks URLs will be added here
+    # Task URLs
+    path('', TaskListCreateView.as_view(), name='task-list'),
+    path('board/', TaskBoardView.as_view(), name='task-board'),
+    path('bulk-transition/', TaskBulkTransitionView.as_view(), name='task-bulk-transition'),
+    path('<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
+    
+    # Task Comment URLs
+    path('<int:task_pk>/comments/', TaskCommentListCreateView.as_view(), name='task-comment-list'),
+    
+    # Task Attachment URLs
+    path('<int:task_pk>/attachments/', TaskAttachmentListCreateView.as_view(), name='task-attachment-list'),
+    path('<int:task_pk>/attachments/<int:pk>/download/', TaskAttachmentDownloadView.as_view(), name='task-attachment-download'),
+    
+    # Chunked Upload URLs
+    path('<int:task_pk>/uploads/', UploadSessionCreateView.as_view(), name='task-upload-create'),
+    path('uploads/<uuid:pk>/', UploadSessionDetailView.as_view(), name='task-upload-detail'),
+    
+    # Notification URLs
+    path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('notifications/mark-read/', NotificationMarkReadView.as_view(), name='notification-mark-read'),
 ]
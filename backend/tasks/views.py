@@ -1,3 +1,316 @@
-from django.shortcuts import render
+import io
+import mimetypes
+import os
+from urllib.parse import quote
 
-# Create your views here.
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+from rest_framework import generics, permissions, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+
+from financial.cache import bump_table_version
+from financial.conditional import ConditionalGetMixin
+from financial.pagination import OptInCursorPagination
+from financial.views import OptimizedQuerysetMixin
+from .models import *
+from .serializers import *
+from .uploads import (
+    OffsetMismatchError, QuotaExceededError, UploadError, append_chunk, check_quota, create_attachment,
+    discard_session, finish_session, iter_file_range, parse_range, start_session,
+)
+
+
+def visible_tasks(user):
+    """کارهایی که کاربر می‌بیند: مدیریت همه کارها، بقیه کارهای محول‌شده یا ایجادشده توسط خودشان"""
+    if user.has_management_access:
+        return Task.objects.all()
+    return Task.objects.filter(Q(assigned_to=user) | Q(created_by=user))
+
+
+# Task Views
+class TaskListCreateView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
+    """ویو لیست و ایجاد کارها"""
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    conditional_models = (TaskComment, TaskAttachment)
+    pagination_class = OptInCursorPagination
+    filterset_fields = ['status', 'priority', 'assigned_to', 'created_by', 'is_completed']
+    search_fields = ['title', 'description']
+    ordering_fields = ['due_date', 'priority', 'status', 'created_at']
+    
+    def get_base_queryset(self):
+        return visible_tasks(self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+
+class TaskDetailView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    """ویو جزئیات کار"""
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    conditional_models = (TaskComment, TaskAttachment)
+    
+    def get_base_queryset(self):
+        return visible_tasks(self.request.user)
+
+
+class TaskBoardView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.ListAPIView):
+    """ویو بورد کارهای محول‌شده به کاربر به تفکیک وضعیت
+    
+    همه کارهای بورد با تعداد ثابتی کوئری بارگذاری می‌شوند: یک کوئری برای کارها
+    به همراه کاربران و شمارش‌ها و یک کوئری برای آخرین نظرهای همه کارها.
+    مدیریت می‌تواند با ?user=<id> بورد کاربر دیگری را ببیند.
+    """
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    conditional_models = (TaskComment, TaskAttachment)
+    max_board_size = 500
+    
+    def get_base_queryset(self):
+        user_id = self.request.query_params.get('user')
+        if user_id and self.request.user.has_management_access:
+            return Task.objects.filter(assigned_to_id=user_id) if user_id.isdigit() else Task.objects.none()
+        return self.request.user.assigned_tasks.all()
+    
+    def get_queryset(self):
+        return super().get_queryset().order_by('due_date', 'id')
+    
+    def list(self, request, *args, **kwargs):
+        tasks = list(self.get_queryset()[:self.max_board_size + 1])
+        truncated = len(tasks) > self.max_board_size
+        tasks = tasks[:self.max_board_size]
+        
+        columns = {value: [] for value, _ in Task.STATUS_CHOICES}
+        for task in self.get_serializer(tasks, many=True).data:
+            columns[task['status']].append(task)
+        return Response({
+            'columns': [
+                {'status': value, 'label': label, 'tasks': columns[value]}
+                for value, label in Task.STATUS_CHOICES
+            ],
+            'truncated': truncated,
+        }, status=status.HTTP_200_OK)
+
+
+class TaskBulkTransitionView(generics.GenericAPIView):
+    """ویو تغییر وضعیت گروهی کارها
+    
+    وضعیت و فیلدهای مشتق آن (تاریخ تکمیل و تکمیل شده) برای همه کارها با یک
+    UPDATE نوشته می‌شوند. اگر کاری یافت نشود یا کاربر به آن دسترسی نداشته باشد
+    هیچ کاری تغییر نمی‌کند.
+    """
+    serializer_class = TaskBulkTransitionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data['ids'])
+        tasks = visible_tasks(request.user).filter(pk__in=ids)
+        
+        with transaction.atomic():
+            missing = ids - set(tasks.values_list('pk', flat=True))
+            if missing:
+                return Response({'error': 'کار یافت نشد.', 'not_found': sorted(missing)}, status=status.HTTP_404_NOT_FOUND)
+            updated = tasks.transition(serializer.validated_data['status'])
+        
+        return Response({'updated': updated, 'status': serializer.validated_data['status']}, status=status.HTTP_200_OK)
+
+
+class TaskRelatedListCreateView(ConditionalGetMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
+    """ویو پایه لیست صفحه‌بندی‌شده و ایجاد ردیف‌های وابسته به یک کار"""
+    permission_classes = [permissions.IsAuthenticated]
+    # دسترسی به کار (محول‌شده یا ایجادشده) به ردیف کار وابسته است
+    conditional_models = (Task,)
+    
+    def get_task(self):
+        if not hasattr(self, '_task'):
+            self._task = get_object_or_404(visible_tasks(self.request.user), pk=self.kwargs['task_pk'])
+        return self._task
+    
+    def get_base_queryset(self):
+        return self.get_serializer_class().Meta.model.objects.filter(task=self.get_task())
+
+
+# Task Comment Views
+class TaskCommentListCreateView(TaskRelatedListCreateView):
+    """ویو نظرات یک کار؛ مستقل از لیست کارها صفحه‌بندی می‌شود"""
+    serializer_class = TaskCommentSerializer
+    pagination_class = OptInCursorPagination
+    
+    def perform_create(self, serializer):
+        serializer.save(task=self.get_task(), created_by=self.request.user)
+
+
+# Task Attachment Views
+class TaskAttachmentListCreateView(TaskRelatedListCreateView):
+    """ویو پیوست‌های یک کار"""
+    serializer_class = TaskAttachmentSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def get_queryset(self):
+        return super().get_queryset().order_by('-uploaded_at', '-id')
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        uploaded = serializer.validated_data['file']
+        try:
+            # بررسی زودهنگام پیش از ذخیره فایل؛ سهمیه هنگام ساخت پیوست زیر قفل دوباره بررسی می‌شود
+            check_quota(request.user, uploaded.size)
+            attachment = create_attachment(
+                self.get_task(), request.user, uploaded, uploaded.name, uploaded.size,
+                description=serializer.validated_data.get('description', ''),
+            )
+        except QuotaExceededError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return Response(self.get_serializer(attachment).data, status=status.HTTP_201_CREATED)
+
+
+class TaskAttachmentDownloadView(generics.GenericAPIView):
+    """ویو دریافت پیوست با پشتیبانی از Range
+    
+    اگر TASK_ATTACHMENT_ACCEL_PREFIX تنظیم شده باشد فقط هدر X-Accel-Redirect
+    برگردانده می‌شود و nginx خود فایل (و بازه‌ها) را ارسال می‌کند.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, task_pk, pk):
+        task = get_object_or_404(visible_tasks(request.user), pk=task_pk)
+        attachment = get_object_or_404(TaskAttachment.objects.filter(task=task), pk=pk)
+        file_name = attachment.file_name or os.path.basename(attachment.file.name)
+        
+        if settings.TASK_ATTACHMENT_ACCEL_PREFIX:
+            response = HttpResponse(content_type=mimetypes.guess_type(file_name)[0] or 'application/octet-stream')
+            response['X-Accel-Redirect'] = settings.TASK_ATTACHMENT_ACCEL_PREFIX.rstrip('/') + '/' + quote(attachment.file.name)
+            response['Content-Disposition'] = content_disposition_header(True, file_name)
+            return response
+        
+        try:
+            fileobj = attachment.file.open('rb')
+        except FileNotFoundError:
+            raise Http404
+        size = attachment.file.size
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except UploadError:
+            fileobj.close()
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        
+        if byte_range is None:
+            response = FileResponse(fileobj, as_attachment=True, filename=file_name)
+        else:
+            start, length = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(fileobj, start, length),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=mimetypes.guess_type(file_name)[0] or 'application/octet-stream',
+            )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+            response['Content-Disposition'] = content_disposition_header(True, file_name)
+        response['Accept-Ranges'] = 'bytes'
+        if attachment.sha256:
+            response['ETag'] = f'"{attachment.sha256}"'
+        return response
+
+
+# Upload Session Views
+class UploadSessionCreateView(generics.CreateAPIView):
+    """ویو شروع آپلود تکه‌ای؛ حجم فایل از سهمیه کاربر رزرو می‌شود"""
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def create(self, request, task_pk):
+        task = get_object_or_404(visible_tasks(request.user), pk=task_pk)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = start_session(task, request.user, **serializer.validated_data)
+        except QuotaExceededError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(ConditionalGetMixin, generics.RetrieveDestroyAPIView):
+    """ویو ادامه آپلود تکه‌ای
+    
+    GET محل فعلی (offset) را برای ادامه آپلود برمی‌گرداند. PUT/PATCH بدنه خام
+    درخواست را از بایت Upload-Offset به فایل اضافه می‌کند؛ بدنه بدون پارس و
+    تکه‌تکه روی دیسک نوشته می‌شود. با رسیدن به حجم کل، پیوست ساخته می‌شود.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+    
+    def put(self, request, pk):
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'هدر Upload-Offset و Content-Length الزامی است.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            session = append_chunk(session, request.stream or io.BytesIO(), offset, length)
+        except OffsetMismatchError as e:
+            return Response({'error': str(e), 'offset': e.expected}, status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if session.received_size < session.total_size:
+            return Response(self.get_serializer(session).data, status=status.HTTP_200_OK)
+        try:
+            attachment = finish_session(session)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            TaskAttachmentSerializer(attachment, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED,
+        )
+    
+    patch = put
+    
+    def perform_destroy(self, instance):
+        discard_session(instance)
+
+
+# Notification Views
+class NotificationListView(ConditionalGetMixin, generics.ListAPIView):
+    """ویو اعلان‌های کاربر؛ ?is_read=false فقط اعلان‌های خوانده‌نشده را برمی‌گرداند"""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    filterset_fields = ['kind', 'is_read']
+    
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user)
+
+
+class NotificationMarkReadView(generics.GenericAPIView):
+    """ویو علامت‌گذاری اعلان‌ها به عنوان خوانده‌شده؛ بدون ids همه اعلان‌های کاربر"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        notifications = Notification.objects.filter(user=request.user, is_read=False)
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                return Response({'error': 'ids باید لیستی از شناسه‌ها باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+            notifications = notifications.filter(pk__in=ids)
+        updated = notifications.update(is_read=True)
+        if updated:
+            transaction.on_commit(lambda: bump_table_version(Notification))
+        return Response({'updated': updated}, status=status.HTTP_200_OK)